@@ -15,6 +15,7 @@ import { MatTableModule } from '@angular/material/table';
 import { MatPaginatorModule, PageEvent } from '@angular/material/paginator';
 import { CountryFlagPipe } from '../pipes/country-flag.pipe';
 import { debounceTime, distinctUntilChanged } from 'rxjs/operators';
+import { resolveAthleteImageUrl } from '../config/api.config';
 
 interface Athlete {
   athleteId?: number;
@@ -165,7 +166,7 @@ export class BuscarAtletasComponent implements OnInit {
       gender: data?.gender ?? data?.sex ?? '',
       age: age ?? undefined,
       birth: data?.birth ?? data?.birthDate ?? '',
-      imageUrl: data?.image_url ?? data?.imageUrl ?? '',
+      imageUrl: resolveAthleteImageUrl(data?.image_url ?? data?.imageUrl, 160),
       profileUrl: data?.profile_url ?? data?.profileUrl ?? '',
       club: data?.club ?? data?.team ?? '',
       bestResults: data?.bestResults ?? []
@@ -39,3 +39,21 @@ export function resolvePhpAssetUrl(path: string): string {
   const normalizedPath = path.startsWith('/') ? path : `/${path}`;
   return `${API_CONFIG.phpPublicBase}${normalizedPath}`;
 }
+
+// Fotos de atletas cacheadas por scrape-img.py: /uploads/athletes/<xx>/<sha1>.<ext>
+// con miniaturas <sha1>_w80.jpg y <sha1>_w160.jpg al lado.
+const ATHLETE_IMAGE_PATTERN = /(\/uploads\/athletes\/[0-9a-f]{2}\/[0-9a-f]{40})(?:_w\d+)?\.[a-z]+$/i;
+
+export type AthleteImageWidth = 80 | 160;
+
+export function resolveAthleteImageUrl(url: string | null | undefined, width?: AthleteImageWidth): string {
+  if (!url) {
+    return '';
+  }
+  // Sin copia local (URL de World Aquatics): se usa tal cual
+  if (!ATHLETE_IMAGE_PATTERN.test(url)) {
+    return url;
+  }
+  const sized = width ? url.replace(ATHLETE_IMAGE_PATTERN, `$1_w${width}.jpg`) : url;
+  return resolvePhpAssetUrl(sized);
+}
@@ -15,6 +15,7 @@ import { map, catchError } from 'rxjs/operators';
 import { MatTabsModule, MatTabChangeEvent } from '@angular/material/tabs';
 import { Competition } from '../models/competition.interface';
 import { DashboardStats, RankingEntryView, TopEvent } from '../models/dashboard.interfaces';
+import { resolveAthleteImageUrl } from '../config/api.config';
 
 @Component({
   selector: 'app-dash-board',
@@ -544,7 +545,7 @@ export class DashBoardComponent implements OnInit {
       rank: it?.rank || it?.overallRank,
       country: it?.country,
       name: this.limpiarNombre(it?.name, it?.country),
-      imageUrl: it?.imageUrl || null,
+      imageUrl: resolveAthleteImageUrl(it?.imageUrl, 80) || null,
       profileUrl: it?.profileUrl || null,
     }));
   }
@@ -14,6 +14,7 @@ import { catchError } from 'rxjs/operators';
 import { CountryFlagPipe } from '../pipes/country-flag.pipe';
 import { CityNamePipe } from '../pipes/city-name.pipe';
 import { CompetitionService, Competition } from '../services/competition.service';
+import { resolveAthleteImageUrl } from '../config/api.config';
 
 type PulseStatus = 'live' | 'upcoming' | 'recent' | 'past';
 
@@ -197,15 +198,8 @@ export class EstadisticasComponent implements OnInit {
   }
 
   getAthleteImageUrl(imageUrl?: string | null): string | null {
-    if (!imageUrl) {
-      return null;
-    }
-    // Si la URL ya es completa, la usamos tal cual
-    if (imageUrl.startsWith('http://') || imageUrl.startsWith('https://')) {
-      return imageUrl;
-    }
-    // Si es una ruta relativa, la convertimos
-    return imageUrl;
+    // Copia local servida por el backend PHP (miniatura) o URL original
+    return resolveAthleteImageUrl(imageUrl, 160) || null;
   }
 
   onImageError(event: Event): void {
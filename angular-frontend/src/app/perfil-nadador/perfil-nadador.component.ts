@@ -20,6 +20,7 @@ import { DatosService } from '../services/datos.service';
 import { Competition } from '../models/competition.interface';
 import { AuthService } from '../services/auth.service';
 import { RankingFilters } from '../models/filters/ranking-filters.interface';
+import { resolveAthleteImageUrl } from '../config/api.config';
 
 interface AthleteProfile {
   name: string;
@@ -550,7 +551,7 @@ export class PerfilNadadorComponent implements OnInit, OnDestroy {
           athleteId: athlete.athleteId ?? null,
           country: athlete.countryCode || '',
           nationality: athlete.countryCode || '',
-          imageUrl: athlete.imageUrl || '',
+          imageUrl: resolveAthleteImageUrl(athlete.imageUrl, 160),
           profileUrl: athlete.profileUrl || '',
           gender: athlete.gender || this.athlete.gender,
           age: typeof athlete.age === 'number' ? athlete.age : this.athlete.age
@@ -670,7 +671,7 @@ export class PerfilNadadorComponent implements OnInit, OnDestroy {
       athleteId: athleteIdFromQuery || athleteIdFromState,
       country: query['country'] || stateAthlete.country || '',
       nationality: stateAthlete.nationality || '',
-      imageUrl: query['imageUrl'] || stateAthlete.imageUrl || '',
+      imageUrl: resolveAthleteImageUrl(query['imageUrl'] || stateAthlete.imageUrl, 160),
       profileUrl: query['profileUrl'] || stateAthlete.profileUrl || '',
       gender: query['gender'] || filters.gender || 'F',
       age: query['age'] ? Number(query['age']) : (stateAthlete.age ?? null),
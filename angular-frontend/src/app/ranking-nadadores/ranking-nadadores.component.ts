@@ -15,6 +15,7 @@ import { MatIconModule } from '@angular/material/icon';
 import { MatDialogModule } from '@angular/material/dialog';
 import { ConfirmationService } from '../shared/services/confirmation.service';
 import { ActivatedRoute, Router } from '@angular/router';
+import { resolveAthleteImageUrl } from '../config/api.config';
 
 type Gender = 'M' | 'F';
 type PoolConfiguration = 'LCM' | 'SCM';
@@ -237,7 +238,7 @@ export class RankingNadadoresComponent implements OnInit {
       location: item?.location ?? item?.locationCountryCode ?? '',
       date: item?.date ?? item?.raceDate ?? '',
       profileUrl: item?.profileUrl ?? item?.athleteProfileUrl ?? '',
-      imageUrl: item?.imageUrl ?? '',
+      imageUrl: resolveAthleteImageUrl(item?.imageUrl, 80),
       athleteId: item?.athleteId ?? item?.athlete_id ?? null,
     }));
   }
@@ -427,7 +428,7 @@ export class RankingNadadoresComponent implements OnInit {
     const filters = this.rankingForm?.value || {};
     const nameParam = encodeURIComponent(nadador?.name || '');
     const profileUrl = nadador?.profileUrl || '';
-    const imageUrl = nadador?.imageUrl || '';
+    const imageUrl = resolveAthleteImageUrl(nadador?.imageUrl, 160);
     this.router.navigate(['/nadadores', 'perfil', nameParam], {
       queryParams: {
         country: nadador?.country,
@@ -77,3 +77,42 @@ function jsonResponse(array $payload, int $status = 200): void
     echo json_encode($payload);
     exit;
 }
+
+/**
+ * Si la columna existe en esta base de datos. Las columnas que añaden los
+ * scrapers (time_cs, event_id, image_local_path...) no están hasta que se
+ * ejecutan, así que las consultas que las usan comprueban antes. Se cachea
+ * por petición.
+ */
+function tableHasColumn(string $table, string $column): bool
+{
+    static $cache = [];
+    $key = "{$table}.{$column}";
+    if (!array_key_exists($key, $cache)) {
+        try {
+            $stmt = getPDO()->prepare(
+                'SELECT 1 FROM information_schema.COLUMNS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = ? AND COLUMN_NAME = ?'
+            );
+            $stmt->execute([$table, $column]);
+            $cache[$key] = $stmt->fetch() !== false;
+        } catch (PDOException $e) {
+            $cache[$key] = false;
+        }
+    }
+
+    return $cache[$key];
+}
+
+/**
+ * Expresión SQL de la foto de un atleta: la copia local que descarga
+ * scrape-img.py (atletas.image_local_path, servida desde public/uploads)
+ * y, si no la hay, la URL original de World Aquatics. Si la columna aún no
+ * existe en esta base de datos se usa solo image_url.
+ */
+function athleteImageColumn(string $alias = 'a'): string
+{
+    return tableHasColumn('atletas', 'image_local_path')
+        ? "COALESCE({$alias}.image_local_path, {$alias}.image_url)"
+        : "{$alias}.image_url";
+}
@@ -27,7 +27,9 @@ class AthleteController
     {
         try {
             $pdo = getPDO();
-            $sql = 'SELECT athlete_id, athlete_name, gender, country_code, age, image_url FROM atletas ORDER BY athlete_name LIMIT 10000';
+            $image = \athleteImageColumn();
+            $sql = "SELECT a.athlete_id, a.athlete_name, a.gender, a.country_code, a.age, {$image} AS image_url
+                    FROM atletas a ORDER BY a.athlete_name LIMIT 10000";
             $stmt = $pdo->query($sql);
             $athletes = $stmt->fetchAll(\PDO::FETCH_ASSOC);
 
@@ -36,12 +36,13 @@ class InscriptionRepository
 
     public function findByCompetition(int $competicion_id): array
     {
+        $image = \athleteImageColumn();
         $stmt = $this->pdo->prepare(
-            'SELECT ia.*, a.athlete_name, a.country_code, a.gender, a.image_url
+            "SELECT ia.*, a.athlete_name, a.country_code, a.gender, {$image} AS image_url
             FROM inscripciones_atleticas ia
             JOIN atletas a ON ia.athlete_id = a.athlete_id
             WHERE ia.competicion_id = ?
-            ORDER BY ia.inscrito_en DESC'
+            ORDER BY ia.inscrito_en DESC"
         );
         $stmt->execute([$competicion_id]);
         return $stmt->fetchAll(PDO::FETCH_ASSOC);
@@ -18,19 +18,44 @@ class SwimmingRankingRepository
      */
     public function findByFilters(array $filters, int $limit, int $offset = 0): array
     {
-        [$where, $params] = $this->buildWhereClause($filters);
+        // Con una prueba concreta (género, distancia, estilo y piscina) y sin
+        // filtro de fechas se sirve el ranking precalculado por el scraper
+        // (mejor marca por atleta y prueba, ya ordenada). Si esa prueba aún no
+        // está materializada (p. ej. LCM, que el scraper no recorre, o datos
+        // sin event_id/time_cs) se sigue con swimming_rankings. Con filtros
+        // más amplios no se usa: podría mezclar pruebas materializadas y otras
+        // que no lo están
+        $eventId = $this->findEventId($filters);
+        if ($eventId !== null
+            && empty($filters['year']) && empty($filters['startDate']) && empty($filters['endDate'])
+            && $this->hasBestTable()
+        ) {
+            $best = $this->findBestByFilters($filters, $limit, $offset, $eventId);
+            if ($best['total'] > 0) {
+                return $best;
+            }
+        }
+
+        [$where, $params] = $this->buildWhereClause($filters, $eventId);
+        $image = \athleteImageColumn();
+        // overall_rank es el puesto en el ranking completo de la prueba; con
+        // filtro de fechas el orden bueno es el de la marca (time_cs, que
+        // además va en el índice de la prueba)
+        $orderBy = \tableHasColumn('swimming_rankings', 'time_cs')
+            ? 'sr.time_cs IS NULL, sr.time_cs ASC, sr.overall_rank ASC'
+            : 'sr.overall_rank ASC';
 
         $sql = "SELECT sr.*, 
                        a.athlete_name AS athlete_name_join,
                        a.age AS athlete_age,
                        a.gender AS athlete_gender,
                        a.country_code AS athlete_country_code,
-                       a.image_url AS athlete_image_url,
+                       {$image} AS athlete_image_url,
                        a.athlete_profile_url AS athlete_profile_url_join
                 FROM swimming_rankings sr
                 INNER JOIN atletas a ON a.athlete_id = sr.athlete_id
                 {$where}
-                ORDER BY sr.overall_rank ASC
+                ORDER BY {$orderBy}
                 LIMIT :limit OFFSET :offset";
         $stmt = $this->db->prepare($sql);
 
@@ -64,13 +89,108 @@ class SwimmingRankingRepository
     }
 
     /**
+     * Lee de swimming_rankings_best (ver scrape_rankings.py): ya deduplicada
+     * y con los datos del atleta, así que no necesita JOIN.
+     *
+     * @return array{items: SwimmingRanking[], total: int}
+     */
+    private function findBestByFilters(array $filters, int $limit, int $offset, int $eventId): array
+    {
+        [$where, $params] = $this->buildWhereClause($filters, $eventId);
+
+        $sql = "SELECT sr.*
+                FROM swimming_rankings_best sr
+                {$where}
+                ORDER BY sr.overall_rank ASC
+                LIMIT :limit OFFSET :offset";
+        $stmt = $this->db->prepare($sql);
+
+        foreach ($params as $key => $value) {
+            $type = is_int($value) ? PDO::PARAM_INT : PDO::PARAM_STR;
+            $stmt->bindValue(':' . $key, $value, $type);
+        }
+        $stmt->bindValue(':limit', $limit, PDO::PARAM_INT);
+        $stmt->bindValue(':offset', $offset, PDO::PARAM_INT);
+
+        $stmt->execute();
+        $rows = $stmt->fetchAll();
+        $items = array_map(fn ($row) => SwimmingRanking::fromArray($row), $rows);
+
+        $countStmt = $this->db->prepare("SELECT COUNT(*) FROM swimming_rankings_best sr {$where}");
+        foreach ($params as $key => $value) {
+            $type = is_int($value) ? PDO::PARAM_INT : PDO::PARAM_STR;
+            $countStmt->bindValue(':' . $key, $value, $type);
+        }
+        $countStmt->execute();
+
+        return [
+            'items' => $items,
+            'total' => (int) $countStmt->fetchColumn(),
+        ];
+    }
+
+    /**
+     * id de swim_events de la prueba del filtro, si el filtro es una prueba
+     * concreta (género, distancia, estilo y piscina) y la BD ya tiene event_id.
+     */
+    private function findEventId(array $filters): ?int
+    {
+        foreach (['gender', 'distance', 'stroke', 'poolConfiguration'] as $key) {
+            if (empty($filters[$key])) {
+                return null;
+            }
+        }
+        if (!\tableHasColumn('swimming_rankings', 'event_id')) {
+            return null;
+        }
+
+        $stmt = $this->db->prepare(
+            'SELECT id FROM swim_events
+             WHERE gender = :gender AND distance = :distance AND stroke = :stroke
+               AND pool_configuration = :poolConfiguration AND relay_legs IS NULL
+             LIMIT 1'
+        );
+        $stmt->bindValue(':gender', $filters['gender']);
+        $stmt->bindValue(':distance', (int) $filters['distance'], PDO::PARAM_INT);
+        $stmt->bindValue(':stroke', $filters['stroke']);
+        $stmt->bindValue(':poolConfiguration', $filters['poolConfiguration']);
+        $stmt->execute();
+        $id = $stmt->fetchColumn();
+
+        return $id === false ? null : (int) $id;
+    }
+
+    /**
+     * swimming_rankings_best la crea scrape_rankings.py; hasta la primera
+     * ejecución no existe.
+     */
+    private function hasBestTable(): bool
+    {
+        static $exists = null;
+        if ($exists === null) {
+            $stmt = $this->db->query("SHOW TABLES LIKE 'swimming_rankings_best'");
+            $exists = $stmt->fetch() !== false;
+        }
+        return $exists;
+    }
+
+    /**
+     * Con $eventId la prueba se filtra por event_id (índice event_id, time_cs)
+     * en vez de por sus cuatro columnas.
+     *
      * @return array{0: string, 1: array<string, string|int>}
      */
-    private function buildWhereClause(array $filters): array
+    private function buildWhereClause(array $filters, ?int $eventId = null): array
     {
         $where = [];
         $params = [];
 
+        if ($eventId !== null) {
+            $where[] = 'sr.event_id = :eventId';
+            $params['eventId'] = $eventId;
+            $filters = array_diff_key($filters, array_flip(['gender', 'distance', 'stroke', 'poolConfiguration']));
+        }
+
         if (!empty($filters['gender'])) {
             $where[] = 'sr.gender = :gender';
             $params['gender'] = $filters['gender'];
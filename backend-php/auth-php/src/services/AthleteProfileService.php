@@ -13,17 +13,18 @@ class AthleteProfileService
 
     public function getAthleteProfile(int $athleteId): ?array
     {
+        $image = \athleteImageColumn();
         $stmt = $this->pdo->prepare(
-            'SELECT athlete_id,
-                    athlete_name,
-                    gender,
-                    country_code,
-                    age,
-                    image_url,
-                    athlete_profile_url
-             FROM atletas
-             WHERE athlete_id = ?
-             LIMIT 1'
+            "SELECT a.athlete_id,
+                    a.athlete_name,
+                    a.gender,
+                    a.country_code,
+                    a.age,
+                    {$image} AS image_url,
+                    a.athlete_profile_url
+             FROM atletas a
+             WHERE a.athlete_id = ?
+             LIMIT 1"
         );
         $stmt->execute([$athleteId]);
         $row = $stmt->fetch(PDO::FETCH_ASSOC);
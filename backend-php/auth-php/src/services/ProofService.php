@@ -294,15 +294,16 @@ class ProofService
      */
     private function getInscriptionsForProof(int $proofId): array
     {
+        $image = \athleteImageColumn();
         $stmt = $this->pdo->prepare(
-            'SELECT ip.id, ip.inscripcion_atletica_id, ia.athlete_id, ia.numero_dorsal,
-                    a.athlete_name, a.gender, a.country_code, a.image_url,
+            "SELECT ip.id, ip.inscripcion_atletica_id, ia.athlete_id, ia.numero_dorsal,
+                    a.athlete_name, a.gender, a.country_code, {$image} AS image_url,
                     ia.estado_inscripcion, ip.tiempo_inscripcion, ip.clasificacion
             FROM inscripciones_pruebas ip
             JOIN inscripciones_atleticas ia ON ip.inscripcion_atletica_id = ia.id
             JOIN atletas a ON ia.athlete_id = a.athlete_id
             WHERE ip.prueba_id = ?
-            ORDER BY ip.created_at ASC'
+            ORDER BY ip.created_at ASC"
         );
         $stmt->execute([$proofId]);
         return $stmt->fetchAll(\PDO::FETCH_ASSOC);
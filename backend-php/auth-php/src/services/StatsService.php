@@ -45,13 +45,14 @@ class StatsService
      */
     private function getMostVersatileAthletes(): array
     {
+        $image = \athleteImageColumn();
         $sql = <<<SQL
             SELECT 
                 a.athlete_id,
                 a.athlete_name,
                 a.country_code,
                 a.gender,
-                a.image_url,
+                {$image} AS image_url,
                 COUNT(DISTINCT sr.stroke) as different_strokes,
                 COUNT(DISTINCT sr.distance) as different_distances,
                 COUNT(DISTINCT CONCAT(sr.distance, '-', sr.stroke)) as total_events,
@@ -59,7 +60,7 @@ class StatsService
             FROM atletas a
             INNER JOIN swimming_rankings sr ON a.athlete_id = sr.athlete_id
             WHERE sr.points IS NOT NULL
-            GROUP BY a.athlete_id, a.athlete_name, a.country_code, a.gender, a.image_url
+            GROUP BY a.athlete_id, a.athlete_name, a.country_code, a.gender, {$image}
             HAVING total_events >= 3
             ORDER BY total_events DESC, avg_points DESC
             LIMIT 5
@@ -74,13 +75,14 @@ class StatsService
      */
     private function getMostConsistentAthletes(): array
     {
+        $image = \athleteImageColumn();
         $sql = <<<SQL
             SELECT 
                 a.athlete_id,
                 a.athlete_name,
                 a.country_code,
                 a.gender,
-                a.image_url,
+                {$image} AS image_url,
                 AVG(sr.points) as avg_points,
                 MIN(sr.points) as min_points,
                 MAX(sr.points) as max_points,
@@ -89,7 +91,7 @@ class StatsService
             FROM atletas a
             INNER JOIN swimming_rankings sr ON a.athlete_id = sr.athlete_id
             WHERE sr.points IS NOT NULL
-            GROUP BY a.athlete_id, a.athlete_name, a.country_code, a.gender, a.image_url
+            GROUP BY a.athlete_id, a.athlete_name, a.country_code, a.gender, {$image}
             HAVING total_races >= 3
             ORDER BY avg_points DESC, consistency_score ASC
             LIMIT 5
@@ -104,6 +106,7 @@ class StatsService
      */
     private function getYoungTalents(): array
     {
+        $image = \athleteImageColumn();
         $sql = <<<SQL
             SELECT 
                 a.athlete_id,
@@ -111,7 +114,7 @@ class StatsService
                 a.age,
                 a.country_code,
                 a.gender,
-                a.image_url,
+                {$image} AS image_url,
                 MAX(sr.points) as best_points,
                 ANY_VALUE(sr.distance) as distance,
                 ANY_VALUE(sr.stroke) as stroke,
@@ -122,7 +125,7 @@ class StatsService
             WHERE a.age IS NOT NULL 
               AND a.age < 20
               AND sr.points IS NOT NULL
-            GROUP BY a.athlete_id, a.athlete_name, a.age, a.country_code, a.gender, a.image_url
+            GROUP BY a.athlete_id, a.athlete_name, a.age, a.country_code, a.gender, {$image}
             ORDER BY best_points DESC
             LIMIT 5
         SQL;
@@ -162,13 +165,14 @@ class StatsService
      */
     private function getRecentRecordBreakers(): array
     {
+        $image = \athleteImageColumn();
         $sql = <<<SQL
             SELECT 
                 a.athlete_id,
                 a.athlete_name,
                 a.country_code,
                 a.gender,
-                a.image_url,
+                {$image} AS image_url,
                 r.event,
                 r.time_text,
                 r.record_tags,
@@ -180,7 +184,7 @@ class StatsService
             WHERE r.record_tags IS NOT NULL 
               AND r.record_tags != ''
               AND r.race_date >= DATE_SUB(CURDATE(), INTERVAL 2 YEAR)
-            GROUP BY a.athlete_id, a.athlete_name, a.country_code, a.gender, a.image_url,
+            GROUP BY a.athlete_id, a.athlete_name, a.country_code, a.gender, {$image},
                      r.event, r.time_text, r.record_tags, r.competition, r.race_date
             ORDER BY r.race_date DESC, records_count DESC
             LIMIT 10
@@ -239,13 +243,14 @@ class StatsService
 
     public function getTopFinaPointsLeader(): ?array
     {
+        $image = \athleteImageColumn();
         $sql = <<<SQL
             SELECT 
                 a.athlete_id,
                 a.athlete_name,
                 a.country_code,
                 a.gender,
-                a.image_url,
+                {$image} AS image_url,
                 sr.points as fina_points,
                 sr.time_text as swim_time,
                 sr.distance,
@@ -286,18 +291,19 @@ class StatsService
 
     private function getTopOlympicRecordHolder(): ?array
     {
+        $image = \athleteImageColumn();
         $sql = <<<SQL
             SELECT 
                 a.athlete_id,
                 a.athlete_name,
                 a.country_code,
-                a.image_url,
+                {$image} AS image_url,
                 COUNT(*) AS total_records
             FROM resultados r
             INNER JOIN atletas a ON a.athlete_id = r.athlete_id
             WHERE (r.record_tags LIKE '%OR%' OR r.record_tags LIKE '%Olympic%')
               AND (r.competition LIKE 'Olympic%' OR r.competition LIKE '%Olympic Games%')
-            GROUP BY a.athlete_id, a.athlete_name, a.country_code, a.image_url
+            GROUP BY a.athlete_id, a.athlete_name, a.country_code, {$image}
             ORDER BY total_records DESC
             LIMIT 1
         SQL;
@@ -336,18 +342,19 @@ class StatsService
 
     private function fetchLeaderByMedalAndGender(string $medal, string $gender): ?array
     {
+        $image = \athleteImageColumn();
         $sql = <<<SQL
             SELECT 
                 a.athlete_id,
                 a.athlete_name,
                 a.country_code,
-                a.image_url,
+                {$image} AS image_url,
                 COUNT(*) AS total_medals
             FROM resultados r
             INNER JOIN atletas a ON a.athlete_id = r.athlete_id
             WHERE a.gender = :gender
               AND r.medal = :medal
-            GROUP BY a.athlete_id, a.athlete_name, a.country_code, a.image_url
+            GROUP BY a.athlete_id, a.athlete_name, a.country_code, {$image}
             ORDER BY total_medals DESC
             LIMIT 1
         SQL;
@@ -374,18 +381,19 @@ class StatsService
 
     private function fetchWorldRecordLeaderByGender(string $gender): ?array
     {
+        $image = \athleteImageColumn();
         $sql = <<<SQL
             SELECT 
                 a.athlete_id,
                 a.athlete_name,
                 a.country_code,
-                a.image_url,
+                {$image} AS image_url,
                 COUNT(*) AS total_wr
             FROM resultados r
             INNER JOIN atletas a ON a.athlete_id = r.athlete_id
             WHERE a.gender = :gender
               AND (r.record_tags LIKE '%WR%' OR r.record_tags LIKE '%World Record%')
-            GROUP BY a.athlete_id, a.athlete_name, a.country_code, a.image_url
+            GROUP BY a.athlete_id, a.athlete_name, a.country_code, {$image}
             ORDER BY total_wr DESC
             LIMIT 1
         SQL;
@@ -0,0 +1,88 @@
+"""
+Rellena event_id (tabla swim_events) en resultados y swimming_rankings.
+
+Los scrapers ya lo guardan al insertar; esto migra las filas anteriores y
+las que crea el backend PHP. Como hay pocas pruebas distintas, se resuelve
+cada combinación una vez y se actualiza con un UPDATE por prueba.
+
+    python backfill_event_ids.py
+"""
+import time
+
+import scraper_db
+import scraper_events
+from scrape_rankings import DB_CONFIG, ensure_table_exists, rebuild_best_rankings
+from scrape_athletes_and_results import ensure_resultados_table_exists
+
+
+def backfill_resultados(events: scraper_events.EventDimension) -> int:
+    with scraper_db.transaction(DB_CONFIG) as cur:
+        cur.execute("SELECT DISTINCT event, pool_length FROM resultados WHERE event_id IS NULL")
+        pairs = cur.fetchall()
+    if not pairs:
+        return 0
+
+    parsed = [(event, pool_length, scraper_events.parse_event(event, pool_length)) for event, pool_length in pairs]
+    ids = events.ids_for(DB_CONFIG, [p for _, _, p in parsed])
+    unknown = sorted({p["name"] for _, _, p in parsed if p["stroke"] is None})
+    if unknown:
+        print(f"[!] Pruebas sin distancia/estilo reconocibles (se guardan solo por nombre): {', '.join(unknown)}")
+
+    updated = 0
+    with scraper_db.transaction(DB_CONFIG) as cur:
+        for event, pool_length, p in parsed:
+            cur.execute(
+                "UPDATE resultados SET event_id = %s "
+                "WHERE event = %s AND pool_length <=> %s AND event_id IS NULL",
+                (ids[events.key(p)], event, pool_length),
+            )
+            updated += cur.rowcount
+    return updated
+
+
+def backfill_rankings(events: scraper_events.EventDimension) -> int:
+    with scraper_db.transaction(DB_CONFIG) as cur:
+        cur.execute("""
+            SELECT DISTINCT gender, distance, stroke, pool_configuration
+            FROM swimming_rankings
+            WHERE event_id IS NULL
+        """)
+        combos = cur.fetchall()
+    if not combos:
+        return 0
+
+    parsed = [(combo, scraper_events.ranking_event(*combo)) for combo in combos]
+    ids = events.ids_for(DB_CONFIG, [p for _, p in parsed])
+
+    updated = 0
+    with scraper_db.transaction(DB_CONFIG) as cur:
+        for (gender, distance, stroke, pool), p in parsed:
+            cur.execute(
+                "UPDATE swimming_rankings SET event_id = %s "
+                "WHERE gender = %s AND distance = %s AND stroke = %s "
+                "AND pool_configuration = %s AND event_id IS NULL",
+                (ids[events.key(p)], gender, distance, stroke, pool),
+            )
+            updated += cur.rowcount
+    return updated
+
+
+def main():
+    # Crea swim_events y las columnas event_id si aún no existen
+    ensure_table_exists(populate_best=False)
+    ensure_resultados_table_exists()
+    events = scraper_events.EventDimension()
+
+    started = time.perf_counter()
+    scraper_db.report_rate("event_id en resultados", backfill_resultados(events), started)
+    started = time.perf_counter()
+    scraper_db.report_rate("event_id en swimming_rankings", backfill_rankings(events), started)
+
+    # Las filas que acaban de recibir event_id entran en el ranking materializado
+    rebuild_best_rankings()
+
+    print("[✓] Backfill de event_id completado.")
+
+
+if __name__ == "__main__":
+    main()
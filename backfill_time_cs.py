@@ -0,0 +1,85 @@
+"""
+Rellena time_cs (tiempo en centésimas) en las filas que aún no lo tienen.
+
+Los scrapers ya lo calculan al insertar; esto es para los datos anteriores y
+para las filas que crea el backend PHP. Recorre cada tabla por id en lotes
+(sin OFFSET) y actualiza cada lote en una transacción, así que se puede
+cortar y volver a lanzar.
+
+    python backfill_time_cs.py              # swimming_rankings y resultados
+    python backfill_time_cs.py resultados   # solo una tabla
+"""
+import argparse
+import time
+
+import scraper_db
+from scrape_rankings import DB_CONFIG, ensure_table_exists, rebuild_best_rankings
+from scrape_athletes_and_results import ensure_resultados_table_exists
+from scraper_times import parse_time_cs
+
+
+BATCH_SIZE = 2000
+TABLES = ("swimming_rankings", "resultados")
+
+
+def backfill_table(table: str, batch_size: int = BATCH_SIZE):
+    last_id = 0
+    updated = 0
+    unparsed = []
+    started = time.perf_counter()
+
+    while True:
+        with scraper_db.transaction(DB_CONFIG) as cur:
+            cur.execute(
+                f"SELECT id, time_text FROM {table} "
+                f"WHERE id > %s AND time_cs IS NULL ORDER BY id LIMIT %s",
+                (last_id, batch_size),
+            )
+            rows = cur.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            updates = []
+            for row_id, time_text in rows:
+                time_cs = parse_time_cs(time_text)
+                if time_cs is None:
+                    unparsed.append(time_text)
+                else:
+                    updates.append((time_cs, row_id))
+            scraper_db.executemany_chunked(cur, f"UPDATE {table} SET time_cs = %s WHERE id = %s", updates)
+
+        updated += len(updates)
+        print(f"[*] {table}: {updated} filas actualizadas (hasta id {last_id})")
+
+    scraper_db.report_rate(f"time_cs en {table}", updated, started)
+    if unparsed:
+        sample = ", ".join(repr(t) for t in sorted(set(unparsed))[:10])
+        print(f"[!] {table}: {len(unparsed)} tiempos sin formato reconocible (quedan a NULL): {sample}")
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rellena la columna time_cs a partir de time_text")
+    parser.add_argument("tables", nargs="*", choices=TABLES, default=list(TABLES))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    # Añade la columna y los índices si la tabla es anterior a time_cs
+    if "swimming_rankings" in args.tables:
+        ensure_table_exists(populate_best=False)
+    if "resultados" in args.tables:
+        ensure_resultados_table_exists()
+
+    for table in args.tables:
+        backfill_table(table, args.batch_size)
+
+    # Las filas que acaban de recibir time_cs entran en el ranking materializado
+    if "swimming_rankings" in args.tables:
+        rebuild_best_rankings()
+
+    print("[✓] Backfill de time_cs completado.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""
+Benchmark offline de los parsers de los scrapers (sin red).
+
+Levanta un servidor HTTP local que imita a worldaquatics.com:
+- /swimming/rankings         ranking sintético de --rows filas, paginado con
+                             "Show More" en fragmentos de --page-size filas
+- /athletes/<id>/<id>        perfil sintético con foto y 'Personal Best Results'
+- /debug/<fichero>.html      páginas reales guardadas en api-swim-live/debug-screenshots
+                             con una tabla de ranking / cabecera de perfil sintética
+                             insertada (son páginas de resultados de competición:
+                             aportan el tamaño y el marcado real, no filas propias)
+
+y ejecuta contra él:
+- rankings (http):    scrape_rankings.fetch_rankings_http
+- rankings (html):    scrape_rankings.extract_ranking_rows_from_html sobre la tabla
+                      sintética y las páginas de debug
+- imágenes:           scrape-img.fetch_athlete_image_url sobre perfiles sintéticos y de debug
+- best results:       scrape_athletes_and_results.scrape_personal_best_results (y el
+                      ranking en modo navegador). El parser lee la página con
+                      Playwright, así que solo corre con --browser y Chromium
+                      instalado; sin --browser aparece como omitido.
+
+Para cada caso muestra filas/s, latencia (mediana de --repeat iteraciones)
+y pico de memoria Python (tracemalloc, en una pasada aparte). Un caso que
+no parsea ninguna fila se marca como FALLO y el script sale con código 1.
+Ejemplo:
+
+    python bench_scrapers.py --rows 10000 --repeat 3 --json bench.json
+"""
+import argparse
+import contextlib
+import glob
+import importlib.util
+import io
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import date, timedelta
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+import scrape_rankings
+import scrape_athletes_and_results
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEBUG_PAGES_DIR = os.path.join(ROOT, "api-swim-live", "debug-screenshots")
+
+# El bench mide la paginación entera, sin el corte top-N
+RANKING_PARAMS = scrape_rankings.full_depth(dict(scrape_rankings.RANKING_PARAMS, distance=100, poolConfiguration="LCM"))
+
+
+def load_scrape_img():
+    """scrape-img.py no se puede importar por nombre (lleva guion)."""
+    spec = importlib.util.spec_from_file_location("scrape_img", os.path.join(ROOT, "scrape-img.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# =========================
+# HTML SINTÉTICO
+# =========================
+
+COUNTRIES = ("ESP", "USA", "AUS", "CHN", "GBR", "FRA", "ITA", "JPN", "CAN", "BRA")
+COMPETITIONS = ("World Championships", "Olympic Games", "European Championships", "National Trials")
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def ranking_row_html(rank: int, rng: random.Random) -> str:
+    athlete_id = 1_000_000 + rank
+    country = rng.choice(COUNTRIES)
+    seconds = 46.0 + rank * 0.01
+    record = '<span class="rankings-table__record-tag">WR</span>' if rank == 1 else ""
+    day = date(2015, 1, 1) + timedelta(days=rng.randrange(3650))
+    return (
+        '<tr class="rankings-table__row">'
+        f'<td class="rankings-table__cell">{rank}</td>'
+        f'<td class="rankings-table__cell"><img class="flag__img" alt="{country}" src="/flags/{country}.svg"></td>'
+        '<td class="rankings-table__cell">'
+        f'<a class="rankings-table__person-link" href="/athletes/{athlete_id}/{athlete_id}" title="Athlete {rank}">'
+        f'<div class="athlete-headshot" data-athlete-id="{athlete_id}">'
+        f'<img src="//images.local/{athlete_id}.jpg"></div> Athlete {rank}</a></td>'
+        f'<td class="rankings-table__cell">{rng.randint(16, 34)}</td>'
+        f'<td class="rankings-table__cell"><strong>{seconds:.2f}</strong>'
+        f'<div class="rankings-table__records">{record}</div></td>'
+        f'<td class="rankings-table__cell">{max(0, 1000 - rank // 10)}</td>'
+        '<td class="rankings-table__cell"></td>'
+        f'<td class="rankings-table__cell">{rng.choice(COMPETITIONS)}</td>'
+        f'<td class="rankings-table__cell"><img class="flag__img" alt="{rng.choice(COUNTRIES)}"></td>'
+        f'<td class="rankings-table__cell">{day.day:02d} {MONTHS[day.month - 1]} {day.year}</td>'
+        '</tr>'
+    )
+
+
+def show_more_button(offset: int, total: int, page_size: int) -> str:
+    if offset >= total:
+        return ""
+    return (
+        f'<button class="js-show-more-button" '
+        f'data-url="/swimming/rankings/fragment?offset={offset}&limit={page_size}">Show More</button>'
+    )
+
+
+# Mínimo JS para que el modo navegador pueda paginar igual que en la web real
+SHOW_MORE_JS = """
+<script>
+document.addEventListener('click', async (ev) => {
+    const btn = ev.target.closest('.js-show-more-button');
+    if (!btn) return;
+    btn.disabled = true;
+    const html = await (await fetch(btn.dataset.url)).text();
+    const doc = new DOMParser().parseFromString(html, 'text/html');
+    const body = document.querySelector('tbody.js-rankings-table-body');
+    doc.querySelectorAll('tr.rankings-table__row').forEach(tr => body.appendChild(tr));
+    const next = doc.querySelector('.js-show-more-button');
+    if (next) { btn.dataset.url = next.dataset.url; btn.disabled = false; } else { btn.remove(); }
+});
+</script>
+"""
+
+
+class SyntheticSite:
+    def __init__(self, rows: int, page_size: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.rows = [ranking_row_html(i + 1, rng) for i in range(rows)]
+        self.page_size = page_size
+
+    def rankings_page(self) -> str:
+        first = "".join(self.rows[:self.page_size])
+        return (
+            "<!doctype html><html><head><title>Rankings</title></head><body>"
+            '<table class="rankings-table"><tbody class="js-rankings-table-body">'
+            f"{first}</tbody></table>"
+            f"{show_more_button(self.page_size, len(self.rows), self.page_size)}"
+            f"{SHOW_MORE_JS}</body></html>"
+        )
+
+    def rankings_fragment(self, offset: int, limit: int) -> str:
+        rows = "".join(self.rows[offset:offset + limit])
+        return (
+            f"<table><tbody>{rows}</tbody></table>"
+            f"{show_more_button(offset + limit, len(self.rows), limit)}"
+        )
+
+    @staticmethod
+    def athlete_profile(athlete_id: int, n_results: int = 40) -> str:
+        rng = random.Random(athlete_id)
+        rows = []
+        for i in range(n_results):
+            day = date(2012, 1, 1) + timedelta(days=rng.randrange(4000))
+            medal = '<span class="u-screen-reader">Gold</span>' if i % 7 == 0 else "-"
+            rows.append(
+                '<tr class="athlete-table__row">'
+                f'<td class="athlete-table__cell">{50 * (1 + i % 4)}m Freestyle</td>'
+                f'<td class="athlete-table__cell"><strong>{50 + i * 0.37:.2f}</strong>'
+                '<div class="athlete-table__records"></div></td>'
+                f'<td class="athlete-table__cell">{medal}</td>'
+                f'<td class="athlete-table__cell">{"50m" if i % 2 else "25m"}</td>'
+                f'<td class="athlete-table__cell">{rng.randint(16, 34)}</td>'
+                f'<td class="athlete-table__cell">{escape(rng.choice(COMPETITIONS))}</td>'
+                f'<td class="athlete-table__cell"><img class="flag__img" alt="{rng.choice(COUNTRIES)}"></td>'
+                f'<td class="athlete-table__cell">{day.strftime("%d/%m/%Y")}</td>'
+                '</tr>'
+            )
+        return (
+            "<!doctype html><html><body>"
+            '<div class="athlete-header__profile">'
+            f'<img class="athlete-header__profile--image" src="//images.local/{athlete_id}.jpg"></div>'
+            "<section data-widget=\"best-results\"><table><tbody>"
+            f"{''.join(rows)}</tbody></table></section></body></html>"
+        )
+
+
+def with_fixture(page_html: str, fixture: str) -> str:
+    """Inserta `fixture` al principio del <body> de una página real (o al final si no lo hay)."""
+    match = re.search(r"<body[^>]*>", page_html, re.IGNORECASE)
+    if not match:
+        return page_html + fixture
+    return page_html[:match.end()] + fixture + page_html[match.end():]
+
+
+def debug_ranking_page(page_html: str, site: SyntheticSite) -> str:
+    table = (
+        '<table class="rankings-table"><tbody class="js-rankings-table-body">'
+        f'{"".join(site.rows[:site.page_size])}</tbody></table>'
+    )
+    return with_fixture(page_html, table)
+
+
+def debug_profile_page(page_html: str) -> str:
+    header = (
+        '<div class="athlete-header__profile">'
+        '<img class="athlete-header__profile--image" src="//images.local/debug.jpg"></div>'
+    )
+    return with_fixture(page_html, header)
+
+
+# =========================
+# SERVIDOR LOCAL
+# =========================
+
+PROFILE_PATH = re.compile(r"^/athletes/(\d+)/\d+/?$")
+
+
+def start_server(site: SyntheticSite, debug_pages: dict):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            match = PROFILE_PATH.match(url.path)
+            if url.path == "/swimming/rankings":
+                body = site.rankings_page()
+            elif url.path == "/swimming/rankings/fragment":
+                body = site.rankings_fragment(int(query["offset"][0]), int(query["limit"][0]))
+            elif match:
+                body = site.athlete_profile(int(match.group(1)))
+            elif url.path.startswith("/debug/") and url.path[len("/debug/"):] in debug_pages:
+                body = debug_profile_page(debug_pages[url.path[len("/debug/"):]])
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, name="bench-http", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# =========================
+# MEDICIÓN
+# =========================
+
+def measure(name: str, fn, repeat: int) -> dict:
+    """
+    Ejecuta fn() `repeat` veces para la latencia y una más bajo tracemalloc
+    para el pico de memoria (tracemalloc ralentiza mucho, no se mezcla con
+    el cronometraje). fn devuelve el número de filas procesadas; si es 0
+    el caso no ha medido nada útil y se marca como fallido.
+    """
+    latencies = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = fn()
+        latencies.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(latencies)
+    return {
+        "name": name,
+        "failed": "no se ha parseado ninguna fila" if not rows else None,
+        "rows": rows,
+        "repeat": repeat,
+        "latency_median_s": round(median, 4),
+        "latency_min_s": round(min(latencies), 4),
+        "rows_per_s": round(rows / median, 1) if median > 0 else None,
+        "peak_mem_mb": round(peak / 1024 / 1024, 2),
+    }
+
+
+def print_report(results: list):
+    print(f"\n{'caso':56} {'filas':>8} {'filas/s':>12} {'latencia':>10} {'pico MB':>9}")
+    for r in results:
+        if r.get("skipped"):
+            print(f"{r['name']:56} omitido: {r['skipped']}")
+            continue
+        if r.get("failed"):
+            print(f"{r['name']:56} FALLO: {r['failed']}")
+            continue
+        rps = f"{r['rows_per_s']:.0f}" if r["rows_per_s"] is not None else "-"
+        print(f"{r['name']:56} {r['rows']:>8} {rps:>12} {r['latency_median_s']:>9.3f}s {r['peak_mem_mb']:>9.2f}")
+
+
+# =========================
+# CASOS
+# =========================
+
+def bench_rankings_http(base_url: str, site: SyntheticSite, repeat: int) -> dict:
+    scrape_rankings.BASE_RANKINGS_URL = f"{base_url}/swimming/rankings"
+    return measure(
+        f"rankings http ({len(site.rows)} filas, Show More de {site.page_size})",
+        lambda: len(scrape_rankings.fetch_rankings_http(RANKING_PARAMS)),
+        repeat,
+    )
+
+
+def bench_rankings_html(debug_pages: dict, site: SyntheticSite, repeat: int) -> list:
+    results = [measure(
+        "rankings html (tabla sintética completa)",
+        lambda: len(scrape_rankings.extract_ranking_rows_from_html(
+            site.rankings_fragment(0, len(site.rows)), "tr.rankings-table__row")),
+        repeat,
+    )]
+    for name, html in sorted(debug_pages.items()):
+        # ~140 KB de HTML real alrededor de una tanda de filas sintéticas
+        html = debug_ranking_page(html, site)
+        results.append(measure(
+            f"rankings html ({name} + {site.page_size} filas)",
+            lambda html=html: len(scrape_rankings.extract_ranking_rows_from_html(html)),
+            repeat,
+        ))
+    return results
+
+
+def bench_images(scrape_img, base_url: str, debug_pages: dict, athletes: int, repeat: int) -> list:
+    session = requests.Session()
+    scrape_img.BASE_URL = base_url + "/athletes/{athlete_id}/{athlete_id}"
+
+    def synthetic():
+        return sum(1 for i in range(athletes) if scrape_img.fetch_athlete_image_url(2_000_000 + i, session)[0])
+
+    results = [measure(f"imagen de perfil ({athletes} perfiles sintéticos)", synthetic, repeat)]
+
+    for name in sorted(debug_pages):
+        scrape_img.BASE_URL = f"{base_url}/debug/{name}"
+        results.append(measure(
+            f"imagen de perfil ({name})",
+            lambda: 1 if scrape_img.fetch_athlete_image_url(0, session)[0] else 0,
+            repeat,
+        ))
+    return results
+
+
+def bench_browser(base_url: str, athletes: int, repeat: int) -> list:
+    """Casos que necesitan Chromium; si no se puede lanzar se marcan como omitidos."""
+    names = ["rankings navegador", "best results (navegador)"]
+    try:
+        from scraper_browser import BrowserPool
+        pool = BrowserPool(headless=True, profile="none", report_threads=False)
+        with pool.page():
+            pass
+    except Exception as e:
+        reason = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+        return [{"name": n, "skipped": reason} for n in names]
+
+    try:
+        scrape_rankings.BASE_RANKINGS_URL = f"{base_url}/swimming/rankings"
+        results = [measure(
+            names[0],
+            lambda: len(scrape_rankings.scrape_rankings_page(RANKING_PARAMS, pool)),
+            repeat,
+        )]
+
+        def best_results():
+            total = 0
+            with pool.page() as page:
+                for i in range(athletes):
+                    athlete_id = 3_000_000 + i
+                    page.goto(f"{base_url}/athletes/{athlete_id}/{athlete_id}", wait_until="domcontentloaded")
+                    total += len(scrape_athletes_and_results.scrape_personal_best_results(page, athlete_id))
+            return total
+
+        results.append(measure(f"{names[1]} ({athletes} perfiles)", best_results, repeat))
+        return results
+    finally:
+        pool.close_thread()
+
+
+def load_debug_pages() -> dict:
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(DEBUG_PAGES_DIR, "*.html"))):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de los parsers de los scrapers")
+    parser.add_argument("--rows", type=int, default=10_000, help="filas del ranking sintético")
+    parser.add_argument("--page-size", type=int, default=100, help="filas por 'Show More'")
+    parser.add_argument("--athletes", type=int, default=100, help="perfiles sintéticos por iteración")
+    parser.add_argument("--repeat", type=int, default=3, help="iteraciones por caso (se usa la mediana)")
+    parser.add_argument("--browser", action="store_true", help="incluye los casos con Playwright")
+    parser.add_argument("--json", help="guarda los resultados en este fichero")
+    args = parser.parse_args()
+
+    # Los scrapers no deben escribir métricas ni frenar contra el servidor local
+    scrape_rankings.metrics.enabled = False
+    scrape_athletes_and_results.metrics.enabled = False
+    scrape_img = load_scrape_img()
+    scrape_img.metrics.enabled = False
+
+    debug_pages = load_debug_pages()
+    site = SyntheticSite(args.rows, args.page_size)
+    server, base_url = start_server(site, debug_pages)
+    print(f"[*] Servidor local en {base_url} ({args.rows} filas, {len(debug_pages)} páginas de debug)")
+
+    # Los parsers imprimen progreso por fila/página; no interesa en el informe
+    results = []
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            results.append(bench_rankings_http(base_url, site, args.repeat))
+            results.extend(bench_rankings_html(debug_pages, site, args.repeat))
+            results.extend(bench_images(scrape_img, base_url, debug_pages, args.athletes, args.repeat))
+            if args.browser:
+                results.extend(bench_browser(base_url, args.athletes, args.repeat))
+            else:
+                results.extend({"name": n, "skipped": "necesita --browser"}
+                               for n in ("rankings navegador", "best results (navegador)"))
+    finally:
+        server.shutdown()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"\n[✓] Resultados guardados en {args.json}")
+
+    if any(r.get("failed") for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,24 @@
-import time
+import hashlib
+import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import mysql.connector
 from mysql.connector import Error
 
+import scraper_db
+from scraper_metrics import Metrics
+from scraper_wait import HostRateLimiter, http_get
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow es opcional: sin él no se generan miniaturas
+    Image = None
+
 DB_CONFIG = {
     "host": "localhost",
     "user": "liveSwim",
@@ -15,7 +30,26 @@ DB_CONFIG = {
 BASE_URL = "https://www.worldaquatics.com/athletes/{athlete_id}/{athlete_id}"
 
 
-REQUEST_DELAY = 0.8
+REQUESTS_PER_SECOND = 4.0    # límite global (token bucket por host); se frena solo ante 429/5xx
+WORKERS = 8                  # descargas simultáneas
+FLUSH_EVERY = 100            # actualizaciones de atletas por transacción
+
+# Caché local de fotos: se sirven como estáticos del backend PHP (public/uploads)
+CACHE_IMAGES = True
+IMAGE_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "backend-php", "auth-php", "public", "uploads", "athletes",
+)
+IMAGE_CACHE_URL = "/uploads/athletes"
+THUMBNAIL_WIDTHS = (80, 160)  # <hash>_w80.jpg, <hash>_w160.jpg junto al original
+CONTENT_TYPE_EXT = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+metrics = Metrics("imagenes")
 
 
 def get_db_connection():
@@ -33,11 +67,12 @@ def get_athletes_without_image(conn):
     return [r[0] for r in rows]
 
 
-def fetch_athlete_image_url(athlete_id):
+def fetch_athlete_image_url(athlete_id, session=requests, rate_limiter=None):
     """Descarga la página del atleta y extrae la URL de la imagen de perfil."""
     url = BASE_URL.format(athlete_id=athlete_id)
     try:
-        resp = requests.get(url, timeout=10)
+        with metrics.stage("goto", athlete=athlete_id):
+            resp = http_get(session, url, rate_limiter, timeout=10)
     except requests.RequestException as e:
         print(f"[ERROR] Athlete {athlete_id} - fallo de petición: {e}")
         return None, url
@@ -46,7 +81,8 @@ def fetch_athlete_image_url(athlete_id):
         print(f"[WARN] Athlete {athlete_id} - status code {resp.status_code} para {url}")
         return None, url
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    with metrics.stage("parse", athlete=athlete_id):
+        soup = BeautifulSoup(resp.text, "html.parser")
 
     container = soup.find("div", class_="athlete-header__profile")
     if not container:
@@ -75,25 +111,282 @@ def fetch_athlete_image_url(athlete_id):
     return img_src, url
 
 
-def update_athlete_image(conn, athlete_id, image_url, profile_url=None):
-    """Actualiza el campo image_url (y opcionalmente athlete_profile_url) del atleta."""
-    if profile_url:
-        sql = """
-            UPDATE atletas
-            SET image_url = %s,
-                athlete_profile_url = COALESCE(athlete_profile_url, %s)
-            WHERE athlete_id = %s
-        """
-        params = (image_url, profile_url, athlete_id)
-    else:
-        sql = "UPDATE atletas SET image_url = %s WHERE athlete_id = %s"
-        params = (image_url, athlete_id)
+def build_http_session():
+    """Sesión keep-alive con tantas conexiones como workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=WORKERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def update_athlete_images_batch(conn, updates):
+    """
+    Aplica varias actualizaciones (image_url, profile_url, athlete_id) en una
+    sola transacción. COALESCE(athlete_profile_url, NULL) deja el valor como
+    estaba, así que sirve también cuando no hay profile_url.
+    """
+    if not updates:
+        return
+    sql = """
+        UPDATE atletas
+        SET image_url = %s,
+            athlete_profile_url = COALESCE(athlete_profile_url, %s)
+        WHERE athlete_id = %s
+    """
+    with conn.cursor() as cursor:
+        cursor.executemany(sql, updates)
+    conn.commit()
+
+
+def flush_updates(conn, pending):
+    """Vuelca las actualizaciones pendientes; devuelve cuántas se han guardado."""
+    if not pending:
+        return 0
+    try:
+        with metrics.stage("db_write", rows=len(pending)):
+            update_athlete_images_batch(conn, pending)
+        metrics.count("athletes_updated", len(pending))
+        print(f"[OK] DB actualizado para {len(pending)} atletas")
+        return len(pending)
+    except Error as e:
+        conn.rollback()
+        print(f"[ERROR] Fallo al actualizar DB para {len(pending)} atletas: {e}")
+        return 0
+
 
+# =========================
+# CACHÉ LOCAL DE FOTOS
+# =========================
+
+def ensure_image_cache_schema(conn):
+    """Tabla de metadatos de la caché y columna atletas.image_local_path."""
     with conn.cursor() as cursor:
-        cursor.execute(sql, params)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS athlete_image_cache (
+                athlete_id INT UNSIGNED NOT NULL,
+                source_url VARCHAR(255) NOT NULL,
+                etag VARCHAR(255) NULL,
+                last_modified VARCHAR(64) NULL,
+                content_sha1 CHAR(40) NOT NULL,
+                local_path VARCHAR(255) NOT NULL,
+                checked_at DATETIME NOT NULL,
+                PRIMARY KEY (athlete_id),
+                CONSTRAINT fk_image_cache_atleta
+                    FOREIGN KEY (athlete_id)
+                    REFERENCES atletas(athlete_id)
+                    ON DELETE CASCADE
+                    ON UPDATE CASCADE
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+        if not scraper_db.column_exists(cursor, "atletas", "image_local_path"):
+            cursor.execute("""
+                ALTER TABLE atletas
+                    ADD COLUMN image_local_path VARCHAR(255) DEFAULT NULL AFTER image_url
+            """)
     conn.commit()
 
 
+def get_athletes_for_image_cache(conn):
+    """Atletas con image_url y lo que sabemos de su copia local (si la hay)."""
+    sql = """
+        SELECT a.athlete_id, a.image_url,
+               c.source_url, c.etag, c.last_modified, c.content_sha1, c.local_path
+        FROM atletas a
+        LEFT JOIN athlete_image_cache c ON c.athlete_id = a.athlete_id
+        WHERE a.image_url IS NOT NULL AND a.image_url <> ''
+    """
+    with conn.cursor(dictionary=True) as cursor:
+        cursor.execute(sql)
+        return cursor.fetchall()
+
+
+def _local_file(public_path):
+    return os.path.join(IMAGE_CACHE_DIR, *public_path[len(IMAGE_CACHE_URL):].strip("/").split("/"))
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def store_image(data, content_type):
+    """
+    Guarda la imagen direccionada por contenido (<sha1[:2]>/<sha1>.<ext>) y
+    sus miniaturas. Si ya existía un fichero con ese hash no se reescribe
+    (solo se generan las miniaturas que falten).
+    Devuelve (sha1, ruta pública).
+    """
+    sha1 = hashlib.sha1(data).hexdigest()
+    ext = CONTENT_TYPE_EXT.get((content_type or "").split(";")[0].strip().lower(), ".jpg")
+    public_path = f"{IMAGE_CACHE_URL}/{sha1[:2]}/{sha1}{ext}"
+    path = _local_file(public_path)
+
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    if not has_thumbnails(public_path):
+        write_thumbnails(data, os.path.join(os.path.dirname(path), sha1))
+    return sha1, public_path
+
+
+def thumbnail_path(public_path, width):
+    """'/uploads/athletes/ab/<sha1>.png' -> '/uploads/athletes/ab/<sha1>_w80.jpg' (lo que pide el frontend)."""
+    return f"{os.path.splitext(public_path)[0]}_w{width}.jpg"
+
+
+def has_thumbnails(public_path):
+    return all(os.path.exists(_local_file(thumbnail_path(public_path, w))) for w in THUMBNAIL_WIDTHS)
+
+
+def write_thumbnails(data, base_path):
+    """Genera <base>_w<ancho>.jpg para cada THUMBNAIL_WIDTHS (requiere Pillow)."""
+    if Image is None:
+        return
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img = img.convert("RGB")
+            for width in THUMBNAIL_WIDTHS:
+                if img.width <= width:
+                    thumb = img
+                else:
+                    thumb = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+                out = io.BytesIO()
+                thumb.save(out, "JPEG", quality=85, optimize=True)
+                _write_atomic(f"{base_path}_w{width}.jpg", out.getvalue())
+    except OSError as e:
+        print(f"[WARN] No se pudieron generar miniaturas para {base_path}: {e}")
+
+
+def cache_athlete_image(entry, session, rate_limiter=None):
+    """
+    Descarga (o revalida) la foto de un atleta. Si la URL no ha cambiado y el
+    fichero local existe, manda If-None-Match / If-Modified-Since y un 304
+    evita la descarga. Devuelve el dict para athlete_image_cache o None.
+    """
+    athlete_id = entry["athlete_id"]
+    url = entry["image_url"]
+    if url.startswith("//"):
+        url = "https:" + url
+
+    headers = {}
+    cached = (
+        entry["local_path"]
+        and entry["source_url"] == entry["image_url"]
+        and os.path.exists(_local_file(entry["local_path"]))
+    )
+    if cached:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        with metrics.stage("download", athlete=athlete_id, revalidate=bool(headers)):
+            resp = http_get(session, url, rate_limiter, timeout=15, headers=headers)
+    except requests.RequestException as e:
+        print(f"[ERROR] Athlete {athlete_id} - fallo descargando imagen: {e}")
+        return None
+
+    if resp.status_code == 304 and cached:
+        metrics.count("images_not_modified")
+        if Image is not None and not has_thumbnails(entry["local_path"]):
+            # Cacheada antes de tener Pillow: las miniaturas salen del original local
+            path = _local_file(entry["local_path"])
+            with open(path, "rb") as f:
+                write_thumbnails(f.read(), os.path.splitext(path)[0])
+        return {
+            "athlete_id": athlete_id,
+            "source_url": entry["image_url"],
+            "etag": entry["etag"],
+            "last_modified": entry["last_modified"],
+            "content_sha1": entry["content_sha1"],
+            "local_path": entry["local_path"],
+        }
+
+    if resp.status_code != 200:
+        print(f"[WARN] Athlete {athlete_id} - status {resp.status_code} descargando {url}")
+        return None
+
+    with metrics.stage("store", athlete=athlete_id, bytes=len(resp.content)):
+        sha1, public_path = store_image(resp.content, resp.headers.get("Content-Type"))
+    metrics.count("images_downloaded")
+    metrics.count("bytes_downloaded", len(resp.content))
+    return {
+        "athlete_id": athlete_id,
+        "source_url": entry["image_url"],
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "content_sha1": sha1,
+        "local_path": public_path,
+    }
+
+
+def save_image_cache_batch(conn, entries):
+    if not entries:
+        return
+    with metrics.stage("db_write", rows=len(entries)):
+        with conn.cursor() as cursor:
+            cursor.executemany("""
+                INSERT INTO athlete_image_cache (
+                    athlete_id, source_url, etag, last_modified, content_sha1, local_path, checked_at
+                ) VALUES (
+                    %(athlete_id)s, %(source_url)s, %(etag)s, %(last_modified)s,
+                    %(content_sha1)s, %(local_path)s, NOW()
+                )
+                ON DUPLICATE KEY UPDATE
+                    source_url = VALUES(source_url),
+                    etag = VALUES(etag),
+                    last_modified = VALUES(last_modified),
+                    content_sha1 = VALUES(content_sha1),
+                    local_path = VALUES(local_path),
+                    checked_at = VALUES(checked_at)
+            """, entries)
+            # El frontend pide siempre las miniaturas _w80/_w160: sin ellas
+            # (p. ej. sin Pillow) se sigue sirviendo image_url
+            cursor.executemany(
+                "UPDATE atletas SET image_local_path = %s WHERE athlete_id = %s",
+                [
+                    (e["local_path"] if has_thumbnails(e["local_path"]) else None, e["athlete_id"])
+                    for e in entries
+                ],
+            )
+        conn.commit()
+
+
+def cache_all_images(conn, session, rate_limiter):
+    """Etapa de descarga: copia local de todas las fotos, revalidando las que ya existen."""
+    ensure_image_cache_schema(conn)
+    entries = get_athletes_for_image_cache(conn)
+    print(f"[INFO] Fotos a cachear/revalidar: {len(entries)}")
+    if Image is None:
+        print("[WARN] Pillow no está instalado: se guardan las fotos pero no las miniaturas")
+
+    pending = []
+    downloaded = 0
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        futures = [pool.submit(cache_athlete_image, e, session, rate_limiter) for e in entries]
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[ERROR] Fallo inesperado cacheando imagen: {e}")
+                continue
+            if result is None:
+                continue
+            pending.append(result)
+            if len(pending) >= FLUSH_EVERY:
+                save_image_cache_batch(conn, pending)
+                downloaded += len(pending)
+                pending = []
+
+    save_image_cache_batch(conn, pending)
+    downloaded += len(pending)
+    print(f"[INFO] Fotos locales al día: {downloaded}/{len(entries)}")
+
+
 def main():
     try:
         conn = get_db_connection()
@@ -102,24 +395,46 @@ def main():
         athlete_ids = get_athletes_without_image(conn)
         print(f"[INFO] Atletas sin imagen: {len(athlete_ids)} encontrados")
 
-        for idx, athlete_id in enumerate(athlete_ids, start=1):
-            print(f"\n[{idx}/{len(athlete_ids)}] Procesando athlete_id={athlete_id}")
-            image_url, profile_url = fetch_athlete_image_url(athlete_id)
+        session = build_http_session()
+        rate_limiter = HostRateLimiter(REQUESTS_PER_SECOND)
+        pending = []
+        saved = 0
 
-            if image_url:
+        # Las descargas van en paralelo (limitadas por rate_limiter); las
+        # escrituras se quedan en este hilo y se agrupan de FLUSH_EVERY en FLUSH_EVERY
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            futures = {
+                pool.submit(fetch_athlete_image_url, athlete_id, session, rate_limiter): athlete_id
+                for athlete_id in athlete_ids
+            }
+            for idx, future in enumerate(as_completed(futures), start=1):
+                athlete_id = futures[future]
                 try:
-                    update_athlete_image(conn, athlete_id, image_url, profile_url)
-                    print(f"[OK] Athlete {athlete_id} - DB actualizado")
-                except Error as e:
-                    print(f"[ERROR] Athlete {athlete_id} - fallo al actualizar DB: {e}")
-            else:
-                print(f"[SKIP] Athlete {athlete_id} - sin imagen, no se actualiza DB")
+                    image_url, profile_url = future.result()
+                except Exception as e:
+                    print(f"[ERROR] Athlete {athlete_id} - fallo inesperado: {e}")
+                    continue
+                print(f"[{idx}/{len(athlete_ids)}] athlete_id={athlete_id} procesado")
+
+                if image_url:
+                    pending.append((image_url, profile_url, athlete_id))
+                else:
+                    print(f"[SKIP] Athlete {athlete_id} - sin imagen, no se actualiza DB")
+
+                if len(pending) >= FLUSH_EVERY:
+                    saved += flush_updates(conn, pending)
+                    pending = []
+
+        saved += flush_updates(conn, pending)
+        print(f"[INFO] Atletas actualizados: {saved}/{len(athlete_ids)}")
 
-            time.sleep(REQUEST_DELAY)
+        if CACHE_IMAGES:
+            cache_all_images(conn, session, rate_limiter)
 
     except Error as e:
         print(f"[ERROR] Error de conexión MySQL: {e}")
     finally:
+        metrics.close()
         try:
             if conn.is_connected():
                 conn.close()
@@ -1,9 +1,22 @@
+import argparse
+import hashlib
+import json
+import queue
+import threading
 import time
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from urllib.parse import urlencode, quote
 
-from playwright.sync_api import sync_playwright
-import mysql.connector
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+import scraper_changes
+import scraper_db
+import scraper_events
+from scraper_browser import BrowserPool
+from scraper_checkpoint import CheckpointStore
+from scraper_metrics import Metrics
+from scraper_times import parse_time_cs
+from scraper_wait import HostRateLimiter, goto
 
 # =========================
 # CONFIGURACIÓN
@@ -18,8 +31,30 @@ DB_CONFIG = {
 }
 
 BASE_ATHLETES_SEARCH_URL = "https://www.worldaquatics.com/athletes"
+# El slug final no se valida: /athletes/<id>/<id> lleva al perfil igual que /athletes/<id>/<nombre>
+ATHLETE_PROFILE_URL = "https://www.worldaquatics.com/athletes/{athlete_id}/{athlete_id}"
 HEADLESS = True
-SLEEP_BETWEEN_ATHLETES = 1.0  # segundos
+REQUESTS_PER_SECOND = 1.0     # navegaciones por segundo contra worldaquatics.com (se frena solo ante 429/5xx)
+BEST_RESULTS_SELECTOR = "section[data-widget='best-results']"
+PROFILE_HEADER_SELECTOR = ".athlete-header__profile"
+WORKERS = 4                   # páginas de Chromium scrapeando atletas en paralelo
+PAGES_PER_CONTEXT = 50        # atletas por contexto antes de reciclarlo (acota memoria)
+INTERCEPTION_PROFILE = "scraping"  # ver scraper_browser.PROFILES: "none", "assets" o "scraping"
+QUEUE_SIZE = 50               # tamaño máximo de las colas entre etapas
+WRITE_BATCH_SIZE = 200        # filas de resultados por transacción del writer
+
+# Refresco incremental: solo se visitan los atletas "caducados" según su actividad
+INCREMENTAL = True            # False = revisitar a todos los atletas
+UPCOMING_REVISIT = timedelta(hours=12)   # inscritos en competiciones_agendadas próximas
+REVISIT_BY_ACTIVITY = [                  # (días desde su última marca, cada cuánto se revisita)
+    (90, timedelta(days=1)),
+    (365, timedelta(days=7)),
+    (3 * 365, timedelta(days=30)),
+    (None, timedelta(days=180)),
+]
+
+metrics = Metrics("atletas")
+swim_events = scraper_events.EventDimension()
 
 
 # =========================
@@ -27,18 +62,23 @@ SLEEP_BETWEEN_ATHLETES = 1.0  # segundos
 # =========================
 
 def get_db_connection():
-    return mysql.connector.connect(**DB_CONFIG)
+    """Conexión sacada del pool compartido; conn.close() la devuelve al pool."""
+    return scraper_db.get_pool(DB_CONFIG).get_connection()
 
 
 def ensure_resultados_table_exists():
     conn = get_db_connection()
     cur = conn.cursor()
+    scraper_events.ensure_events_table(cur)
+    scraper_changes.ensure_changes_table(cur)
     cur.execute("""
         CREATE TABLE IF NOT EXISTS resultados (
             id INT UNSIGNED NOT NULL AUTO_INCREMENT,
             athlete_id INT UNSIGNED NOT NULL,
             event VARCHAR(255) NOT NULL,
+            event_id SMALLINT UNSIGNED NULL,
             time_text VARCHAR(32) NOT NULL,
+            time_cs INT UNSIGNED NULL,
             record_tags VARCHAR(50) NULL,
             medal VARCHAR(20) NULL,
             pool_length VARCHAR(10) NULL,
@@ -55,93 +95,242 @@ def ensure_resultados_table_exists():
             UNIQUE KEY uniq_result (
                 athlete_id, event, time_text, race_date, competition
             ),
+            KEY idx_resultados_athlete_event_time (athlete_id, event, time_cs),
+            KEY idx_resultados_event_time (event, pool_length, time_cs),
+            KEY idx_resultados_event_id (event_id, time_cs),
             CONSTRAINT fk_resultados_atleta
                 FOREIGN KEY (athlete_id)
                 REFERENCES atletas(athlete_id)
                 ON DELETE CASCADE
-                ON UPDATE CASCADE
+                ON UPDATE CASCADE,
+            CONSTRAINT fk_resultados_event
+                FOREIGN KEY (event_id)
+                REFERENCES swim_events(id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
     """)
+
+    # Tiempo en centésimas; las filas antiguas se rellenan con backfill_time_cs.py
+    if not scraper_db.column_exists(cur, "resultados", "time_cs"):
+        print("[*] Añadiendo columna time_cs a resultados")
+        cur.execute("""
+            ALTER TABLE resultados
+                ADD COLUMN time_cs INT UNSIGNED NULL AFTER time_text,
+                ADD KEY idx_resultados_athlete_event_time (athlete_id, event, time_cs),
+                ADD KEY idx_resultados_event_time (event, pool_length, time_cs)
+        """)
+
+    # Id de swim_events; las filas antiguas se rellenan con backfill_event_ids.py
+    if not scraper_db.column_exists(cur, "resultados", "event_id"):
+        print("[*] Añadiendo columna event_id a resultados")
+        cur.execute("""
+            ALTER TABLE resultados
+                ADD COLUMN event_id SMALLINT UNSIGNED NULL AFTER event,
+                ADD KEY idx_resultados_event_id (event_id, time_cs),
+                ADD CONSTRAINT fk_resultados_event FOREIGN KEY (event_id) REFERENCES swim_events(id)
+        """)
+
     conn.commit()
     cur.close()
     conn.close()
 
 
-def fetch_all_atletas():
+def ensure_scrape_state_table_exists():
+    """Metadatos de frescura por atleta para el refresco incremental."""
     conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
+    cur = conn.cursor()
     cur.execute("""
-        SELECT athlete_id, athlete_name, image_url, athlete_profile_url
-        FROM atletas
-        WHERE athlete_id IS NOT NULL
-        ORDER BY athlete_id;
+        CREATE TABLE IF NOT EXISTS athlete_scrape_state (
+            athlete_id INT UNSIGNED NOT NULL,
+            last_scraped_at DATETIME NOT NULL,
+            results_hash CHAR(40) NULL,
+            latest_race_date DATE NULL,
+            PRIMARY KEY (athlete_id),
+            KEY idx_scrape_state_last (last_scraped_at),
+            CONSTRAINT fk_scrape_state_atleta
+                FOREIGN KEY (athlete_id)
+                REFERENCES atletas(athlete_id)
+                ON DELETE CASCADE
+                ON UPDATE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
     """)
-    atletas = cur.fetchall()
+    conn.commit()
     cur.close()
     conn.close()
-    return atletas
 
 
-def update_atleta_profile(athlete_id, image_url, profile_url):
+def fetch_atletas_with_state():
     """
-    Actualiza image_url y athlete_profile_url de un atleta.
-    Solo pisa si están NULL o vacíos.
+    Atletas con athlete_id junto con los datos que usa el planificador:
+    last_scraped_at, results_hash, latest_race_date (de athlete_scrape_state
+    o, si nunca se ha scrapeado, de resultados) y `upcoming` si el atleta
+    está inscrito en una competición agendada que aún no ha terminado.
     """
     conn = get_db_connection()
-    cur = conn.cursor()
-    sql = """
-        UPDATE atletas
-        SET
-            image_url = IF(image_url IS NULL OR image_url = '', %s, image_url),
-            athlete_profile_url = IF(athlete_profile_url IS NULL OR athlete_profile_url = '', %s, athlete_profile_url)
-        WHERE athlete_id = %s;
-    """
-    cur.execute(sql, (image_url, profile_url, athlete_id))
-    conn.commit()
+    cur = conn.cursor(dictionary=True)
+    cur.execute("""
+        SELECT
+            a.athlete_id, a.athlete_name, a.image_url, a.athlete_profile_url,
+            s.last_scraped_at, s.results_hash,
+            COALESCE(s.latest_race_date, r.latest_race_date) AS latest_race_date,
+            (u.athlete_id IS NOT NULL) AS upcoming
+        FROM atletas a
+        LEFT JOIN athlete_scrape_state s ON s.athlete_id = a.athlete_id
+        LEFT JOIN (
+            SELECT athlete_id, MAX(race_date) AS latest_race_date
+            FROM resultados
+            GROUP BY athlete_id
+        ) r ON r.athlete_id = a.athlete_id
+        LEFT JOIN (
+            SELECT DISTINCT i.athlete_id
+            FROM inscripciones_atleticas i
+            JOIN competiciones_agendadas c ON c.id = i.competicion_id
+            WHERE c.estado IN ('pendiente', 'en_curso')
+              AND COALESCE(c.fecha_fin, c.fecha_inicio) >= NOW()
+              AND i.estado_inscripcion IN ('inscrito', 'confirmado')
+        ) u ON u.athlete_id = a.athlete_id
+        WHERE a.athlete_id IS NOT NULL
+        ORDER BY a.athlete_id;
+    """)
+    atletas = cur.fetchall()
     cur.close()
     conn.close()
+    return atletas
 
 
-def upsert_result_row(row: dict):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    sql = """
-        INSERT INTO resultados (
-            athlete_id,
-            event,
-            time_text,
-            record_tags,
-            medal,
-            pool_length,
-            age_at_result,
-            competition,
-            comp_country_code,
-            race_date
-        ) VALUES (
-            %(athlete_id)s,
-            %(event)s,
-            %(time_text)s,
-            %(record_tags)s,
-            %(medal)s,
-            %(pool_length)s,
-            %(age_at_result)s,
-            %(competition)s,
-            %(comp_country_code)s,
-            %(race_date)s
-        )
-        ON DUPLICATE KEY UPDATE
-            record_tags = VALUES(record_tags),
-            medal = VALUES(medal),
-            pool_length = VALUES(pool_length),
-            age_at_result = VALUES(age_at_result),
-            competition = VALUES(competition),
-            comp_country_code = VALUES(comp_country_code),
-            race_date = VALUES(race_date);
+UPDATE_ATLETA_PROFILE_SQL = """
+    UPDATE atletas
+    SET
+        image_url = IF(image_url IS NULL OR image_url = '', %s, image_url),
+        athlete_profile_url = IF(athlete_profile_url IS NULL OR athlete_profile_url = '', %s, athlete_profile_url)
+    WHERE athlete_id = %s;
+"""
+
+UPSERT_RESULT_SQL = """
+    INSERT INTO resultados (
+        athlete_id,
+        event,
+        event_id,
+        time_text,
+        time_cs,
+        record_tags,
+        medal,
+        pool_length,
+        age_at_result,
+        competition,
+        comp_country_code,
+        race_date
+    ) VALUES (
+        %(athlete_id)s,
+        %(event)s,
+        %(event_id)s,
+        %(time_text)s,
+        %(time_cs)s,
+        %(record_tags)s,
+        %(medal)s,
+        %(pool_length)s,
+        %(age_at_result)s,
+        %(competition)s,
+        %(comp_country_code)s,
+        %(race_date)s
+    )
+    ON DUPLICATE KEY UPDATE
+        event_id = VALUES(event_id),
+        time_cs = VALUES(time_cs),
+        record_tags = VALUES(record_tags),
+        medal = VALUES(medal),
+        pool_length = VALUES(pool_length),
+        age_at_result = VALUES(age_at_result),
+        competition = VALUES(competition),
+        comp_country_code = VALUES(comp_country_code),
+        race_date = VALUES(race_date);
+"""
+
+
+UPSERT_SCRAPE_STATE_SQL = """
+    INSERT INTO athlete_scrape_state (athlete_id, last_scraped_at, results_hash, latest_race_date)
+    VALUES (%(athlete_id)s, NOW(), %(results_hash)s, %(latest_race_date)s)
+    ON DUPLICATE KEY UPDATE
+        last_scraped_at = VALUES(last_scraped_at),
+        results_hash = COALESCE(VALUES(results_hash), results_hash),
+        latest_race_date = GREATEST(
+            COALESCE(latest_race_date, VALUES(latest_race_date)),
+            COALESCE(VALUES(latest_race_date), latest_race_date)
+        );
+"""
+
+
+def attach_event_ids(results: list):
+    """Añade a cada resultado el event_id de swim_events (creando las pruebas nuevas)."""
+    row_events = [scraper_events.parse_event(r["event"], r.get("pool_length")) for r in results]
+    event_ids = swim_events.ids_for(DB_CONFIG, row_events)
+    for row, event in zip(results, row_events):
+        row["event_id"] = event_ids[swim_events.key(event)]
+
+
+def previous_personal_bests(cur, athlete_ids: list) -> dict:
+    """{(athlete_id, event_id): mejor time_cs} guardado para esos atletas."""
+    if not athlete_ids:
+        return {}
+    placeholders = ", ".join(["%s"] * len(athlete_ids))
+    cur.execute(f"""
+        SELECT athlete_id, event_id, MIN(time_cs)
+        FROM resultados
+        WHERE athlete_id IN ({placeholders})
+          AND event_id IS NOT NULL
+          AND time_cs IS NOT NULL
+        GROUP BY athlete_id, event_id
+    """, athlete_ids)
+    return {(athlete_id, event_id): best for athlete_id, event_id, best in cur.fetchall()}
+
+
+def save_athlete_batch(scraped: list):
     """
-    cur.execute(sql, row)
-    conn.commit()
-    cur.close()
-    conn.close()
+    Escribe en una sola transacción lo scrapeado de varios atletas
+    (ver scrape_atleta): actualizaciones de perfil, upsert de resultados
+    y su estado de frescura. Los resultados de atletas cuyo hash no ha
+    cambiado no se reescriben. Los atletas no encontrados o con error
+    (ver missed_atleta) solo actualizan last_scraped_at. Las mejores marcas personales rebajadas se
+    registran en ranking_changes (pb_improved).
+    """
+    if not scraped:
+        return
+
+    started = time.perf_counter()
+    profile_updates = [
+        (s["image_url"], s["profile_url"], s["athlete_id"])
+        for s in scraped
+        if s["needs_profile_update"] and (s["image_url"] or s["profile_url"])
+    ]
+    results = [r for s in scraped if not s["unchanged"] for r in s["results"]]
+    attach_event_ids(results)
+    states = [
+        {
+            "athlete_id": s["athlete_id"],
+            "results_hash": s["results_hash"],
+            "latest_race_date": s["latest_race_date"],
+        }
+        for s in scraped
+    ]
+
+    with metrics.stage("db_write", athletes=len(scraped), rows=len(results)), \
+            scraper_db.transaction(DB_CONFIG) as cur:
+        previous_best = previous_personal_bests(cur, sorted({r["athlete_id"] for r in results}))
+        scraper_db.executemany_chunked(cur, UPDATE_ATLETA_PROFILE_SQL, profile_updates)
+        scraper_db.executemany_chunked(cur, UPSERT_RESULT_SQL, results)
+        scraper_db.executemany_chunked(cur, UPSERT_SCRAPE_STATE_SQL, states)
+        changes = scraper_changes.diff_personal_bests(previous_best, results)
+        scraper_changes.record_changes(cur, changes)
+    if changes:
+        print(f"[DB] {len(changes)} mejores marcas personales rebajadas")
+    metrics.count("pb_improved", len(changes))
+    metrics.count("rows_saved", len(results))
+    metrics.count("athletes_saved", len(scraped))
+    metrics.count("athletes_missed", sum(1 for s in scraped if s.get("missed")))
+
+    unchanged = sum(1 for s in scraped if s["unchanged"] and not s.get("missed"))
+    if unchanged:
+        print(f"[DB] {unchanged}/{len(scraped)} atletas sin cambios en sus mejores marcas")
+    scraper_db.report_rate(f"resultados de {len(scraped)} atletas", len(results), started)
 
 
 # =========================
@@ -181,6 +370,21 @@ def normalize_url(url: str) -> str:
     return url
 
 
+RESULT_HASH_FIELDS = (
+    "event", "time_text", "record_tags", "medal", "pool_length",
+    "age_at_result", "competition", "comp_country_code", "race_date",
+)
+
+
+def results_hash(results: list) -> str:
+    """SHA-1 de la tabla de mejores marcas parseada (independiente del orden de las filas)."""
+    canonical = sorted(
+        [str(r[f]) if r[f] is not None else None for f in RESULT_HASH_FIELDS]
+        for r in results
+    )
+    return hashlib.sha1(json.dumps(canonical).encode("utf-8")).hexdigest()
+
+
 # =========================
 # SCRAPERS
 # =========================
@@ -200,7 +404,9 @@ def find_athlete_in_search(page, athlete_id: int, athlete_name: str):
     """
     En la página de búsqueda de atletas, intenta encontrar la fila
     cuyo data-athlete-id coincide con athlete_id.
-    Si no encuentra, como fallback devuelve la primera fila (o None).
+    Solo se usa la primera fila si no conocemos el athlete_id; si lo
+    conocemos y no aparece, devuelve (None, None, None) para no asignar
+    los resultados de otro atleta.
     Devuelve (fila_locator, image_url, profile_url).
     """
     page.wait_for_selector("tbody.js-athletes-table-body", timeout=15000)
@@ -227,9 +433,11 @@ def find_athlete_in_search(page, athlete_id: int, athlete_name: str):
             target_row = row
             break
 
-    # Si no encontramos por athlete_id, cogemos la primera fila
     if target_row is None:
-        print(f"    [!] No se encontró por athlete_id, usando primera fila para {athlete_name}")
+        if athlete_id_str:
+            print(f"    [!] Ninguna fila de la búsqueda tiene athlete_id={athlete_id_str} ({athlete_name})")
+            return None, None, None
+        print(f"    [!] Sin athlete_id, usando primera fila para {athlete_name}")
         target_row = rows.first
 
     # Imagen
@@ -260,7 +468,7 @@ def scrape_personal_best_results(page, athlete_id: int):
     """
     results = []
     # Buscar la sección best-results
-    section = page.locator("section[data-widget='best-results']")
+    section = page.locator(BEST_RESULTS_SELECTOR)
     if section.count() == 0:
         print("    [!] No hay sección de 'Personal Best Results'")
         return results
@@ -330,6 +538,7 @@ def scrape_personal_best_results(page, athlete_id: int):
                 "athlete_id": athlete_id,
                 "event": event,
                 "time_text": time_text,
+                "time_cs": parse_time_cs(time_text),
                 "record_tags": record_tags_str,
                 "medal": medal,
                 "pool_length": pool_length,
@@ -350,70 +559,347 @@ def scrape_personal_best_results(page, athlete_id: int):
 # MAIN SCRAPER
 # =========================
 
-def process_atleta(page, atleta: dict):
+def candidate_profile_urls(atleta: dict) -> list:
+    """URLs de perfil a probar antes de buscar por nombre: la guardada en BD y la derivada del id."""
+    urls = []
+    if atleta.get("athlete_profile_url"):
+        urls.append(normalize_url(atleta["athlete_profile_url"]))
+    if atleta.get("athlete_id") is not None:
+        urls.append(ATHLETE_PROFILE_URL.format(athlete_id=atleta["athlete_id"]))
+    return list(dict.fromkeys(urls))
+
+
+def open_profile(page, url: str, athlete_id: int, rate_limiter: HostRateLimiter = None) -> bool:
+    """
+    Navega a un perfil y comprueba que es el del atleta: respuesta < 400,
+    cabecera de perfil o tabla de mejores marcas, y el id en la URL final.
+    """
+    response = goto(page, url, rate_limiter=rate_limiter)
+    if response is not None and response.status >= 400:
+        print(f"    [!] Perfil {url} respondió {response.status}")
+        return False
+    try:
+        page.wait_for_selector(f"{PROFILE_HEADER_SELECTOR}, {BEST_RESULTS_SELECTOR}", timeout=10000)
+    except PlaywrightTimeoutError:
+        print(f"    [!] {url} no parece una página de perfil")
+        return False
+    if athlete_id is not None and f"/athletes/{athlete_id}/" not in page.url:
+        print(f"    [!] {url} redirigió a otro atleta ({page.url})")
+        return False
+    return True
+
+
+def profile_image_url(page):
+    """Imagen de la cabecera del perfil (mismo criterio que scrape-img.py)."""
+    img = page.locator(f"{PROFILE_HEADER_SELECTOR} img.athlete-header__profile--image")
+    if img.count() == 0:
+        img = page.locator(f"{PROFILE_HEADER_SELECTOR} img")
+    if img.count() == 0:
+        return None
+    return normalize_url(img.first.get_attribute("src"))
+
+
+def resolve_profile_by_search(page, atleta: dict, rate_limiter: HostRateLimiter = None):
+    """Fallback: busca al atleta por nombre. Devuelve (image_url, profile_url) o (None, None)."""
     athlete_id = atleta["athlete_id"]
     athlete_name = atleta["athlete_name"]
-    print(f"\n==============================")
-    print(f"[*] Procesando atleta {athlete_id} - {athlete_name}")
-    print(f"==============================")
 
-    # 1) Buscar al atleta en la página de búsqueda
     search_url = build_athlete_search_url(athlete_name)
     print(f"    [*] URL búsqueda: {search_url}")
-    page.goto(search_url, wait_until="networkidle", timeout=60000)
+    goto(page, search_url, rate_limiter=rate_limiter)
 
     try:
         row, img_url, profile_url = find_athlete_in_search(page, athlete_id, athlete_name)
     except Exception as e:
         print(f"    [X] Error buscando atleta {athlete_name}: {e}")
-        return
+        return None, None
 
     if row is None:
         print(f"    [!] No se encontró fila para atleta {athlete_name}")
-        return
+        return None, None
 
     print(f"    [+] Encontrado atleta en búsqueda. Img: {img_url}, Profile: {profile_url}")
+    return img_url, profile_url
 
-    # 2) Actualizar tabla atletas con imagen y profile_url (solo si están vacíos)
-    update_atleta_profile(athlete_id, img_url, profile_url)
 
-    # Si no tenemos profile_url, no podemos seguir
-    if not profile_url:
-        print("    [!] Sin profile_url, no se puede scrapear resultados personales.")
-        return
+def scrape_atleta(page, atleta: dict, rate_limiter: HostRateLimiter = None):
+    """
+    Scrapea un atleta sin tocar la BD. Devuelve un dict con athlete_id,
+    image_url, profile_url y results (lista de filas para `resultados`),
+    o None si no se ha encontrado al atleta.
 
-    # 3) Ir a "view profile" y scrapear Personal Best Results
-    print(f"    [*] Accediendo a perfil: {profile_url}")
-    page.goto(profile_url, wait_until="networkidle", timeout=60000)
+    Va directamente al perfil (URL guardada o derivada del id) y solo
+    recurre a la búsqueda por nombre si ninguna de esas URLs funciona.
+    """
+    athlete_id = atleta["athlete_id"]
+    athlete_name = atleta["athlete_name"]
+    print(f"\n==============================")
+    print(f"[*] Procesando atleta {athlete_id} - {athlete_name}")
+    print(f"==============================")
 
-    pb_results = scrape_personal_best_results(page, athlete_id)
-    print(f"    [+] Resultados personales obtenidos: {len(pb_results)}")
+    img_url = None
+    profile_url = None
 
-    for r in pb_results:
-        upsert_result_row(r)
+    # 1) Perfil directo
+    for url in candidate_profile_urls(atleta):
+        print(f"    [*] Accediendo a perfil: {url}")
+        with metrics.stage("goto", athlete=athlete_id, via="profile"):
+            found = open_profile(page, url, athlete_id, rate_limiter)
+        if found:
+            profile_url = url
+            img_url = profile_image_url(page)
+            break
 
+    # 2) Búsqueda por nombre + perfil
+    if profile_url is None:
+        with metrics.stage("search", athlete=athlete_id):
+            img_url, profile_url = resolve_profile_by_search(page, atleta, rate_limiter)
+        if img_url is None and profile_url is None:
+            return None
+
+        # Si no tenemos profile_url, no podemos seguir
+        if not profile_url:
+            print("    [!] Sin profile_url, no se puede scrapear resultados personales.")
+            return _scraped_atleta(atleta, img_url, None, [])
+
+        print(f"    [*] Accediendo a perfil: {profile_url}")
+        with metrics.stage("goto", athlete=athlete_id, via="search"):
+            goto(page, profile_url, rate_limiter=rate_limiter)
+
+    # 3) Personal Best Results
+    with metrics.stage("wait_results", athlete=athlete_id):
+        try:
+            page.wait_for_selector(BEST_RESULTS_SELECTOR, timeout=10000)
+        except PlaywrightTimeoutError:
+            pass  # hay atletas sin sección de mejores marcas; lo gestiona scrape_personal_best_results
+
+    with metrics.stage("parse", athlete=athlete_id):
+        results = scrape_personal_best_results(page, athlete_id)
+    print(f"    [+] Resultados personales obtenidos: {len(results)}")
+    scraped = _scraped_atleta(atleta, img_url, profile_url, results)
+    if scraped["unchanged"]:
+        print("    [=] Mejores marcas sin cambios desde el último scrape")
+    return scraped
+
+
+def _scraped_atleta(atleta: dict, img_url, profile_url, results: list) -> dict:
+    new_hash = results_hash(results)
+    race_dates = [r["race_date"] for r in results if r["race_date"]]
+    return {
+        "athlete_id": atleta["athlete_id"],
+        "image_url": img_url,
+        "profile_url": profile_url,
+        "results": results,
+        "results_hash": new_hash,
+        "latest_race_date": max(race_dates) if race_dates else None,
+        "unchanged": new_hash == atleta.get("results_hash"),
+        "needs_profile_update": not (atleta.get("image_url") and atleta.get("athlete_profile_url")),
+    }
+
+
+def missed_atleta(atleta: dict, error: bool = False) -> dict:
+    """
+    Atleta no encontrado (o que ha fallado): no trae resultados, pero se
+    guarda su last_scraped_at (results_hash NULL conserva el anterior) para
+    que el planificador no lo trate como "nunca scrapeado" en cada ejecución.
+    """
+    return {
+        "athlete_id": atleta["athlete_id"],
+        "image_url": None,
+        "profile_url": None,
+        "results": [],
+        "results_hash": None,
+        "latest_race_date": None,
+        "unchanged": True,
+        "needs_profile_update": False,
+        "missed": True,
+        "error": error,
+    }
+
+
+# =========================
+# PLANIFICADOR INCREMENTAL
+# =========================
+
+def revisit_interval(atleta: dict, today: date) -> timedelta:
+    if atleta.get("upcoming"):
+        return UPCOMING_REVISIT
+    latest = atleta.get("latest_race_date")
+    days_inactive = (today - latest).days if latest else None
+    for max_days, interval in REVISIT_BY_ACTIVITY:
+        if max_days is None or (days_inactive is not None and days_inactive <= max_days):
+            return interval
+    return REVISIT_BY_ACTIVITY[-1][1]
 
-def main():
-    ensure_resultados_table_exists()
-    atletas = fetch_all_atletas()
-    print(f"[*] Atletas a procesar: {len(atletas)}")
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=HEADLESS)
-        page = browser.new_page()
+def schedule_atletas(atletas: list, now: datetime = None) -> list:
+    """
+    Devuelve los atletas que toca revisitar, por prioridad:
+    1) inscritos en competiciones próximas, 2) nunca scrapeados,
+    3) el resto por fecha de su última marca (los más activos primero).
+    """
+    now = now or datetime.now()
+    due = []
+    for atleta in atletas:
+        last = atleta.get("last_scraped_at")
+        if last is None or now - last >= revisit_interval(atleta, now.date()):
+            due.append(atleta)
+
+    def priority(atleta):
+        latest = atleta.get("latest_race_date")
+        return (
+            0 if atleta.get("upcoming") else 1,
+            0 if atleta.get("last_scraped_at") is None else 1,
+            -(latest.toordinal() if latest else 0),
+            atleta["athlete_id"],
+        )
+
+    return sorted(due, key=priority)
 
-        for idx, atleta in enumerate(atletas, start=1):
-            print(f"\n##### ({idx}/{len(atletas)}) #####")
+
+# =========================
+# PIPELINE PARALELO
+# =========================
+#
+#   main (productor) --tasks--> N fetch workers (un Chromium cada uno) --results--> writer
+#
+# Las colas son acotadas (QUEUE_SIZE): si la BD va lenta los workers se frenan
+# en lugar de acumular atletas en memoria. Un único writer agrupa las escrituras
+# en transacciones de WRITE_BATCH_SIZE filas.
+
+_DONE = object()
+
+
+def fetch_worker(tasks: queue.Queue, results: queue.Queue, pool: BrowserPool,
+                 rate_limiter: HostRateLimiter, total: int):
+    try:
+        while True:
+            item = tasks.get()
+            if item is _DONE:
+                return
+            idx, atleta = item
+            print(f"\n##### ({idx}/{total}) [{threading.current_thread().name}] #####")
+            started = time.perf_counter()
             try:
-                process_atleta(page, atleta)
+                with pool.page() as page:
+                    scraped = scrape_atleta(page, atleta, rate_limiter)
+                metrics.observe("athlete", time.perf_counter() - started,
+                                athlete=atleta.get("athlete_id"), found=scraped is not None)
+                results.put(scraped or missed_atleta(atleta))
             except Exception as e:
+                metrics.observe("athlete", time.perf_counter() - started, error=True, athlete=atleta.get("athlete_id"))
                 print(f"[X] Error procesando atleta {atleta.get('athlete_name')} ({atleta.get('athlete_id')}): {e}")
-            time.sleep(SLEEP_BETWEEN_ATHLETES)
+                results.put(missed_atleta(atleta, error=True))
+    finally:
+        try:
+            pool.close_thread()
+        finally:
+            results.put(_DONE)
+
 
-        browser.close()
+def results_writer(results: queue.Queue, n_workers: int, checkpoints: CheckpointStore = None):
+    pending = []
+    pending_rows = 0
+    finished_workers = 0
+
+    def flush():
+        nonlocal pending, pending_rows
+        try:
+            save_athlete_batch(pending)
+            # Los que fallaron se reintentan si se reanuda este run
+            completed = [str(s["athlete_id"]) for s in pending if not s.get("error")]
+            if checkpoints and completed:
+                checkpoints.mark_completed(completed)
+        except Exception as e:
+            ids = ", ".join(str(s["athlete_id"]) for s in pending)
+            print(f"[X] Error guardando lote de atletas ({ids}): {e}")
+        pending = []
+        pending_rows = 0
+
+    while finished_workers < n_workers:
+        item = results.get()
+        if item is _DONE:
+            finished_workers += 1
+            continue
+        pending.append(item)
+        pending_rows += len(item["results"]) + 1
+        if pending_rows >= WRITE_BATCH_SIZE:
+            flush()
+
+    flush()
+
+
+def main(workers: int = WORKERS, incremental: bool = INCREMENTAL, resume: bool = False):
+    ensure_resultados_table_exists()
+    ensure_scrape_state_table_exists()
+    atletas = fetch_atletas_with_state()
+    if incremental:
+        roster = len(atletas)
+        atletas = schedule_atletas(atletas)
+        print(f"[*] Refresco incremental: {len(atletas)} de {roster} atletas pendientes")
+
+    checkpoints = CheckpointStore("atletas")
+    run_id = checkpoints.start(resume)
+    done = checkpoints.completed_keys()
+    if done:
+        atletas = [a for a in atletas if str(a["athlete_id"]) not in done]
+        print(f"[*] Reanudando run {run_id}: {len(done)} atletas ya guardados, se saltan")
+    total = len(atletas)
+    n_workers = max(1, min(workers, total))
+    print(f"[*] Atletas a procesar: {total} con {n_workers} worker(s)")
+
+    rate_limiter = HostRateLimiter(REQUESTS_PER_SECOND)
+    pool = BrowserPool(headless=HEADLESS, pages_per_context=PAGES_PER_CONTEXT,
+                       profile=INTERCEPTION_PROFILE)
+    tasks = queue.Queue(maxsize=QUEUE_SIZE)
+    results = queue.Queue(maxsize=QUEUE_SIZE)
+
+    writer = threading.Thread(target=results_writer, args=(results, n_workers, checkpoints), name="writer")
+    fetchers = [
+        threading.Thread(target=fetch_worker, args=(tasks, results, pool, rate_limiter, total), name=f"atletas-{i + 1}")
+        for i in range(n_workers)
+    ]
+    writer.start()
+    for t in fetchers:
+        t.start()
+
+    for idx, atleta in enumerate(atletas, start=1):
+        tasks.put((idx, atleta))
+    for _ in fetchers:
+        tasks.put(_DONE)
+
+    for t in fetchers:
+        t.join()
+    writer.join()
+
+    done = checkpoints.completed_keys()
+    missing = [a for a in atletas if str(a["athlete_id"]) not in done]
+    if missing:
+        print(f"[!] {len(missing)} atletas sin guardar. Vuelve a lanzar con --resume para reintentarlos.")
+    else:
+        checkpoints.finish()
+    checkpoints.close()
+
+    if pool.totals.responses:
+        print(f"[NET] Total de la ejecución: {pool.totals.summary()}")
+        metrics.count("bytes_downloaded", pool.totals.bytes_loaded)
+        metrics.count("requests_blocked", sum(pool.totals.blocked.values()))
+    metrics.close()
 
     print("\n[✓] Proceso completado.")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scraper de perfiles y mejores marcas de atletas")
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma la última ejecución sin terminar y salta los atletas ya guardados")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help=f"atletas en paralelo (por defecto {WORKERS})")
+    parser.add_argument("--full", action="store_true",
+                        help="revisita a todos los atletas en lugar del refresco incremental")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(workers=args.workers, incremental=INCREMENTAL and not args.full, resume=args.resume)
@@ -1,9 +1,27 @@
+import argparse
+import hashlib
+import queue
+import threading
 import time
-from datetime import datetime
-from urllib.parse import urlencode
-
-from playwright.sync_api import sync_playwright
-import mysql.connector
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode, urljoin
+
+import requests
+from bs4 import BeautifulSoup
+import scraper_changes
+import scraper_db
+import scraper_events
+from scraper_browser import BrowserPool
+from scraper_checkpoint import CheckpointStore
+from scraper_metrics import Metrics
+from scraper_times import format_time_cs, parse_time_cs
+from scraper_wait import HostRateLimiter, goto, http_get, wait_for_count_above
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:  # lxml es opcional: sin él BeautifulSoup usa html.parser (más lento)
+    HTML_PARSER = "html.parser"
 
 
 DB_CONFIG = {
@@ -27,10 +45,32 @@ RANKING_PARAMS = {
     "timesMode": "ALL_TIMES",
     "regionId": "all",
     "countryId": "",             # todos los países
+    # Corte del scraper (no van en la URL): se deja de paginar al llegar a
+    # maxRows filas o a la primera marca por debajo de minPoints. None = sin corte.
+    "maxRows": 500,
+    "minPoints": None,
 }
 
-SLEEP_AFTER_SHOW_MORE = 2.0   # segundos
+SHOW_MORE_TIMEOUT = 15.0      # segundos máximos esperando a que "Show More" añada filas
 HEADLESS = True               # pon False si quieres ver el navegador
+PAGES_PER_CONTEXT = 10        # páginas antes de reciclar el contexto del navegador (acota memoria)
+INTERCEPTION_PROFILE = "scraping"  # ver scraper_browser.PROFILES: "none", "assets" o "scraping"
+USE_SNAPSHOTS = True          # registra cada ejecución en ranking_snapshots y marca las filas vistas
+WORKERS = 4                   # pruebas scrapeadas en paralelo (1 = secuencial)
+REQUESTS_PER_SECOND = 1.0     # límite de peticiones por host, compartido por todos los workers (se frena solo ante 429/5xx)
+FETCH_MODE = "http"           # "http": sin navegador y Playwright solo como fallback; "browser": siempre Playwright
+HTTP_TIMEOUT = 30             # segundos por petición en modo http
+STREAM_FLUSH_ROWS = 500       # filas acumuladas antes de escribirlas en BD (no se espera al ranking entero)
+TRIM_PARSED_ROWS = True       # borra del DOM las filas ya parseadas para que la memoria del navegador no crezca
+MATERIALIZE_BEST = True       # al terminar cada prueba regenera su parte de swimming_rankings_best
+USE_FINGERPRINTS = True       # si la prueba no ha cambiado desde la última vez, no se reescribe (ver scrape_and_save_event)
+FINGERPRINT_ROWS = 50         # sin corte: filas del principio del ranking que entran en la huella (con corte entra el slice entero)
+FULL_RESCAN_EVERY = timedelta(days=7)  # aunque la huella coincida, una pasada completa cada tanto (cambios más abajo)
+INCREMENTAL_OVERLAP = timedelta(days=14)  # en modo incremental se vuelve a pedir este margen antes de la marca de agua (resultados publicados tarde)
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
 
 
 
@@ -59,6 +99,11 @@ def generate_all_param_sets():
                     yield params
 
 
+def event_key(params: dict) -> str:
+    """Identificador estable de una prueba (para checkpoints)."""
+    return f"{params['gender']}-{params['distance']}-{params['stroke']}-{params['poolConfiguration']}"
+
+
 def validate_params(params: dict):
     gender = params["gender"]
     distance = int(params["distance"])
@@ -76,6 +121,43 @@ def validate_params(params: dict):
             f"Válidos: {', '.join(sorted(VALID_COMBOS[distance]))}"
         )
 
+    max_rows = params.get("maxRows")
+    if max_rows is not None and int(max_rows) <= 0:
+        raise ValueError("maxRows debe ser positivo (o None para no cortar)")
+
+
+def has_cutoff(params: dict) -> bool:
+    return params.get("maxRows") is not None or params.get("minPoints") is not None
+
+
+def full_depth(params: dict) -> dict:
+    """Los mismos parámetros sin corte: pagina el ranking entero (ejecuciones de archivo)."""
+    return dict(params, maxRows=None, minPoints=None)
+
+
+def cut_rows(rows: list, params: dict, loaded: int):
+    """
+    Aplica maxRows/minPoints a un lote cuyas filas empiezan tras `loaded`.
+    Devuelve (filas que entran, True si ya no hace falta paginar más).
+    Los rankings van ordenados por marca, así que los puntos solo bajan.
+    """
+    max_rows = params.get("maxRows")
+    min_points = params.get("minPoints")
+    reached = False
+
+    if min_points is not None:
+        for i, row in enumerate(rows):
+            if row.get("points") is not None and row["points"] < min_points:
+                rows = rows[:i]
+                reached = True
+                break
+
+    if max_rows is not None and loaded + len(rows) >= max_rows:
+        rows = rows[:max(0, max_rows - loaded)]
+        reached = True
+
+    return rows, reached
+
 
 def build_rankings_url(params: dict) -> str:
     query = {
@@ -95,16 +177,20 @@ def build_rankings_url(params: dict) -> str:
 
 
 def get_db_connection():
-    return mysql.connector.connect(**DB_CONFIG)
+    """Conexión sacada del pool compartido; conn.close() la devuelve al pool."""
+    return scraper_db.get_pool(DB_CONFIG).get_connection()
 
 
-def ensure_table_exists():
+def ensure_table_exists(populate_best: bool = True):
     """
     Crea la tabla con la estructura que has pasado (ajustada con PRIMARY KEY/AUTO_INCREMENT).
-    Si la tabla ya existe, no la toca.
+    Si la tabla ya existe, solo le añade lo que falte (snapshot_id y la clave única).
+    Con `populate_best`, si swimming_rankings_best está vacía se llena con
+    todo lo que ya hay en swimming_rankings (no solo las pruebas que se scrapeen).
     """
     conn = get_db_connection()
     cur = conn.cursor()
+    scraper_events.ensure_events_table(cur)
     cur.execute("""
         CREATE TABLE IF NOT EXISTS swimming_rankings (
             id INT(10) UNSIGNED NOT NULL AUTO_INCREMENT,
@@ -112,73 +198,500 @@ def ensure_table_exists():
             distance SMALLINT(6) NOT NULL,
             stroke VARCHAR(20) NOT NULL,
             pool_configuration VARCHAR(10) NOT NULL,
+            event_id SMALLINT(5) UNSIGNED DEFAULT NULL,
             overall_rank INT(11) NOT NULL,
             country_code CHAR(3) NOT NULL,
             time_text VARCHAR(16) NOT NULL,
+            time_cs INT(10) UNSIGNED DEFAULT NULL,
             points INT(11) DEFAULT NULL,
             tag VARCHAR(10) DEFAULT NULL,
             record_tag VARCHAR(20) DEFAULT NULL,
             competition VARCHAR(255) DEFAULT NULL,
             location_country_code CHAR(3) DEFAULT NULL,
-            race_date DATE DEFAULT NULL,
-            athlete_id INT(10) UNSIGNED DEFAULT NULL,
+            race_date DATE NOT NULL,
+            athlete_id INT(10) UNSIGNED NOT NULL,
+            snapshot_id INT(10) UNSIGNED DEFAULT NULL,
             created_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
             updated_at DATETIME DEFAULT NULL,
+            PRIMARY KEY (id),
+            UNIQUE KEY uniq_ranking (
+                gender, distance, stroke, pool_configuration,
+                athlete_id, time_text, race_date
+            ),
+            KEY idx_rankings_snapshot (snapshot_id),
+            KEY idx_rankings_event_time (gender, distance, stroke, pool_configuration, time_cs),
+            KEY idx_rankings_event_id (event_id, time_cs)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ranking_snapshots (
+            id INT(10) UNSIGNED NOT NULL AUTO_INCREMENT,
+            started_at DATETIME NOT NULL,
+            finished_at DATETIME DEFAULT NULL,
             PRIMARY KEY (id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
     """)
+
+    # Tablas creadas antes de tener clave natural (p. ej. el dump liveswim.sql)
+    if not scraper_db.column_exists(cur, "swimming_rankings", "snapshot_id"):
+        print("[*] Añadiendo columna snapshot_id a swimming_rankings")
+        cur.execute("""
+            ALTER TABLE swimming_rankings
+                ADD COLUMN snapshot_id INT(10) UNSIGNED DEFAULT NULL AFTER athlete_id,
+                ADD KEY idx_rankings_snapshot (snapshot_id)
+        """)
+
+    # athlete_id y race_date forman parte de uniq_ranking: con NULL la clave
+    # no se cumple (cada NULL es distinto) y la fila se duplicaría en cada
+    # ejecución. build_ranking_row ya descarta esas filas; aquí se limpian las
+    # antiguas antes de hacer las columnas NOT NULL.
+    if (scraper_db.column_nullable(cur, "swimming_rankings", "athlete_id")
+            or scraper_db.column_nullable(cur, "swimming_rankings", "race_date")):
+        cur.execute("DELETE FROM swimming_rankings WHERE athlete_id IS NULL OR race_date IS NULL")
+        print(f"[*] Filas sin athlete_id o race_date eliminadas de swimming_rankings: {cur.rowcount}")
+        cur.execute("""
+            ALTER TABLE swimming_rankings
+                MODIFY race_date DATE NOT NULL,
+                MODIFY athlete_id INT(10) UNSIGNED NOT NULL
+        """)
+
+    if not scraper_db.index_exists(cur, "swimming_rankings", "uniq_ranking"):
+        print("[*] Eliminando duplicados de swimming_rankings y creando clave única")
+        cur.execute("""
+            DELETE older FROM swimming_rankings older
+            JOIN swimming_rankings newer
+              ON newer.gender = older.gender
+             AND newer.distance = older.distance
+             AND newer.stroke = older.stroke
+             AND newer.pool_configuration = older.pool_configuration
+             AND newer.athlete_id = older.athlete_id
+             AND newer.time_text = older.time_text
+             AND newer.race_date = older.race_date
+             AND newer.id > older.id
+        """)
+        print(f"[+] Duplicados eliminados: {cur.rowcount}")
+        cur.execute("""
+            ALTER TABLE swimming_rankings
+                ADD UNIQUE KEY uniq_ranking (
+                    gender, distance, stroke, pool_configuration,
+                    athlete_id, time_text, race_date
+                )
+        """)
+
+    # Tiempo en centésimas; las filas antiguas se rellenan con backfill_time_cs.py
+    if not scraper_db.column_exists(cur, "swimming_rankings", "time_cs"):
+        print("[*] Añadiendo columna time_cs a swimming_rankings")
+        cur.execute("""
+            ALTER TABLE swimming_rankings
+                ADD COLUMN time_cs INT(10) UNSIGNED DEFAULT NULL AFTER time_text,
+                ADD KEY idx_rankings_event_time (gender, distance, stroke, pool_configuration, time_cs)
+        """)
+
+    # Id de swim_events; las filas antiguas se rellenan con backfill_event_ids.py
+    if not scraper_db.column_exists(cur, "swimming_rankings", "event_id"):
+        print("[*] Añadiendo columna event_id a swimming_rankings")
+        cur.execute("""
+            ALTER TABLE swimming_rankings
+                ADD COLUMN event_id SMALLINT(5) UNSIGNED DEFAULT NULL AFTER pool_configuration,
+                ADD KEY idx_rankings_event_id (event_id, time_cs)
+        """)
+
+    ensure_best_table(cur)
+    scraper_changes.ensure_changes_table(cur)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ranking_fingerprints (
+            url_hash CHAR(40) NOT NULL,
+            event_key VARCHAR(64) NOT NULL,
+            prefix_rows SMALLINT(5) UNSIGNED NOT NULL,
+            prefix_hash CHAR(40) NOT NULL,
+            total_rows INT(10) UNSIGNED NOT NULL,
+            full_scan_at DATETIME NOT NULL,
+            checked_at DATETIME NOT NULL,
+            PRIMARY KEY (url_hash)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ranking_watermarks (
+            event_key VARCHAR(64) NOT NULL,
+            high_water DATE NOT NULL,
+            updated_at DATETIME NOT NULL,
+            PRIMARY KEY (event_key)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+    """)
+
+    cur.execute(f"SELECT 1 FROM {BEST_TABLE} LIMIT 1")
+    best_empty = cur.fetchone() is None
+
     conn.commit()
     cur.close()
     conn.close()
 
+    if populate_best and best_empty:
+        print(f"[*] {BEST_TABLE} vacía: se materializa a partir de swimming_rankings")
+        rebuild_best_rankings()
 
-def athlete_exists(athlete_id: int) -> bool:
-    """Comprueba si ya existe un atleta con ese ID en la tabla atletas."""
-    if athlete_id is None:
+
+# =========================
+# RANKING MATERIALIZADO
+# =========================
+
+BEST_TABLE = "swimming_rankings_best"
+
+
+def ensure_best_table(cur, table: str = BEST_TABLE):
+    """
+    Mejor marca de cada atleta en cada prueba, ya ordenada y con los datos del
+    atleta, para que la API sirva páginas sin deduplicar ni hacer JOIN.
+    overall_rank es la posición tras deduplicar (empates comparten puesto);
+    source_rank es el puesto que mostraba la web en esa fila.
+    """
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            event_id SMALLINT(5) UNSIGNED NOT NULL,
+            athlete_id INT(10) UNSIGNED NOT NULL,
+            overall_rank INT(11) NOT NULL,
+            id INT(10) UNSIGNED NOT NULL,
+            gender CHAR(1) NOT NULL,
+            distance SMALLINT(6) NOT NULL,
+            stroke VARCHAR(20) NOT NULL,
+            pool_configuration VARCHAR(10) NOT NULL,
+            source_rank INT(11) NOT NULL,
+            country_code CHAR(3) NOT NULL,
+            athlete_name VARCHAR(255) DEFAULT NULL,
+            age INT(11) DEFAULT NULL,
+            time_text VARCHAR(16) NOT NULL,
+            time_cs INT(10) UNSIGNED NOT NULL,
+            points INT(11) DEFAULT NULL,
+            tag VARCHAR(10) DEFAULT NULL,
+            record_tag VARCHAR(20) DEFAULT NULL,
+            competition VARCHAR(255) DEFAULT NULL,
+            location_country_code CHAR(3) DEFAULT NULL,
+            race_date DATE DEFAULT NULL,
+            athlete_profile_url VARCHAR(255) DEFAULT NULL,
+            image_url VARCHAR(255) DEFAULT NULL,
+            snapshot_id INT(10) UNSIGNED DEFAULT NULL,
+            updated_at DATETIME NOT NULL,
+            PRIMARY KEY (event_id, athlete_id),
+            KEY idx_best_event_rank (event_id, overall_rank),
+            KEY idx_best_filters_rank (gender, distance, stroke, pool_configuration, overall_rank)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+    """)
+
+
+# {where} filtra swimming_rankings (alias sr): una prueba o todas; {image} es
+# la foto del atleta (ver best_image_expr)
+BEST_RANKINGS_INSERT_SQL = """
+    INSERT INTO {table} (
+        event_id, athlete_id, overall_rank, id,
+        gender, distance, stroke, pool_configuration, source_rank,
+        country_code, athlete_name, age, time_text, time_cs, points,
+        tag, record_tag, competition, location_country_code, race_date,
+        athlete_profile_url, image_url, snapshot_id, updated_at
+    )
+    SELECT
+        b.event_id, b.athlete_id,
+        RANK() OVER (PARTITION BY b.event_id ORDER BY b.time_cs),
+        b.id, b.gender, b.distance, b.stroke, b.pool_configuration, b.overall_rank,
+        b.country_code, a.athlete_name, a.age, b.time_text, b.time_cs, b.points,
+        b.tag, b.record_tag, b.competition, b.location_country_code, b.race_date,
+        a.athlete_profile_url, {image}, b.snapshot_id, NOW()
+    FROM (
+        SELECT sr.*,
+               ROW_NUMBER() OVER (
+                   PARTITION BY sr.event_id, sr.athlete_id
+                   ORDER BY sr.time_cs, sr.race_date, sr.id
+               ) AS athlete_rn
+        FROM swimming_rankings sr
+        WHERE {where}
+          AND sr.event_id IS NOT NULL
+          AND sr.athlete_id IS NOT NULL
+          AND sr.time_cs IS NOT NULL
+    ) b
+    LEFT JOIN atletas a ON a.athlete_id = b.athlete_id
+    WHERE b.athlete_rn = 1
+"""
+
+
+def best_image_expr(cur) -> str:
+    """Copia local de la foto (scrape-img.py) si la hay; si no, la URL de World Aquatics."""
+    if scraper_db.column_exists(cur, "atletas", "image_local_path"):
+        return "COALESCE(a.image_local_path, a.image_url)"
+    return "a.image_url"
+
+
+def _best_slice(cur, event_id: int) -> dict:
+    """Ranking materializado de una prueba: {athlete_id: {overall_rank, time_cs, ...}}."""
+    cur.execute(f"""
+        SELECT athlete_id, overall_rank, time_cs, time_text, record_tag, race_date
+        FROM {BEST_TABLE}
+        WHERE event_id = %s
+    """, (event_id,))
+    return {row["athlete_id"]: row for row in cur.fetchall()}
+
+
+def refresh_best_rankings(event_id: int, snapshot_id: int = None):
+    """
+    Regenera las filas de una prueba en swimming_rankings_best en una sola
+    transacción: quien lee ve el ranking anterior completo hasta el COMMIT y
+    el nuevo completo después. En la misma transacción compara el ranking
+    anterior con el nuevo y guarda las diferencias en ranking_changes.
+    Devuelve (filas materializadas, cambios registrados).
+    """
+    with scraper_db.transaction(DB_CONFIG, dictionary=True) as cur:
+        old = _best_slice(cur, event_id)
+        cur.execute(f"DELETE FROM {BEST_TABLE} WHERE event_id = %s", (event_id,))
+        cur.execute(
+            BEST_RANKINGS_INSERT_SQL.format(table=BEST_TABLE, where="sr.event_id = %s", image=best_image_expr(cur)),
+            (event_id,),
+        )
+        new = _best_slice(cur, event_id)
+
+        # La primera vez todo sería "new_entry": no aporta nada al feed
+        changes = scraper_changes.diff_rankings(event_id, old, new, snapshot_id) if old else []
+        scraper_changes.record_changes(cur, changes)
+    return len(new), len(changes)
+
+
+def rerank_event(event_id: int) -> int:
+    """
+    Recalcula overall_rank de una prueba en swimming_rankings a partir de
+    time_cs. Hace falta tras una pasada incremental: los puestos que da la web
+    para una ventana de fechas son relativos a esa ventana.
+    """
+    with scraper_db.transaction(DB_CONFIG) as cur:
+        cur.execute("""
+            UPDATE swimming_rankings sr
+            JOIN (
+                SELECT id, RANK() OVER (ORDER BY time_cs) AS new_rank
+                FROM swimming_rankings
+                WHERE event_id = %s AND time_cs IS NOT NULL
+            ) ranked ON ranked.id = sr.id
+            SET sr.overall_rank = ranked.new_rank
+            WHERE sr.overall_rank <> ranked.new_rank
+        """, (event_id,))
+        return cur.rowcount
+
+
+def rebuild_best_rankings() -> int:
+    """
+    Reconstruye swimming_rankings_best entera en una tabla nueva y la cambia
+    por la actual con un RENAME TABLE (atómico), p. ej. tras un backfill.
+    """
+    new_table, old_table = f"{BEST_TABLE}_new", f"{BEST_TABLE}_old"
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        ensure_best_table(cur)
+        cur.execute(f"DROP TABLE IF EXISTS {new_table}, {old_table}")
+        ensure_best_table(cur, new_table)
+        cur.execute(BEST_RANKINGS_INSERT_SQL.format(table=new_table, where="1 = 1", image=best_image_expr(cur)))
+        rows = cur.rowcount
+        conn.commit()
+        cur.execute(f"RENAME TABLE {BEST_TABLE} TO {old_table}, {new_table} TO {BEST_TABLE}")
+        cur.execute(f"DROP TABLE {old_table}")
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    print(f"[+] {BEST_TABLE} reconstruida: {rows} filas")
+    return rows
+
+
+# =========================
+# HUELLA DE CADA PRUEBA
+# =========================
+
+FINGERPRINT_FIELDS = ("overall_rank", "athlete_id", "time_text", "points", "record_tag", "tag", "race_date")
+
+
+def _url_hash(params: dict) -> str:
+    # La URL recoge todos los filtros (prueba, año, fechas...), no solo la
+    # prueba; el corte va aparte para que top-N y profundidad completa no
+    # compartan huella
+    key = f"{build_rankings_url(params)}|{params.get('maxRows')}|{params.get('minPoints')}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def prefix_fingerprint(rows: list) -> str:
+    """Hash de las columnas visibles de las primeras filas del ranking."""
+    h = hashlib.sha1()
+    for row in rows:
+        h.update("\x1f".join(str(row.get(f)) for f in FINGERPRINT_FIELDS).encode("utf-8"))
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+
+def load_fingerprint(params: dict):
+    with scraper_db.transaction(DB_CONFIG, dictionary=True) as cur:
+        cur.execute("SELECT * FROM ranking_fingerprints WHERE url_hash = %s", (_url_hash(params),))
+        return cur.fetchone()
+
+
+def save_fingerprint(params: dict, prefix_rows: int, prefix_hash: str, total_rows, full_scan: bool):
+    """
+    Guarda la huella; full_scan_at solo avanza cuando se ha reescrito la
+    prueba entera. total_rows=None (no se ha llegado al final) deja el guardado.
+    """
+    with scraper_db.transaction(DB_CONFIG) as cur:
+        cur.execute("""
+            INSERT INTO ranking_fingerprints (
+                url_hash, event_key, prefix_rows, prefix_hash, total_rows, full_scan_at, checked_at
+            ) VALUES (%s, %s, %s, %s, COALESCE(%s, 0), NOW(), NOW())
+            ON DUPLICATE KEY UPDATE
+                prefix_rows = VALUES(prefix_rows),
+                prefix_hash = VALUES(prefix_hash),
+                total_rows = IF(%s IS NULL, total_rows, VALUES(total_rows)),
+                full_scan_at = IF(%s, VALUES(full_scan_at), full_scan_at),
+                checked_at = VALUES(checked_at)
+        """, (_url_hash(params), event_key(params), prefix_rows, prefix_hash, total_rows, total_rows, full_scan))
+
+
+def fingerprint_is_current(stored, prefix_rows: int, prefix_hash: str,
+                           total_rows: int = None, now: datetime = None) -> bool:
+    """
+    True si la huella coincide con la guardada y la última pasada completa
+    es reciente. Con total_rows (ya se conoce el número de filas) también
+    tiene que coincidir con el guardado.
+    """
+    if not stored:
         return False
+    now = now or datetime.now()
+    return (
+        stored["prefix_rows"] == prefix_rows
+        and stored["prefix_hash"] == prefix_hash
+        and (total_rows is None or stored["total_rows"] == total_rows)
+        and stored["full_scan_at"] >= now - FULL_RESCAN_EVERY
+    )
+
+
+# =========================
+# MODO INCREMENTAL
+# =========================
+
+def load_watermarks() -> dict:
+    """{event_key: fecha de la última pasada buena} de las pruebas completadas."""
+    with scraper_db.transaction(DB_CONFIG) as cur:
+        cur.execute("SELECT event_key, high_water FROM ranking_watermarks")
+        return dict(cur.fetchall())
+
 
+def save_watermark(params: dict, high_water: date):
+    """La marca de agua solo avanza (GREATEST), aunque se relance una ventana antigua."""
+    with scraper_db.transaction(DB_CONFIG) as cur:
+        cur.execute("""
+            INSERT INTO ranking_watermarks (event_key, high_water, updated_at)
+            VALUES (%s, %s, NOW())
+            ON DUPLICATE KEY UPDATE
+                high_water = GREATEST(high_water, VALUES(high_water)),
+                updated_at = VALUES(updated_at)
+        """, (event_key(params), high_water))
+
+
+def incremental_window(params: dict, high_water: date, today: date = None) -> dict:
+    """
+    Parámetros para pedir solo las marcas desde la marca de agua (menos
+    INCREMENTAL_OVERLAP) hasta hoy. Se mantiene el corte maxRows/minPoints:
+    una marca de la ventana que entre en el top-N absoluto también está en
+    el top-N de la ventana (ver window_time_limit para el resto).
+    """
+    today = today or date.today()
+    since = high_water - INCREMENTAL_OVERLAP
+    return dict(params, year="all", startDate=since.isoformat(), endDate=today.isoformat())
+
+
+def window_time_limit(params: dict, event_id: int):
+    """
+    En modo top-N, el time_cs de la fila maxRows de la prueba en
+    swimming_rankings: las marcas de la ventana más lentas no entran en el
+    ranking guardado y no se fusionan (si no, una marca del puesto 30.000
+    mundial quedaría justo detrás del 500). None = no se filtra (profundidad
+    completa, o aún no hay maxRows filas guardadas).
+    """
+    max_rows = params.get("maxRows")
+    if not max_rows:
+        return None
+    with scraper_db.transaction(DB_CONFIG) as cur:
+        cur.execute("""
+            SELECT time_cs FROM swimming_rankings
+            WHERE event_id = %s AND time_cs IS NOT NULL
+            ORDER BY time_cs
+            LIMIT 1 OFFSET %s
+        """, (event_id, int(max_rows) - 1))
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def is_windowed(params: dict) -> bool:
+    return bool(params.get("startDate") or params.get("endDate"))
+
+
+def start_snapshot():
+    """Registra el inicio de una ejecución del scraper y devuelve su id."""
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute("SELECT 1 FROM atletas WHERE athlete_id = %s LIMIT 1", (athlete_id,))
-    exists = cur.fetchone() is not None
+    cur.execute("INSERT INTO ranking_snapshots (started_at) VALUES (NOW())")
+    snapshot_id = cur.lastrowid
+    conn.commit()
     cur.close()
     conn.close()
-    return exists
+    return snapshot_id
 
 
-def insert_athlete(athlete_data: dict):
-    """Inserta un atleta en la tabla atletas."""
+def finish_snapshot(snapshot_id: int):
     conn = get_db_connection()
     cur = conn.cursor()
-    sql = """
-        INSERT INTO atletas (
-            athlete_id, athlete_name, age, gender, country_code,
-            image_url, athlete_profile_url
-        ) VALUES (
-            %(athlete_id)s, %(athlete_name)s, %(age)s, %(gender)s,
-            %(country_code)s, %(image_url)s, %(athlete_profile_url)s
-        )
-    """
-    cur.execute(sql, athlete_data)
+    cur.execute("UPDATE ranking_snapshots SET finished_at = NOW() WHERE id = %s", (snapshot_id,))
     conn.commit()
     cur.close()
     conn.close()
 
 
-def ensure_athlete_saved(row: dict):
-    """
-    Guarda el atleta en la tabla atletas si no existía previamente.
-    """
-    athlete_id = row.get("athlete_id")
-    if athlete_id is None:
-        print("[!] Fila sin athlete_id, se omite guardado en atletas")
-        return
-
-    if athlete_exists(athlete_id):
-        return
-
-    athlete_data = {
-        "athlete_id": athlete_id,
+# Atletas ya presentes en `atletas`; main() lo carga una vez al arrancar.
+known_athletes = scraper_db.KnownAthletes()
+swim_events = scraper_events.EventDimension()
+metrics = Metrics("rankings")
+
+INSERT_ATHLETE_SQL = """
+    INSERT IGNORE INTO atletas (
+        athlete_id, athlete_name, age, gender, country_code,
+        image_url, athlete_profile_url
+    ) VALUES (
+        %(athlete_id)s, %(athlete_name)s, %(age)s, %(gender)s,
+        %(country_code)s, %(image_url)s, %(athlete_profile_url)s
+    )
+"""
+
+INSERT_RANKING_SQL = """
+    INSERT INTO swimming_rankings (
+        gender, distance, stroke, pool_configuration, event_id,
+        overall_rank, country_code, time_text, time_cs, points,
+        tag, record_tag, competition,
+        location_country_code, race_date, athlete_id, snapshot_id
+    )
+    VALUES (
+        %(gender)s, %(distance)s, %(stroke)s, %(pool_configuration)s, %(event_id)s,
+        %(overall_rank)s, %(country_code)s, %(time_text)s, %(time_cs)s, %(points)s,
+        %(tag)s, %(record_tag)s, %(competition)s,
+        %(location_country_code)s, %(race_date)s, %(athlete_id)s, %(snapshot_id)s
+    )
+    ON DUPLICATE KEY UPDATE
+        event_id = VALUES(event_id),
+        overall_rank = VALUES(overall_rank),
+        country_code = VALUES(country_code),
+        time_cs = VALUES(time_cs),
+        points = VALUES(points),
+        tag = VALUES(tag),
+        record_tag = VALUES(record_tag),
+        competition = VALUES(competition),
+        location_country_code = VALUES(location_country_code),
+        snapshot_id = COALESCE(VALUES(snapshot_id), snapshot_id),
+        updated_at = NOW()
+"""
+
+
+def athlete_data_from_row(row: dict) -> dict:
+    return {
+        "athlete_id": row.get("athlete_id"),
         "athlete_name": row.get("athlete_name"),
         "age": row.get("age"),
         "gender": row.get("gender"),
@@ -187,38 +700,53 @@ def ensure_athlete_saved(row: dict):
         "athlete_profile_url": row.get("athlete_profile_url"),
     }
 
-    insert_athlete(athlete_data)
-    print(f"[+] Atleta {athlete_id} insertado en la tabla atletas")
-
 
-def upsert_ranking_row(row: dict):
+def save_ranking_rows(rows: list, label: str = "swimming_rankings", snapshot_id: int = None):
     """
-    Inserta una fila en la tabla swimming_rankings usando SOLO las columnas
-    que existen en tu definición actual.
-    De momento es un INSERT normal (si ejecutas varias veces, duplica datos).
+    Guarda todas las filas de una prueba en una única transacción:
+    1) upsert multi-fila de los rankings (marcados con `snapshot_id` y con
+       el event_id de swim_events),
+    2) INSERT IGNORE multi-fila de los atletas que no están en `known_athletes`.
+    La comprobación de si un atleta existe es una búsqueda en memoria.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
+    if not rows:
+        return 0
 
-    sql = """
-        INSERT INTO swimming_rankings (
-            gender, distance, stroke, pool_configuration,
-            overall_rank, country_code, time_text, points,
-            tag, record_tag, competition,
-            location_country_code, race_date, athlete_id
-        )
-        VALUES (
-            %(gender)s, %(distance)s, %(stroke)s, %(pool_configuration)s,
-            %(overall_rank)s, %(country_code)s, %(time_text)s, %(points)s,
-            %(tag)s, %(record_tag)s, %(competition)s,
-            %(location_country_code)s, %(race_date)s, %(athlete_id)s
-        )
-    """
+    if not known_athletes.loaded:
+        known_athletes.load(DB_CONFIG)
 
-    cur.execute(sql, row)
-    conn.commit()
-    cur.close()
-    conn.close()
+    started = time.perf_counter()
+
+    row_events = [
+        scraper_events.ranking_event(r["gender"], r["distance"], r["stroke"], r["pool_configuration"])
+        for r in rows
+    ]
+    event_ids = swim_events.ids_for(DB_CONFIG, row_events)
+
+    first_row_by_athlete = {}
+    for row, event in zip(rows, row_events):
+        row["snapshot_id"] = snapshot_id
+        row["event_id"] = event_ids[swim_events.key(event)]
+        athlete_id = row.get("athlete_id")
+        if athlete_id is not None:
+            first_row_by_athlete.setdefault(athlete_id, row)
+
+    new_ids = known_athletes.missing(first_row_by_athlete)
+
+    with metrics.stage("db_write", event=label, rows=len(rows)), scraper_db.transaction(DB_CONFIG) as cur:
+        scraper_db.executemany_chunked(cur, INSERT_RANKING_SQL, rows)
+        if new_ids:
+            new_athletes = [athlete_data_from_row(first_row_by_athlete[i]) for i in new_ids]
+            scraper_db.executemany_chunked(cur, INSERT_ATHLETE_SQL, new_athletes)
+    metrics.count("rows_saved", len(rows))
+    metrics.count("athletes_inserted", len(new_ids))
+
+    if new_ids:
+        known_athletes.add(new_ids)
+        print(f"[+] {len(new_ids)} atletas nuevos insertados en la tabla atletas")
+
+    scraper_db.report_rate(label, len(rows), started)
+    return len(rows)
 
 
 # =========================
@@ -252,36 +780,335 @@ def normalize_url(url: str) -> str:
     return url
 
 
+# =========================
+# EXTRACCIÓN DE FILAS
+# =========================
+
+RANKING_ROWS_SELECTOR = "tbody.js-rankings-table-body tr.rankings-table__row"
+
+# Se ejecuta en el navegador sobre todas las filas a la vez: una única ida y
+# vuelta por página en lugar de ~20 llamadas inner_text()/get_attribute() por fila.
+# Devuelve los valores en bruto; la conversión de tipos se hace en build_ranking_row.
+EXTRACT_RANKING_ROWS_JS = """
+rows => rows.map(row => {
+    const cells = row.querySelectorAll(':scope > td');
+    const text = i => (cells[i] ? cells[i].innerText : '').trim();
+    const attr = (el, name) => el ? el.getAttribute(name) : null;
+    const q = (i, sel) => cells[i] ? cells[i].querySelector(sel) : null;
+
+    const link = q(2, 'a.rankings-table__person-link');
+    const headshot = q(2, '.athlete-headshot');
+    const strong = q(4, 'strong');
+    const recordTags = cells[4]
+        ? Array.from(cells[4].querySelectorAll('.rankings-table__records .rankings-table__record-tag'))
+              .map(t => (t.innerText || '').trim())
+        : [];
+
+    return {
+        cell_count: cells.length,
+        overall_rank: text(0),
+        country_code: attr(q(1, 'img.flag__img'), 'alt'),
+        profile_href: attr(link, 'href'),
+        athlete_name: link ? (link.getAttribute('title') || '') : null,
+        athlete_id: attr(headshot, 'data-athlete-id'),
+        image_src: headshot ? attr(headshot.querySelector('img'), 'src') : null,
+        age: text(3),
+        time_text: strong ? strong.innerText.trim() : null,
+        record_tags: recordTags,
+        points: text(5),
+        tag: text(6),
+        competition: text(7),
+        location_country_code: attr(q(8, 'img.flag__img'), 'alt'),
+        race_date: text(9),
+    };
+})
+"""
+
+
+def build_ranking_row(raw: dict, params: dict) -> dict:
+    """Convierte una fila en bruto (ver EXTRACT_RANKING_ROWS_JS) al dict que se guarda en BD."""
+    if raw["cell_count"] < 10:
+        raise ValueError(f"fila con {raw['cell_count']} celdas")
+    if raw["time_text"] is None:
+        raise ValueError("celda de tiempo sin <strong>")
+    # Ambos forman parte de la clave única (uniq_ranking): sin ellos la fila
+    # se volvería a insertar en cada ejecución
+    athlete_id = parse_int(raw["athlete_id"])
+    if athlete_id is None:
+        raise ValueError("fila sin athlete_id")
+    race_date = parse_date(raw["race_date"])
+    if race_date is None:
+        raise ValueError(f"fecha no reconocida: {raw['race_date']!r}")
+
+    record_tags = [t for t in raw["record_tags"] if t]
+    country_code = raw["country_code"]
+    location_country_code = raw["location_country_code"]
+
+    return {
+        "gender": params["gender"],
+        "distance": int(params["distance"]),
+        "stroke": params["stroke"],
+        "pool_configuration": params["poolConfiguration"],
+
+        "overall_rank": parse_int(raw["overall_rank"]) or 0,
+        "country_code": country_code.strip() if country_code is not None else None,
+        "athlete_name": raw["athlete_name"].strip() if raw["athlete_name"] is not None else None,  # no se inserta
+        "age": parse_int(raw["age"]),                                                               # no se inserta
+        "time_text": raw["time_text"],
+        "time_cs": parse_time_cs(raw["time_text"]),
+        "points": parse_int(raw["points"]),
+        "tag": raw["tag"] or None,
+        "record_tag": ", ".join(record_tags) if record_tags else None,
+
+        "competition": raw["competition"] or None,
+        "location_country_code": location_country_code.strip() if location_country_code is not None else None,
+        "race_date": race_date,
+
+        "athlete_id": athlete_id,
+        "athlete_profile_url": normalize_url(raw["profile_href"]),  # no se inserta
+        "image_url": normalize_url(raw["image_src"]),               # no se inserta
+    }
+
+
+def _clean_text(tag) -> str:
+    """Equivalente aproximado a innerText.trim(): texto con los espacios colapsados."""
+    return " ".join(tag.get_text(" ").split()) if tag is not None else ""
+
+
+def raw_ranking_row_from_tag(tr) -> dict:
+    """Misma fila en bruto que EXTRACT_RANKING_ROWS_JS, pero a partir de un <tr> de BeautifulSoup."""
+    cells = tr.find_all("td", recursive=False)
+
+    def cell(i):
+        return cells[i] if i < len(cells) else None
+
+    def q(i, selector):
+        c = cell(i)
+        return c.select_one(selector) if c is not None else None
+
+    def attr(tag, name):
+        return tag.get(name) if tag is not None else None
+
+    link = q(2, "a.rankings-table__person-link")
+    headshot = q(2, ".athlete-headshot")
+    strong = q(4, "strong")
+    record_tags = []
+    if cell(4) is not None:
+        record_tags = [
+            _clean_text(t)
+            for t in cell(4).select(".rankings-table__records .rankings-table__record-tag")
+        ]
+
+    return {
+        "cell_count": len(cells),
+        "overall_rank": _clean_text(cell(0)),
+        "country_code": attr(q(1, "img.flag__img"), "alt"),
+        "profile_href": attr(link, "href"),
+        "athlete_name": (link.get("title") or "") if link is not None else None,
+        "athlete_id": attr(headshot, "data-athlete-id"),
+        "image_src": attr(headshot.find("img"), "src") if headshot is not None else None,
+        "age": _clean_text(cell(3)),
+        "time_text": _clean_text(strong) if strong is not None else None,
+        "record_tags": record_tags,
+        "points": _clean_text(cell(5)),
+        "tag": _clean_text(cell(6)),
+        "competition": _clean_text(cell(7)),
+        "location_country_code": attr(q(8, "img.flag__img"), "alt"),
+        "race_date": _clean_text(cell(9)),
+    }
+
+
+def extract_ranking_rows_from_html(html: str, selector: str = RANKING_ROWS_SELECTOR) -> list:
+    """Parsea un documento (o fragmento) HTML y devuelve sus filas de ranking en bruto."""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    return [raw_ranking_row_from_tag(tr) for tr in soup.select(selector)]
+
+
+# =========================
+# SCRAPING SIN NAVEGADOR (HTTP)
+# =========================
+
+class BrowserRequired(Exception):
+    """La página no se puede paginar por HTTP; hay que usar Playwright."""
+
+
+# Atributos en los que el botón "Show More" puede llevar la URL del siguiente fragmento
+SHOW_MORE_URL_ATTRS = ("data-url", "data-href", "data-next-url", "data-load-more-url", "href")
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Sesión HTTP compartida (keep-alive) con tantas conexiones como workers."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=max(WORKERS, 1))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HTTP_HEADERS)
+            _http_session = session
+        return _http_session
+
+
+def _show_more_url(soup, page_url: str):
+    """URL del fragmento detrás de "Show More", o None si ya no hay botón."""
+    button = soup.select_one(".js-show-more-button")
+    if button is None or button.has_attr("disabled"):
+        return None
+    for name in SHOW_MORE_URL_ATTRS:
+        value = button.get(name)
+        if value:
+            return urljoin(page_url, value)
+    raise BrowserRequired("el botón 'Show More' no expone la URL de la siguiente página")
+
+
+def build_ranking_rows(raw_rows: list, params: dict, first_index: int = 0) -> list:
+    """build_ranking_row sobre un lote, saltando (y avisando) las filas que no se pueden parsear."""
+    rows_data = []
+    for i, raw in enumerate(raw_rows, start=first_index + 1):
+        try:
+            rows_data.append(build_ranking_row(raw, params))
+        except Exception as e:
+            print(f"[X] Error parseando fila {i}: {e}")
+    return rows_data
+
+
+def iter_rankings_http(params: dict, rate_limiter: HostRateLimiter = None):
+    """
+    Descarga el ranking sin navegador y va devolviendo (yield) las filas de
+    cada fragmento según llegan: la página inicial y después los fragmentos
+    que carga "Show More", reutilizando la sesión HTTP.
+    Lanza BrowserRequired si la página necesita JavaScript para paginar.
+    """
+    validate_params(params)
+    url = build_rankings_url(params)
+    event = event_key(params)
+    print(f"[*] URL de rankings (http): {url}")
+    session = get_http_session()
+
+    with metrics.stage("goto", event=event, mode="http"):
+        resp = http_get(session, url, rate_limiter, timeout=HTTP_TIMEOUT)
+        resp.raise_for_status()
+
+    with metrics.stage("parse", event=event, mode="http"):
+        soup = BeautifulSoup(resp.text, HTML_PARSER)
+        raw_rows = [raw_ranking_row_from_tag(tr) for tr in soup.select(RANKING_ROWS_SELECTOR)]
+        if not raw_rows:
+            raise BrowserRequired("la respuesta no trae filas renderizadas en el HTML")
+        # Antes del primer yield, para que el fallback a Playwright no repita filas
+        next_url = _show_more_url(soup, url)
+        del soup
+        rows, done = cut_rows(build_ranking_rows(raw_rows, params), params, 0)
+
+    loaded = len(raw_rows)
+    yield rows
+
+    while next_url and not done:
+        print(f"[*] Filas actuales cargadas: {loaded}")
+        with metrics.stage("paginate", event=event, mode="http"):
+            resp = http_get(session, next_url, rate_limiter, timeout=HTTP_TIMEOUT)
+            resp.raise_for_status()
+
+        with metrics.stage("parse", event=event, mode="http"):
+            fragment = BeautifulSoup(resp.text, HTML_PARSER)
+            raw_rows = [raw_ranking_row_from_tag(tr) for tr in fragment.select("tr.rankings-table__row")]
+            if raw_rows:
+                next_url = _show_more_url(fragment, next_url)
+            del fragment
+            rows, done = cut_rows(build_ranking_rows(raw_rows, params, loaded), params, loaded)
+        if not raw_rows:
+            print("[!] No se han cargado filas nuevas. Salimos de la paginación.")
+            break
+
+        yield rows
+        loaded += len(raw_rows)
+
+    if done:
+        print(f"[*] Corte alcanzado (maxRows={params.get('maxRows')}, minPoints={params.get('minPoints')}).")
+    print(f"[+] Total de filas procesadas: {loaded}")
+
+
+def fetch_rankings_http(params: dict, rate_limiter: HostRateLimiter = None) -> list:
+    """Ranking completo en modo http (ver iter_rankings_http)."""
+    return [row for batch in iter_rankings_http(params, rate_limiter) for row in batch]
+
+
 # =========================
 # SCRAPING CON PLAYWRIGHT
 # =========================
 
-def scrape_rankings_page(params: dict):
+# Filas todavía no parseadas. Con TRIM_PARSED_ROWS las ya leídas desaparecen
+# del DOM; sin él se marcan con data-scraped.
+PENDING_ROWS_SELECTOR = RANKING_ROWS_SELECTOR + ":not([data-scraped])"
+
+# Extrae las filas pendientes (misma salida que EXTRACT_RANKING_ROWS_JS) y las
+# recorta del DOM en la misma ida y vuelta al navegador.
+EXTRACT_AND_TRIM_ROWS_JS = f"""
+([selector, trim]) => {{
+    const rows = Array.from(document.querySelectorAll(selector));
+    const out = ({EXTRACT_RANKING_ROWS_JS.strip()})(rows);
+    for (const row of rows) {{
+        if (trim) row.remove();
+        else row.setAttribute('data-scraped', '1');
+    }}
+    return out;
+}}
+"""
+
+
+def _take_pending_rows(page) -> list:
+    return page.evaluate(EXTRACT_AND_TRIM_ROWS_JS, [PENDING_ROWS_SELECTOR, TRIM_PARSED_ROWS])
+
+
+def iter_rankings_page(params: dict, pool: BrowserPool = None, rate_limiter: HostRateLimiter = None):
     """
-    Abre la página de rankings con los parámetros dados,
-    hace click en 'Show More' hasta que no queden más,
-    y devuelve una lista de dicts con los datos.
+    Abre la página de rankings con los parámetros dados y va devolviendo
+    (yield) las filas de cada tanda: parsea lo que hay, lo recorta del DOM,
+    pulsa 'Show More' y repite hasta que no queden más o hasta el corte
+    maxRows/minPoints de `params`.
+
+    Si se pasa `pool` la página sale del navegador caliente del hilo
+    (los workers de `main` lo reutilizan entre pruebas); si no, se lanza
+    un Chromium propio solo para esta llamada.
     """
+    if pool is None:
+        own_pool = BrowserPool(headless=HEADLESS, profile=INTERCEPTION_PROFILE)
+        try:
+            yield from iter_rankings_page(params, own_pool, rate_limiter)
+        finally:
+            own_pool.close_thread()
+        return
+
     validate_params(params)
     url = build_rankings_url(params)
+    event = event_key(params)
     print(f"[*] URL de rankings: {url}")
 
-    rows_data = []
+    loaded = 0
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=HEADLESS)
-        page = browser.new_page()
-        page.goto(url, wait_until="networkidle", timeout=60000)
+    with pool.page() as page:
+        # Sin networkidle: basta con el DOM y con que aparezca la tabla
+        with metrics.stage("goto", event=event, mode="browser"):
+            goto(page, url, RANKING_ROWS_SELECTOR, rate_limiter)
 
-        # Esperamos a que aparezca la tabla
-        page.wait_for_selector("tbody.js-rankings-table-body tr.rankings-table__row",
-                                timeout=30000)
-
-        # Cargar más filas con "Show More"
         while True:
-            table_rows = page.locator("tbody.js-rankings-table-body tr.rankings-table__row")
-            current_count = table_rows.count()
-            print(f"[*] Filas actuales cargadas: {current_count}")
+            # Todo lo pendiente en una sola llamada al navegador; después se
+            # convierte a dicts en Python
+            with metrics.stage("parse", event=event, mode="browser"):
+                raw_rows = _take_pending_rows(page)
+                rows, done = cut_rows(build_ranking_rows(raw_rows, params, loaded), params, loaded)
+            if rows:
+                yield rows
+            loaded += len(raw_rows)
+            print(f"[*] Filas cargadas hasta ahora: {loaded}")
+
+            if done:
+                print(f"[*] Corte alcanzado (maxRows={params.get('maxRows')}, "
+                      f"minPoints={params.get('minPoints')}). Fin de paginación.")
+                break
 
             show_more = page.locator("button.js-show-more-button")
 
@@ -302,153 +1129,317 @@ def scrape_rankings_page(params: dict):
                 break
 
             print("[*] Pulsando 'Show More'…")
-            btn.click()
-            page.wait_for_timeout(SLEEP_AFTER_SHOW_MORE * 1000)
+            with metrics.stage("paginate", event=event, mode="browser"):
+                if rate_limiter:
+                    rate_limiter.wait(url)
+                btn.click()
 
-            # Volvemos a contar filas después del click
-            new_count = table_rows.count()
-            print(f"[*] Filas después de 'Show More': {new_count}")
+                # Esperamos lo justo: hasta que aparezcan filas sin parsear (o SHOW_MORE_TIMEOUT)
+                new_count = wait_for_count_above(page, PENDING_ROWS_SELECTOR, 0,
+                                                 timeout=SHOW_MORE_TIMEOUT * 1000)
 
-            # Si no aumenta, evitamos bucle infinito
-            if new_count <= current_count:
+            # Si no llega nada nuevo, evitamos bucle infinito
+            if new_count == 0:
                 print("[!] No se han cargado filas nuevas. Salimos de la paginación.")
                 break
 
-        # Una vez cargado todo, parseamos fila a fila
-        table_rows = page.locator("tbody.js-rankings-table-body tr.rankings-table__row")
-        total_rows = table_rows.count()
-        print(f"[+] Total de filas a procesar: {total_rows}")
+    print(f"[+] Total de filas procesadas: {loaded}")
 
-        for i in range(total_rows):
-            row = table_rows.nth(i)
-            cells = row.locator("td")
 
-            try:
-                overall_rank_text = cells.nth(0).inner_text().strip()
-                overall_rank = parse_int(overall_rank_text) or 0
-
-                # Country (nadador)
-                country_img = cells.nth(1).locator("img.flag__img")
-                country_code = None
-                if country_img.count() > 0:
-                    country_code = (country_img.first.get_attribute("alt") or "").strip()
-
-                # Nombre + foto + datos atleta
-                name_cell = cells.nth(2)
-                link = name_cell.locator("a.rankings-table__person-link")
-                athlete_profile_url = None
-                athlete_name = None
-                if link.count() > 0:
-                    athlete_profile_url = normalize_url(link.first.get_attribute("href"))
-                    athlete_name = (link.first.get_attribute("title") or "").strip()
-
-                headshot = name_cell.locator(".athlete-headshot")
-                athlete_id = None
-                image_url = None
-                if headshot.count() > 0:
-                    athlete_id_attr = headshot.first.get_attribute("data-athlete-id")
-                    athlete_id = parse_int(athlete_id_attr)
-                    img = headshot.first.locator("img")
-                    if img.count() > 0:
-                        image_url = normalize_url(img.first.get_attribute("src"))
-
-                # Edad (NO se guarda en BD de momento)
-                age_text = cells.nth(3).inner_text().strip()
-                age = parse_int(age_text)
-
-                # Tiempo + record_tag (WR, MR, OC...)
-                time_cell = cells.nth(4)
-                time_text = time_cell.locator("strong").inner_text().strip()
-                record_tags_loc = time_cell.locator(".rankings-table__records .rankings-table__record-tag")
-                record_tags = []
-                for j in range(record_tags_loc.count()):
-                    tag_txt = (record_tags_loc.nth(j).inner_text() or "").strip()
-                    if tag_txt:
-                        record_tags.append(tag_txt)
-                record_tag = ", ".join(record_tags) if record_tags else None
-
-                # Points
-                points_text = cells.nth(5).inner_text().strip()
-                points = parse_int(points_text)
-
-                # Tag (columna "Tag")
-                tag_text = cells.nth(6).inner_text().strip() or None
-
-                # Competition
-                competition = cells.nth(7).inner_text().strip() or None
-
-                # Location
-                location_cell = cells.nth(8)
-                loc_country_img = location_cell.locator("img.flag__img")
-                location_country_code = None
-                if loc_country_img.count() > 0:
-                    location_country_code = (loc_country_img.first.get_attribute("alt") or "").strip()
-
-                # Date
-                date_text = cells.nth(9).inner_text().strip()
-                race_date = parse_date(date_text)
-
-                row_data = {
-                    "gender": params["gender"],
-                    "distance": int(params["distance"]),
-                    "stroke": params["stroke"],
-                    "pool_configuration": params["poolConfiguration"],
-
-                    "overall_rank": overall_rank,
-                    "country_code": country_code,
-                    "athlete_name": athlete_name,          # no se inserta
-                    "age": age,                            # no se inserta
-                    "time_text": time_text,
-                    "points": points,
-                    "tag": tag_text,
-                    "record_tag": record_tag,
-
-                    "competition": competition,
-                    "location_country_code": location_country_code,
-                    "race_date": race_date,
-
-                    "athlete_id": athlete_id,
-                    "athlete_profile_url": athlete_profile_url,  # no se inserta
-                    "image_url": image_url,                      # no se inserta
-                }
-
-                rows_data.append(row_data)
-
-            except Exception as e:
-                print(f"[X] Error parseando fila {i+1}: {e}")
-
-        browser.close()
+def scrape_rankings_page(params: dict, pool: BrowserPool = None, rate_limiter: HostRateLimiter = None):
+    """Ranking completo con Playwright (ver iter_rankings_page)."""
+    return [row for batch in iter_rankings_page(params, pool, rate_limiter) for row in batch]
 
-    return rows_data
 
+def _skip_rows(batches, n: int):
+    """Descarta las primeras `n` filas de un flujo de lotes."""
+    for batch in batches:
+        if n >= len(batch):
+            n -= len(batch)
+            continue
+        yield batch[n:]
+        n = 0
 
 
-def main():
-    ensure_table_exists()
+def iter_rankings(params: dict, pool: BrowserPool = None, rate_limiter: HostRateLimiter = None):
+    """
+    Lotes de filas de una prueba según FETCH_MODE: HTTP directo con fallback
+    a Playwright. Si el modo http falla a mitad, Playwright continúa sin
+    repetir las filas ya entregadas.
+    """
+    yielded = 0
+    if FETCH_MODE == "http":
+        try:
+            for batch in iter_rankings_http(params, rate_limiter):
+                yield batch
+                yielded += len(batch)
+            return
+        except (BrowserRequired, requests.RequestException) as e:
+            print(f"[!] Modo http no disponible ({e}). Usando Playwright.")
 
-    for params in generate_all_param_sets():
-        desc = f"{params['gender']} {params['distance']} {params['stroke']} {params['poolConfiguration']}"
-        print(f"\n==============================")
-        print(f"[*] Scrapeando prueba: {desc}")
-        print(f"==============================")
+    yield from _skip_rows(iter_rankings_page(params, pool, rate_limiter), yielded)
 
-        try:
-            rows = scrape_rankings_page(params)
-            print(f"[+] Filas obtenidas para {desc}: {len(rows)}")
 
-            for idx, row in enumerate(rows, start=1):
-                print(f"[{idx}/{len(rows)}] Guardando ranking {row['time_text']} (athlete_id={row['athlete_id']})")
-                ensure_athlete_saved(row)
-                upsert_ranking_row(row)
+def fetch_rankings(params: dict, pool: BrowserPool = None,
+                   rate_limiter: HostRateLimiter = None) -> list:
+    """Ranking completo de una prueba (ver iter_rankings)."""
+    return [row for batch in iter_rankings(params, pool, rate_limiter) for row in batch]
 
-        except Exception as e:
-            print(f"[X] Error en prueba {desc}: {e}")
 
-        # pequeño respiro entre pruebas para no ir tan agresivo
-        time.sleep(2)
+def scrape_and_save_event(params: dict, pool: BrowserPool = None,
+                          rate_limiter: HostRateLimiter = None, snapshot_id: int = None,
+                          checkpoints: CheckpointStore = None, full: bool = False) -> bool:
+    """
+    Scrapea una prueba y la va guardando en la BD por tandas de
+    STREAM_FLUSH_ROWS filas según llegan, sin esperar al ranking entero.
+    Con checkpoints, cada tanda guardada avanza el offset de la prueba y al
+    reanudar se saltan las filas que ya estaban escritas.
+
+    Si `params` trae startDate/endDate (modo incremental), las filas se
+    fusionan con las que ya había (en modo top-N solo las que entran en el
+    top-N guardado) y después se recalculan los puestos de la prueba. Al
+    terminar bien, la fecha de la pasada avanza la marca de agua.
+
+    Con USE_FINGERPRINTS (y sin `full`) se compara con la huella de la
+    última ejecución y, si coincide, no se escribe nada:
+      - con corte (top-N), la huella es el slice entero más su número de
+        filas; se descarga entero (es corto) y se compara al final;
+      - sin corte, solo las primeras FINGERPRINT_ROWS filas: si coinciden se
+        deja de paginar, y lo de más abajo lo recoge la pasada completa de
+        cada FULL_RESCAN_EVERY.
+    Devuelve True si terminó bien.
+    """
+    desc = f"{params['gender']} {params['distance']} {params['stroke']} {params['poolConfiguration']}"
+    key = event_key(params)
+    print(f"\n==============================")
+    print(f"[*] Scrapeando prueba: {desc}")
+    print(f"==============================")
+
+    started = time.perf_counter()
+    run_date = date.today()
+    offset = checkpoints.get_offset(key) if checkpoints else 0
+    if offset:
+        print(f"[*] Reanudando {desc}: {offset} filas ya procesadas")
+    saved = 0
+    loaded = 0
+    pending = []
+    prefix = []
+    prefix_hash = None
+    unchanged = False
+
+    # Una prueba a medias (offset) se termina entera sin mirar la huella
+    stored = load_fingerprint(params) if USE_FINGERPRINTS and not full and not offset else None
+    whole_slice = has_cutoff(params)
+
+    def flush():
+        nonlocal saved, pending
+        save_ranking_rows(pending, desc, snapshot_id)
+        saved += len(pending)
+        pending = []
+        # Offset = filas del flujo ya tratadas (guardadas o descartadas por time_limit)
+        if checkpoints:
+            checkpoints.set_offset(key, loaded)
+
+    try:
+        event_id = swim_events.id_for(DB_CONFIG, scraper_events.ranking_event(
+            params["gender"], params["distance"], params["stroke"], params["poolConfiguration"]))
+        time_limit = window_time_limit(params, event_id) if is_windowed(params) else None
+        if time_limit is not None:
+            print(f"[*] {desc}: solo se fusionan marcas hasta {format_time_cs(time_limit)} (top {params['maxRows']})")
+
+        batches = iter_rankings(params, pool, rate_limiter)
+        for batch in batches:
+            if whole_slice:
+                prefix.extend(batch)
+            elif prefix_hash is None:
+                prefix.extend(batch[:FINGERPRINT_ROWS - len(prefix)])
+                if len(prefix) >= FINGERPRINT_ROWS:
+                    prefix_hash = prefix_fingerprint(prefix)
+                    if fingerprint_is_current(stored, len(prefix), prefix_hash):
+                        unchanged = True
+                        batches.close()  # deja de paginar (cierra la página)
+                        break
+
+            # Al reanudar, las primeras `offset` filas ya están en BD
+            skip = min(len(batch), max(0, offset - loaded))
+            loaded += len(batch)
+            rows = batch[skip:]
+            if time_limit is not None:
+                rows = [r for r in rows if r["time_cs"] is not None and r["time_cs"] <= time_limit]
+            pending.extend(rows)
+            # Con huella que comparar, no se escribe nada hasta saber si ha cambiado
+            if (prefix_hash is not None or not stored) and len(pending) >= STREAM_FLUSH_ROWS:
+                flush()
+
+        if whole_slice:
+            prefix_hash = prefix_fingerprint(prefix)
+            if fingerprint_is_current(stored, len(prefix), prefix_hash, total_rows=loaded):
+                unchanged = True
+                pending = []
+
+        if unchanged:
+            # Sin corte no se ha llegado al final: el total guardado se queda como está
+            save_fingerprint(params, len(prefix), prefix_hash, loaded if whole_slice else None, full_scan=False)
+            what = f"las {loaded} filas" if whole_slice else f"las primeras {len(prefix)} filas"
+            print(f"[=] {desc}: {what} no han cambiado "
+                  f"(última pasada completa: {stored['full_scan_at']}). Se salta.")
+            metrics.count("events_unchanged")
+        else:
+            if pending:
+                flush()
+            print(f"[+] Filas guardadas para {desc}: {saved}")
+            if prefix_hash is None:  # ranking más corto que FINGERPRINT_ROWS
+                prefix_hash = prefix_fingerprint(prefix)
+            save_fingerprint(params, len(prefix), prefix_hash, loaded, full_scan=True)
+
+        if not unchanged:
+            if is_windowed(params):
+                with metrics.stage("rerank", event=key):
+                    reranked = rerank_event(event_id)
+                print(f"[+] Puestos recalculados en {desc}: {reranked} filas")
+
+            if MATERIALIZE_BEST:
+                with metrics.stage("materialize", event=key):
+                    best, changes = refresh_best_rankings(event_id, snapshot_id)
+                print(f"[+] Ranking materializado de {desc}: {best} atletas, {changes} cambios registrados")
+                metrics.count("ranking_changes", changes)
+
+            # Todo lo publicado hasta hoy (o hasta el fin de la ventana) ya está visto
+            window_end = date.fromisoformat(params["endDate"]) if params.get("endDate") else run_date
+            save_watermark(params, max(run_date, window_end))
+
+    except Exception as e:
+        print(f"[X] Error en prueba {desc} tras guardar {saved} filas: {e}")
+        metrics.observe("event", time.perf_counter() - started, error=True, event=key, rows=saved)
+        metrics.count("events_failed")
+        return False
+
+    metrics.observe("event", time.perf_counter() - started, event=key, rows=saved, unchanged=unchanged)
+    metrics.count("events_completed")
+
+    if checkpoints:
+        checkpoints.mark_completed(key)
+    return True
+
+
+def ranking_worker(tasks: queue.Queue, pool: BrowserPool, rate_limiter: HostRateLimiter,
+                   snapshot_id: int = None, checkpoints: CheckpointStore = None, full: bool = False):
+    """
+    Bucle de un worker: va sacando pruebas de la cola hasta vaciarla.
+    El pool le da a cada hilo su propio Chromium (solo si llega a
+    necesitarlo) y lo mantiene caliente entre pruebas.
+    """
+    try:
+        while True:
+            try:
+                params = tasks.get_nowait()
+            except queue.Empty:
+                break
+            scrape_and_save_event(params, pool, rate_limiter, snapshot_id, checkpoints, full)
+    finally:
+        pool.close_thread()
+
+
+def main(workers: int = WORKERS, resume: bool = False, full: bool = False, depth: str = "top",
+         incremental: bool = False):
+    if workers > scraper_db.MAX_POOL_SIZE:
+        print(f"[!] --workers {workers} supera las {scraper_db.MAX_POOL_SIZE} conexiones del pool; se usan {scraper_db.MAX_POOL_SIZE}")
+        workers = scraper_db.MAX_POOL_SIZE
+    # Cada worker tiene una conexión sacada mientras guarda/materializa
+    scraper_db.get_pool(DB_CONFIG, pool_size=max(scraper_db.POOL_SIZE, workers))
+    ensure_table_exists()
+    known_athletes.load(DB_CONFIG)
+
+    checkpoints = CheckpointStore("rankings")
+    run_id = checkpoints.start(resume)
+    done = checkpoints.completed_keys()
+    print(f"[*] Run de checkpoints {run_id}" + (f" (reanudado, {len(done)} pruebas ya hechas)" if done else ""))
+
+    watermarks = load_watermarks() if incremental else {}
+    tasks = queue.Queue()
+    for params in generate_all_param_sets():
+        key = event_key(params)
+        if key in done:
+            print(f"[=] Prueba {key} ya completada en este run, se salta")
+            continue
+        if key in watermarks:
+            params = incremental_window(params, watermarks[key])
+            print(f"[*] {key}: incremental desde {params['startDate']} (marca de agua {watermarks[key]})")
+        elif incremental:
+            print(f"[*] {key}: sin marca de agua, pasada completa")
+        tasks.put(full_depth(params) if depth == "full" else params)
+    if depth == "full":
+        print("[*] Profundidad completa: se pagina cada ranking hasta el final (lento)")
+
+    snapshot_id = None
+    if USE_SNAPSHOTS:
+        # Al reanudar se sigue marcando con el snapshot del run original
+        saved = checkpoints.get_meta("snapshot_id")
+        snapshot_id = int(saved) if saved else start_snapshot()
+        checkpoints.set_meta("snapshot_id", snapshot_id)
+        print(f"[*] Snapshot de rankings: {snapshot_id}")
+
+    rate_limiter = HostRateLimiter(REQUESTS_PER_SECOND)
+    pool = BrowserPool(headless=HEADLESS, pages_per_context=PAGES_PER_CONTEXT,
+                       profile=INTERCEPTION_PROFILE)
+    n_workers = max(1, min(workers, tasks.qsize()))
+    print(f"[*] Pruebas a scrapear: {tasks.qsize()} con {n_workers} worker(s)")
+
+    threads = [
+        threading.Thread(
+            target=ranking_worker,
+            args=(tasks, pool, rate_limiter, snapshot_id, checkpoints, full),
+            name=f"rankings-{i + 1}",
+        )
+        for i in range(n_workers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    done = checkpoints.completed_keys()
+    pending = [event_key(p) for p in generate_all_param_sets() if event_key(p) not in done]
+    if pending:
+        print(f"[!] Pruebas sin completar: {', '.join(pending)}. Vuelve a lanzar con --resume.")
+    else:
+        checkpoints.finish()
+        if snapshot_id:
+            finish_snapshot(snapshot_id)
+    checkpoints.close()
+
+    if pool.totals.responses:
+        print(f"[NET] Total de la ejecución: {pool.totals.summary()}")
+        metrics.count("bytes_downloaded", pool.totals.bytes_loaded)
+        metrics.count("requests_blocked", sum(pool.totals.blocked.values()))
+    metrics.close()
 
     print("[✓] Proceso completado para todas las pruebas.")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scraper de rankings de World Aquatics")
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma la última ejecución sin terminar y salta las pruebas ya guardadas")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help=f"pruebas en paralelo (por defecto {WORKERS})")
+    parser.add_argument("--full", action="store_true",
+                        help="pagina todas las pruebas aunque su huella no haya cambiado")
+    parser.add_argument("--depth", choices=("top", "full"), default="top",
+                        help=f"top: hasta maxRows={RANKING_PARAMS['maxRows']} / minPoints={RANKING_PARAMS['minPoints']} "
+                             f"por prueba (por defecto); full: ranking entero, para archivo")
+    parser.add_argument("--incremental", action="store_true",
+                        help="pide solo las marcas desde la última ejecución buena de cada prueba (startDate/endDate)")
+    parser.add_argument("--rebuild-best", action="store_true",
+                        help=f"solo reconstruye {BEST_TABLE} a partir de swimming_rankings y sale")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.rebuild_best:
+        ensure_table_exists(populate_best=False)
+        rebuild_best_rankings()
+    else:
+        main(workers=args.workers, resume=args.resume, full=args.full, depth=args.depth,
+             incremental=args.incremental)
@@ -0,0 +1,236 @@
+"""
+Pool de navegadores compartido por los scrapers de Playwright.
+
+- Un Chromium "caliente" por hilo (los objetos de Playwright sync no se pueden
+  usar desde otro hilo), que se reutiliza durante toda la ejecución.
+- Las páginas salen de un contexto que se recicla cada `pages_per_context`
+  páginas para acotar la memoria.
+- Cada página aplica un perfil de interceptación (InterceptionProfile) que
+  aborta lo que los parsers no leen: imágenes, fuentes, analítica, scripts
+  de terceros... Los parsers solo necesitan el DOM y los atributos
+  src / data-athlete-id.
+"""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from playwright.sync_api import sync_playwright
+
+
+# Tamaño medio aproximado de lo que se bloquea, para estimar el ahorro: una
+# petición abortada no llega a tener tamaño real.
+ESTIMATED_BYTES = {
+    "image": 60_000,
+    "media": 500_000,
+    "font": 40_000,
+    "script": 80_000,
+    "stylesheet": 30_000,
+    "other": 5_000,
+}
+
+ANALYTICS_URL_FRAGMENTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "scorecardresearch.com",
+)
+
+
+class InterceptionProfile:
+    """
+    Qué peticiones aborta una página.
+
+    - `resource_types`: tipos de Playwright a bloquear siempre (image, font...).
+    - `url_fragments`: bloquea cualquier URL que contenga alguno.
+    - `block_third_party_scripts`: bloquea scripts cuyo host no sea (ni
+      termine en) alguno de `first_party_domains`.
+    """
+
+    def __init__(self, name: str, resource_types=(), url_fragments=(),
+                 block_third_party_scripts: bool = False,
+                 first_party_domains=("worldaquatics.com", "fina.org")):
+        self.name = name
+        self.resource_types = frozenset(resource_types)
+        self.url_fragments = tuple(url_fragments)
+        self.block_third_party_scripts = block_third_party_scripts
+        self.first_party_domains = tuple(first_party_domains)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.resource_types or self.url_fragments or self.block_third_party_scripts)
+
+    def _is_first_party(self, url: str) -> bool:
+        host = urlparse(url).hostname or ""
+        return any(host == d or host.endswith("." + d) for d in self.first_party_domains)
+
+    def blocked_reason(self, resource_type: str, url: str):
+        """Devuelve la categoría por la que se bloquea la petición, o None si se deja pasar."""
+        if resource_type in self.resource_types:
+            return resource_type
+        if any(fragment in url for fragment in self.url_fragments):
+            return "analytics"
+        if self.block_third_party_scripts and resource_type == "script" and not self._is_first_party(url):
+            return "third-party script"
+        return None
+
+
+PROFILES = {
+    # Sin interceptar nada (para depurar con HEADLESS = False)
+    "none": InterceptionProfile("none"),
+    # Solo recursos que nunca lee un parser
+    "assets": InterceptionProfile(
+        "assets",
+        resource_types={"image", "media", "font"},
+        url_fragments=ANALYTICS_URL_FRAGMENTS,
+    ),
+    # Además, scripts de terceros: los de worldaquatics/fina se dejan porque
+    # pintan la tabla y el botón "Show More"
+    "scraping": InterceptionProfile(
+        "scraping",
+        resource_types={"image", "media", "font"},
+        url_fragments=ANALYTICS_URL_FRAGMENTS,
+        block_third_party_scripts=True,
+    ),
+}
+
+
+class PageStats:
+    """Peticiones bloqueadas y bytes descargados de una página (o de varias, con merge)."""
+
+    def __init__(self, pages: int = 0):
+        self.pages = pages
+        self.blocked = Counter()
+        self.estimated_bytes_saved = 0
+        self.bytes_loaded = 0
+        self.responses = 0
+
+    def record_blocked(self, reason: str, resource_type: str):
+        self.blocked[reason] += 1
+        self.estimated_bytes_saved += ESTIMATED_BYTES.get(resource_type, ESTIMATED_BYTES["other"])
+
+    def record_response(self, response):
+        # Cabecera local: no supone otra ida y vuelta al navegador
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.bytes_loaded += int(length)
+        self.responses += 1
+
+    def merge(self, other: "PageStats"):
+        self.pages += other.pages
+        self.blocked.update(other.blocked)
+        self.estimated_bytes_saved += other.estimated_bytes_saved
+        self.bytes_loaded += other.bytes_loaded
+        self.responses += other.responses
+
+    def summary(self) -> str:
+        detail = ", ".join(f"{k} {v}" for k, v in self.blocked.most_common()) or "ninguna"
+        return (
+            f"{sum(self.blocked.values())} peticiones bloqueadas ({detail}), "
+            f"~{self.estimated_bytes_saved / 1024:.0f} KB ahorrados (estimado), "
+            f"{self.bytes_loaded / 1024:.0f} KB descargados en {self.responses} respuestas "
+            f"({self.pages} páginas)"
+        )
+
+
+class _ThreadBrowser:
+    def __init__(self):
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.pages_in_context = 0
+        self.stats = PageStats()  # acumulado de las páginas de este hilo
+
+
+class BrowserPool:
+    """
+    Uso:
+        pool = BrowserPool(headless=True, profile="scraping")
+        with pool.page() as page:
+            page.goto(...)
+        pool.close_thread()   # al terminar cada hilo worker (imprime su resumen de red)
+        print(pool.totals.summary())
+
+    El navegador de cada hilo se lanza la primera vez que pide una página,
+    así que un hilo que nunca necesita Playwright no arranca Chromium.
+    """
+
+    def __init__(self, headless: bool = True, pages_per_context: int = 50,
+                 profile="assets", report_threads: bool = True):
+        self.headless = headless
+        self.pages_per_context = pages_per_context
+        self.profile = PROFILES[profile] if isinstance(profile, str) else profile
+        self.report_threads = report_threads
+        self.totals = PageStats()
+        self._totals_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _state(self) -> _ThreadBrowser:
+        state = getattr(self._local, "state", None)
+        if state is None:
+            state = self._local.state = _ThreadBrowser()
+        return state
+
+    def _context(self, state: _ThreadBrowser):
+        if state.browser is None:
+            state.playwright = sync_playwright().start()
+            state.browser = state.playwright.chromium.launch(headless=self.headless)
+
+        if state.context is not None and state.pages_in_context >= self.pages_per_context:
+            state.context.close()
+            state.context = None
+
+        if state.context is None:
+            state.context = state.browser.new_context()
+            state.pages_in_context = 0
+
+        return state.context
+
+    def _intercept(self, page, stats: PageStats):
+        profile = self.profile
+
+        def handle(route):
+            request = route.request
+            reason = profile.blocked_reason(request.resource_type, request.url)
+            if reason:
+                stats.record_blocked(reason, request.resource_type)
+                route.abort()
+            else:
+                route.continue_()
+
+        page.route("**/*", handle)
+        page.on("response", stats.record_response)
+
+    @contextmanager
+    def page(self):
+        """Página nueva en el contexto del hilo actual; se cierra al salir."""
+        state = self._state()
+        page = self._context(state).new_page()
+        state.pages_in_context += 1
+        stats = PageStats(pages=1)
+        if self.profile.enabled:
+            self._intercept(page, stats)
+        try:
+            yield page
+        finally:
+            page.close()
+            # Una línea por hilo al cerrarlo (close_thread), no una por página
+            state.stats.merge(stats)
+            with self._totals_lock:
+                self.totals.merge(stats)
+
+    def close_thread(self):
+        """Cierra el navegador del hilo actual (si llegó a abrirse)."""
+        state = self._state()
+        if state.context is not None:
+            state.context.close()
+        if state.browser is not None:
+            state.browser.close()
+        if state.playwright is not None:
+            state.playwright.stop()
+        if state.stats.pages and self.report_threads and self.profile.enabled:
+            print(f"[NET] Perfil '{self.profile.name}' ({threading.current_thread().name}): "
+                  f"{state.stats.summary()}")
+        self._local.state = None
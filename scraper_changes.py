@@ -0,0 +1,143 @@
+"""
+Registro de cambios (tabla ranking_changes) que dejan los scrapers.
+
+En lugar de que NotificationService o las estadísticas comparen tablas
+enteras, cada scrape compara en memoria lo que había con lo nuevo y solo
+escribe las diferencias:
+
+- new_entry:    atleta que aparece por primera vez en el ranking de una prueba
+- rank_move:    cambio de puesto (siempre si mejoró su marca; si solo le
+                adelantaron/retrasaron otros, únicamente dentro del top
+                CHANGE_FEED_TOP_N, para no escribir miles de filas por una
+                entrada nueva arriba)
+- new_record:   marca con etiqueta de récord (WR, OC...) que no estaba
+- pb_improved:  mejor marca personal rebajada en resultados
+"""
+import scraper_db
+
+
+CHANGE_FEED_TOP_N = 100
+
+
+def ensure_changes_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ranking_changes (
+            id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+            change_type VARCHAR(20) NOT NULL,
+            source VARCHAR(20) NOT NULL,
+            event_id SMALLINT UNSIGNED NULL,
+            athlete_id INT UNSIGNED NOT NULL,
+            snapshot_id INT UNSIGNED NULL,
+            old_rank INT NULL,
+            new_rank INT NULL,
+            old_time_cs INT UNSIGNED NULL,
+            new_time_cs INT UNSIGNED NULL,
+            time_text VARCHAR(32) NULL,
+            record_tag VARCHAR(50) NULL,
+            race_date DATE NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id),
+            KEY idx_changes_type (change_type, id),
+            KEY idx_changes_athlete (athlete_id, id),
+            KEY idx_changes_created (created_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+INSERT_CHANGE_SQL = """
+    INSERT INTO ranking_changes (
+        change_type, source, event_id, athlete_id, snapshot_id,
+        old_rank, new_rank, old_time_cs, new_time_cs,
+        time_text, record_tag, race_date
+    ) VALUES (
+        %(change_type)s, %(source)s, %(event_id)s, %(athlete_id)s, %(snapshot_id)s,
+        %(old_rank)s, %(new_rank)s, %(old_time_cs)s, %(new_time_cs)s,
+        %(time_text)s, %(record_tag)s, %(race_date)s
+    )
+"""
+
+
+def _change(change_type: str, source: str, **fields) -> dict:
+    row = {
+        "change_type": change_type,
+        "source": source,
+        "event_id": None,
+        "athlete_id": None,
+        "snapshot_id": None,
+        "old_rank": None,
+        "new_rank": None,
+        "old_time_cs": None,
+        "new_time_cs": None,
+        "time_text": None,
+        "record_tag": None,
+        "race_date": None,
+    }
+    row.update(fields)
+    return row
+
+
+def diff_rankings(event_id: int, old: dict, new: dict, snapshot_id: int = None,
+                  top_n: int = CHANGE_FEED_TOP_N) -> list:
+    """
+    Compara dos rankings de una prueba, cada uno como
+    {athlete_id: {"overall_rank", "time_cs", "time_text", "record_tag", "race_date"}}.
+    """
+    changes = []
+    for athlete_id, cur in new.items():
+        prev = old.get(athlete_id)
+        common = dict(
+            event_id=event_id, athlete_id=athlete_id, snapshot_id=snapshot_id,
+            new_rank=cur["overall_rank"], new_time_cs=cur["time_cs"],
+            time_text=cur["time_text"], race_date=cur["race_date"],
+        )
+
+        if prev is None:
+            changes.append(_change("new_entry", "rankings", **common))
+        else:
+            improved = cur["time_cs"] < prev["time_cs"]
+            moved = cur["overall_rank"] != prev["overall_rank"]
+            in_top = min(cur["overall_rank"], prev["overall_rank"]) <= top_n
+            if moved and (improved or in_top):
+                changes.append(_change(
+                    "rank_move", "rankings",
+                    old_rank=prev["overall_rank"], old_time_cs=prev["time_cs"], **common,
+                ))
+
+        record_tag = cur["record_tag"]
+        if record_tag and (prev is None or prev["record_tag"] != record_tag or cur["time_cs"] != prev["time_cs"]):
+            changes.append(_change(
+                "new_record", "rankings", record_tag=record_tag,
+                old_rank=prev["overall_rank"] if prev else None,
+                old_time_cs=prev["time_cs"] if prev else None,
+                **common,
+            ))
+    return changes
+
+
+def diff_personal_bests(previous_best: dict, results: list) -> list:
+    """
+    previous_best: {(athlete_id, event_id): time_cs} antes de guardar.
+    Devuelve un pb_improved por prueba en la que alguna marca nueva baja de
+    la anterior (la mejor de ellas). Las pruebas sin marca previa no cuentan.
+    """
+    best_new = {}
+    for r in results:
+        key = (r["athlete_id"], r.get("event_id"))
+        if r.get("time_cs") is None or key[1] is None or key not in previous_best:
+            continue
+        if r["time_cs"] < previous_best[key] and (key not in best_new or r["time_cs"] < best_new[key]["time_cs"]):
+            best_new[key] = r
+
+    return [
+        _change(
+            "pb_improved", "resultados",
+            event_id=event_id, athlete_id=athlete_id,
+            old_time_cs=previous_best[(athlete_id, event_id)], new_time_cs=r["time_cs"],
+            time_text=r["time_text"], record_tag=r.get("record_tags"), race_date=r.get("race_date"),
+        )
+        for (athlete_id, event_id), r in best_new.items()
+    ]
+
+
+def record_changes(cur, changes: list) -> int:
+    return scraper_db.executemany_chunked(cur, INSERT_CHANGE_SQL, changes)
@@ -0,0 +1,144 @@
+"""
+Checkpoints de los scrapers en un fichero SQLite local.
+
+Cada ejecución es un "run" de un scraper (rankings, atletas...). A medida que
+se guarda trabajo en MySQL se marca aquí como completado (una prueba, un
+atleta) o se apunta por dónde va (offset de paginación). Con --resume se
+retoma el último run sin terminar y se salta lo que ya estaba hecho.
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+
+CHECKPOINT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scraper_checkpoints.sqlite3")
+
+
+class CheckpointStore:
+    def __init__(self, scraper: str, path: str = CHECKPOINT_DB):
+        self.scraper = scraper
+        self.run_id = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scraper TEXT NOT NULL,
+                started_at TEXT NOT NULL,
+                finished_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS completed (
+                run_id INTEGER NOT NULL,
+                item_key TEXT NOT NULL,
+                completed_at TEXT NOT NULL,
+                PRIMARY KEY (run_id, item_key)
+            );
+            CREATE TABLE IF NOT EXISTS offsets (
+                run_id INTEGER NOT NULL,
+                item_key TEXT NOT NULL,
+                item_offset INTEGER NOT NULL,
+                PRIMARY KEY (run_id, item_key)
+            );
+            CREATE TABLE IF NOT EXISTS run_meta (
+                run_id INTEGER NOT NULL,
+                meta_key TEXT NOT NULL,
+                meta_value TEXT,
+                PRIMARY KEY (run_id, meta_key)
+            );
+        """)
+        self._conn.commit()
+
+    def start(self, resume: bool = False) -> int:
+        """
+        Abre un run. Con `resume` reutiliza el último run sin terminar de
+        este scraper (si lo hay); si no, crea uno nuevo.
+        """
+        with self._lock:
+            row = None
+            if resume:
+                row = self._conn.execute(
+                    "SELECT run_id FROM runs WHERE scraper = ? AND finished_at IS NULL "
+                    "ORDER BY run_id DESC LIMIT 1",
+                    (self.scraper,),
+                ).fetchone()
+            if row:
+                self.run_id = row[0]
+            else:
+                cur = self._conn.execute(
+                    "INSERT INTO runs (scraper, started_at) VALUES (?, ?)",
+                    (self.scraper, _now()),
+                )
+                self.run_id = cur.lastrowid
+                self._conn.commit()
+            return self.run_id
+
+    def completed_keys(self) -> set:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_key FROM completed WHERE run_id = ?", (self.run_id,)
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def mark_completed(self, keys):
+        """Marca como hechos uno o varios items (una sola transacción)."""
+        if isinstance(keys, str):
+            keys = [keys]
+        now = _now()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO completed (run_id, item_key, completed_at) VALUES (?, ?, ?)",
+                [(self.run_id, k, now) for k in keys],
+            )
+            self._conn.executemany(
+                "DELETE FROM offsets WHERE run_id = ? AND item_key = ?",
+                [(self.run_id, k) for k in keys],
+            )
+            self._conn.commit()
+
+    def get_offset(self, key: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT item_offset FROM offsets WHERE run_id = ? AND item_key = ?",
+                (self.run_id, key),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def set_offset(self, key: str, offset: int):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO offsets (run_id, item_key, item_offset) VALUES (?, ?, ?)",
+                (self.run_id, key, offset),
+            )
+            self._conn.commit()
+
+    def get_meta(self, key: str):
+        """Dato asociado al run (p. ej. el snapshot_id de MySQL), o None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT meta_value FROM run_meta WHERE run_id = ? AND meta_key = ?",
+                (self.run_id, key),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_meta (run_id, meta_key, meta_value) VALUES (?, ?, ?)",
+                (self.run_id, key, None if value is None else str(value)),
+            )
+            self._conn.commit()
+
+    def finish(self):
+        with self._lock:
+            self._conn.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (_now(), self.run_id))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
@@ -0,0 +1,168 @@
+"""
+Capa de persistencia compartida por los scrapers.
+
+- Un pool de conexiones MySQL por configuración (se reutilizan las conexiones
+  en lugar de abrir una por fila).
+- Transacciones explícitas: todas las escrituras de una prueba/atleta van en
+  un único COMMIT.
+- Inserciones por lotes con executemany (mysql.connector las reescribe como
+  INSERT multi-fila).
+- Conjunto en memoria de athlete_id conocidos (KnownAthletes) para no
+  preguntar a la BD fila a fila si un atleta existe.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from mysql.connector import pooling
+
+
+POOL_SIZE = 8        # >= nº de workers que escriben a la vez
+MAX_POOL_SIZE = pooling.CNX_POOL_MAXSIZE  # límite de mysql.connector (32)
+BATCH_SIZE = 500     # filas por sentencia executemany
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_config: dict, pool_size: int = POOL_SIZE) -> pooling.MySQLConnectionPool:
+    """
+    Devuelve (creándolo la primera vez) el pool asociado a `db_config`.
+    `pool_size` solo cuenta al crearlo: mysql.connector no espera a que se
+    libere una conexión (lanza PoolError), así que quien lance N workers
+    debe pedir el pool con al menos N conexiones antes de usarlo.
+    """
+    key = tuple(sorted(db_config.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = pooling.MySQLConnectionPool(
+                pool_name=f"liveswim_{len(_pools) + 1}",
+                pool_size=min(max(pool_size, 1), MAX_POOL_SIZE),
+                pool_reset_session=True,
+                **db_config,
+            )
+            _pools[key] = pool
+        return pool
+
+
+@contextmanager
+def pooled_connection(db_config: dict):
+    """Saca una conexión del pool y la devuelve al salir (conn.close())."""
+    conn = get_pool(db_config).get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+@contextmanager
+def transaction(db_config: dict, dictionary: bool = False):
+    """
+    Cursor dentro de una transacción: COMMIT si el bloque termina bien,
+    ROLLBACK si lanza excepción.
+    """
+    with pooled_connection(db_config) as conn:
+        cur = conn.cursor(dictionary=dictionary)
+        try:
+            yield cur
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def executemany_chunked(cur, sql: str, rows: list, chunk_size: int = BATCH_SIZE) -> int:
+    """Ejecuta `sql` para todas las filas en trozos de `chunk_size`. Devuelve nº de filas."""
+    for start in range(0, len(rows), chunk_size):
+        cur.executemany(sql, rows[start:start + chunk_size])
+    return len(rows)
+
+
+def report_rate(label: str, n_rows: int, started: float):
+    """Imprime filas y filas/segundo desde `started` (time.perf_counter())."""
+    elapsed = time.perf_counter() - started
+    rate = n_rows / elapsed if elapsed > 0 else float("inf")
+    print(f"[DB] {label}: {n_rows} filas en {elapsed:.2f}s ({rate:.0f} filas/s)")
+
+
+def column_exists(cur, table: str, column: str) -> bool:
+    cur.execute(
+        """
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        LIMIT 1
+        """,
+        (table, column),
+    )
+    return cur.fetchone() is not None
+
+
+def column_nullable(cur, table: str, column: str) -> bool:
+    cur.execute(
+        """
+        SELECT is_nullable FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        LIMIT 1
+        """,
+        (table, column),
+    )
+    row = cur.fetchone()
+    return row is not None and (row["is_nullable"] if isinstance(row, dict) else row[0]) == "YES"
+
+
+def index_exists(cur, table: str, index_name: str) -> bool:
+    cur.execute(
+        """
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+        """,
+        (table, index_name),
+    )
+    return cur.fetchone() is not None
+
+
+class KnownAthletes:
+    """
+    Conjunto en memoria de los athlete_id presentes en `atletas`.
+
+    Se carga una vez con una sola consulta y se mantiene al día con `add`
+    a medida que se insertan atletas nuevos. Es seguro entre hilos.
+    """
+
+    def __init__(self):
+        self._ids = set()
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def load(self, db_config: dict):
+        started = time.perf_counter()
+        with pooled_connection(db_config) as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT athlete_id FROM atletas")
+            ids = {athlete_id for (athlete_id,) in cur}
+            cur.close()
+        with self._lock:
+            self._ids = ids
+            self.loaded = True
+        print(f"[DB] Atletas conocidos cargados: {len(ids)} en {time.perf_counter() - started:.2f}s")
+
+    def __contains__(self, athlete_id) -> bool:
+        with self._lock:
+            return athlete_id in self._ids
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ids)
+
+    def missing(self, athlete_ids) -> list:
+        """Devuelve, sin repetir y en orden, los ids que aún no están en el conjunto."""
+        with self._lock:
+            return [i for i in dict.fromkeys(athlete_ids) if i is not None and i not in self._ids]
+
+    def add(self, athlete_ids):
+        with self._lock:
+            self._ids.update(i for i in athlete_ids if i is not None)
@@ -0,0 +1,155 @@
+"""
+Dimensión de pruebas (tabla swim_events) compartida por los scrapers.
+
+resultados guarda la prueba como texto ("Men 100 Freestyle" + pool_length
+"25m") y swimming_rankings como columnas (gender, distance, stroke,
+pool_configuration). Las dos se traducen aquí a la misma fila de swim_events
+y se guarda su id (event_id), así que cruzar resultados con rankings es una
+búsqueda por entero en lugar de un LIKE sobre el texto.
+
+- Pruebas individuales: gender M/F, distance en metros, stroke como en los
+  rankings (FREESTYLE, BACKSTROKE...).
+- Relevos: distance por posta, relay_legs y stroke FREESTYLE_RELAY /
+  MEDLEY_RELAY (mismos valores que acepta el backend PHP). Gender X = mixto.
+- Aguas abiertas: stroke OPEN_WATER, distance en metros y sin piscina.
+- Lo que no se reconoce (p. ej. "Mixed Team") se guarda solo con su nombre.
+"""
+import re
+import threading
+
+import scraper_db
+
+
+POOL_BY_LENGTH = {"50m": "LCM", "25m": "SCM"}
+GENDER_BY_WORD = {"men": "M", "women": "F", "mixed": "X"}
+WORD_BY_GENDER = {"M": "Men", "F": "Women", "X": "Mixed"}
+STROKES = ("FREESTYLE", "BACKSTROKE", "BREASTSTROKE", "BUTTERFLY", "MEDLEY")
+
+POOL_EVENT_RE = re.compile(
+    r"^(?:(\d+)\s*x\s*)?(\d+)\s*m?\s+(freestyle|backstroke|breaststroke|butterfly|medley)(\s+relay)?$",
+    re.IGNORECASE,
+)
+OPEN_WATER_RE = re.compile(r"^(\d+(?:\.\d+)?)\s*km$", re.IGNORECASE)
+
+
+def event_name(gender: str, distance: int, stroke: str, relay_legs: int = None) -> str:
+    """Nombre canónico, el mismo que usa la web en 'Personal Best Results': 'Men 4x100 Freestyle Relay'."""
+    base_stroke = stroke.replace("_RELAY", "").title()
+    legs = f"{relay_legs}x" if relay_legs else ""
+    relay = " Relay" if relay_legs else ""
+    return f"{WORD_BY_GENDER.get(gender, gender)} {legs}{distance} {base_stroke}{relay}"
+
+
+def parse_event(name: str, pool_length: str = None) -> dict:
+    """
+    'Men 100 Freestyle' + '25m' -> {gender: 'M', distance: 100, stroke: 'FREESTYLE',
+    relay_legs: None, pool_configuration: 'SCM', name: 'Men 100 Freestyle'}.
+    """
+    name = " ".join((name or "").split())
+    pool = POOL_BY_LENGTH.get((pool_length or "").strip().lower(), "")
+    event = {
+        "name": name,
+        "gender": None,
+        "distance": None,
+        "stroke": None,
+        "relay_legs": None,
+        "pool_configuration": pool,
+    }
+
+    word, _, rest = name.partition(" ")
+    gender = GENDER_BY_WORD.get(word.lower())
+    if gender is None:
+        return event
+    event["gender"] = gender
+
+    match = POOL_EVENT_RE.match(rest)
+    if match:
+        legs, distance, stroke, relay = match.groups()
+        relay_legs = int(legs) if legs else None
+        stroke = stroke.upper() + ("_RELAY" if relay or relay_legs else "")
+        event.update(distance=int(distance), stroke=stroke, relay_legs=relay_legs)
+        event["name"] = event_name(gender, int(distance), stroke, relay_legs)
+        return event
+
+    match = OPEN_WATER_RE.match(rest)
+    if match:
+        event.update(distance=round(float(match.group(1)) * 1000), stroke="OPEN_WATER", pool_configuration="")
+    return event
+
+
+def ranking_event(gender: str, distance, stroke: str, pool_configuration: str) -> dict:
+    """La misma fila de swim_events para una prueba de swimming_rankings."""
+    distance = int(distance)
+    return {
+        "name": event_name(gender, distance, stroke),
+        "gender": gender,
+        "distance": distance,
+        "stroke": stroke,
+        "relay_legs": None,
+        "pool_configuration": pool_configuration or "",
+    }
+
+
+def ensure_events_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS swim_events (
+            id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT,
+            name VARCHAR(255) NOT NULL,
+            gender CHAR(1) NULL,
+            distance SMALLINT UNSIGNED NULL,
+            stroke VARCHAR(20) NULL,
+            relay_legs TINYINT UNSIGNED NULL,
+            pool_configuration VARCHAR(10) NOT NULL DEFAULT '',
+            PRIMARY KEY (id),
+            UNIQUE KEY uniq_swim_event (name, pool_configuration),
+            KEY idx_swim_events_ranking (gender, distance, stroke, pool_configuration)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+INSERT_EVENT_SQL = """
+    INSERT IGNORE INTO swim_events (name, gender, distance, stroke, relay_legs, pool_configuration)
+    VALUES (%(name)s, %(gender)s, %(distance)s, %(stroke)s, %(relay_legs)s, %(pool_configuration)s)
+"""
+
+
+class EventDimension:
+    """
+    Caché en memoria (name, pool_configuration) -> swim_events.id, compartida
+    entre hilos. Las pruebas nuevas se insertan en su propia transacción
+    corta, antes de la escritura principal, para que su id sea visible
+    aunque otro worker la haya creado a la vez.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(event: dict) -> tuple:
+        return event["name"], event["pool_configuration"]
+
+    def ids_for(self, db_config: dict, events) -> dict:
+        """Devuelve {(name, pool): id} para `events`, creando las que falten."""
+        wanted = {self.key(e): e for e in events}
+        with self._lock:
+            missing = [e for k, e in wanted.items() if k not in self._ids]
+
+        if missing:
+            with scraper_db.transaction(db_config) as cur:
+                scraper_db.executemany_chunked(cur, INSERT_EVENT_SQL, missing)
+                names = sorted({e["name"] for e in missing})
+                placeholders = ", ".join(["%s"] * len(names))
+                cur.execute(
+                    f"SELECT id, name, pool_configuration FROM swim_events WHERE name IN ({placeholders})",
+                    names,
+                )
+                found = {(name, pool): event_id for event_id, name, pool in cur.fetchall()}
+            with self._lock:
+                self._ids.update(found)
+
+        with self._lock:
+            return {k: self._ids.get(k) for k in wanted}
+
+    def id_for(self, db_config: dict, event: dict):
+        return self.ids_for(db_config, [event])[self.key(event)]
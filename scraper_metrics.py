@@ -0,0 +1,173 @@
+"""
+Métricas de tiempo por etapa para los scrapers.
+
+    metrics = Metrics("rankings")
+    with metrics.stage("goto", event="M 50 FREESTYLE LCM"):
+        goto(page, url)
+    metrics.count("rows_saved", len(rows))
+    metrics.close()   # escribe metrics/rankings.prom y muestra el resumen
+
+- Cada etapa cronometrada se añade como una línea JSON a
+  metrics/<scraper>.jsonl, con sus etiquetas (prueba, atleta...) para poder
+  buscar qué item fue lento.
+- Al cerrar se escribe metrics/<scraper>.prom en formato de texto de
+  Prometheus (válido para el textfile collector de node_exporter): un
+  histograma por etapa y los contadores. Ahí solo van `scraper` y `stage`
+  como etiquetas; las de cada item se quedan en el JSON para no disparar la
+  cardinalidad.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics")
+
+# Límites superiores (segundos) de los buckets del histograma
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class _Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        self.count += 1
+        self.sum += seconds
+        if error:
+            self.errors += 1
+        for i, le in enumerate(BUCKETS):
+            if seconds <= le:
+                self.buckets[i] += 1
+
+
+class Metrics:
+    def __init__(self, scraper: str, out_dir: str = METRICS_DIR, enabled: bool = True):
+        self.scraper = scraper
+        self.out_dir = out_dir
+        self.enabled = enabled
+        self.run_id = datetime.now().strftime("%Y%m%dT%H%M%S")
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._log = None
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, **labels):
+        """Cronometra el bloque como etapa `name`; si lanza excepción se registra como error."""
+        started = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, error=error, **labels)
+
+    def observe(self, name: str, seconds: float, error: bool = False, **labels):
+        if not self.enabled:
+            return
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "run": self.run_id,
+            "scraper": self.scraper,
+            "stage": name,
+            "seconds": round(seconds, 4),
+            "thread": threading.current_thread().name,
+        }
+        if error:
+            record["error"] = True
+        record.update(labels)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = _Histogram()
+            hist.observe(seconds, error)
+            self._write_line(line)
+
+    def count(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def _write_line(self, line: str):
+        if self._log is None:
+            os.makedirs(self.out_dir, exist_ok=True)
+            self._log = open(os.path.join(self.out_dir, f"{self.scraper}.jsonl"), "a", encoding="utf-8")
+        self._log.write(line + "\n")
+        self._log.flush()
+
+    def prometheus_text(self) -> str:
+        scraper = self.scraper
+        lines = [
+            "# HELP scraper_stage_seconds Duración de cada etapa del scraper.",
+            "# TYPE scraper_stage_seconds histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        for stage, hist in histograms:
+            labels = f'scraper="{scraper}",stage="{stage}"'
+            for le, n in zip(BUCKETS, hist.buckets):
+                lines.append(f'scraper_stage_seconds_bucket{{{labels},le="{le}"}} {n}')
+            lines.append(f'scraper_stage_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+            lines.append(f"scraper_stage_seconds_sum{{{labels}}} {hist.sum:.6f}")
+            lines.append(f"scraper_stage_seconds_count{{{labels}}} {hist.count}")
+
+        lines.append("# HELP scraper_stage_errors_total Etapas que terminaron con excepción.")
+        lines.append("# TYPE scraper_stage_errors_total counter")
+        for stage, hist in histograms:
+            lines.append(f'scraper_stage_errors_total{{scraper="{scraper}",stage="{stage}"}} {hist.errors}')
+
+        for name, value in counters:
+            lines.append(f"# TYPE scraper_{name}_total counter")
+            lines.append(f'scraper_{name}_total{{scraper="{scraper}"}} {value}')
+
+        lines.append("# TYPE scraper_run_seconds gauge")
+        lines.append(f'scraper_run_seconds{{scraper="{scraper}"}} {time.perf_counter() - self._started:.3f}')
+        lines.append("# TYPE scraper_last_run_timestamp_seconds gauge")
+        lines.append(f'scraper_last_run_timestamp_seconds{{scraper="{scraper}"}} {time.time():.0f}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str = None) -> str:
+        """Escribe el fichero .prom de forma atómica (tmp + rename) y devuelve su ruta."""
+        path = path or os.path.join(self.out_dir, f"{self.scraper}.prom")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+        return path
+
+    def summary(self) -> str:
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda kv: -kv[1].sum)
+        parts = [
+            f"{stage} {hist.sum:.1f}s/{hist.count} (media {hist.sum / hist.count:.2f}s)"
+            for stage, hist in histograms
+        ]
+        return ", ".join(parts) or "sin datos"
+
+    def close(self):
+        """Escribe el .prom, cierra el JSON-lines y muestra el reparto de tiempo por etapa."""
+        if not self.enabled:
+            return
+        path = self.write_prometheus()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+        print(f"[METRICS] {self.summary()}")
+        print(f"[METRICS] Métricas en {path} y {os.path.join(self.out_dir, self.scraper + '.jsonl')}")
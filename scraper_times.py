@@ -0,0 +1,48 @@
+"""
+Tiempos de natación como enteros en centésimas (columna time_cs).
+
+time_text se sigue guardando tal cual sale en la web ("1:52.34", "22.05");
+time_cs es lo que se usa para ordenar, comparar y buscar la mejor marca,
+porque un entero indexado permite range scans y el texto no ordena bien
+("1:02.00" < "59.00" lexicográficamente).
+"""
+import re
+
+
+# [[h:]m:]s[.cc] — se toma la primera aparición, por si la celda trae texto extra
+TIME_RE = re.compile(r"(?:(\d+):)?(?:(\d+):)?(\d+)(?:[.,](\d+))?")
+
+
+def parse_time_cs(text):
+    """
+    '1:52.34' -> 11234, '22.05' -> 2205, '15:20.4' -> 92040, '1:02:03.45' -> 372345.
+    Devuelve None si no hay un tiempo reconocible (DNS, DSQ, '-', vacío...).
+    """
+    if not text:
+        return None
+    match = TIME_RE.search(text)
+    if match is None:
+        return None
+    first, second, seconds, fraction = match.groups()
+    if second is not None:
+        hours, minutes = int(first), int(second)
+    else:
+        hours, minutes = 0, int(first) if first is not None else 0
+
+    fraction = (fraction or "0")[:3].ljust(3, "0")
+    centis = (int(fraction) + 5) // 10  # redondeo de milésimas a centésimas
+    return ((hours * 60 + minutes) * 60 + int(seconds)) * 100 + centis
+
+
+def format_time_cs(time_cs):
+    """Inverso de parse_time_cs: 11234 -> '1:52.34', 2205 -> '22.05'."""
+    if time_cs is None:
+        return None
+    seconds, centis = divmod(int(time_cs), 100)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}.{centis:02d}"
+    if minutes:
+        return f"{minutes}:{seconds:02d}.{centis:02d}"
+    return f"{seconds}.{centis:02d}"
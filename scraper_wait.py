@@ -0,0 +1,162 @@
+"""
+Esperas y control de ritmo compartidos por los scrapers.
+
+En lugar de dormir un tiempo fijo (SLEEP_AFTER_SHOW_MORE, REQUEST_DELAY...)
+se espera a que ocurra lo que interesa (que crezca la tabla, que aparezca un
+selector) y las peticiones pasan por un token bucket por host que se frena
+solo cuando el servidor responde 429/5xx y vuelve a acelerar cuando responde bien.
+"""
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+# =========================
+# RATE LIMIT POR HOST
+# =========================
+
+class _Bucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.failures = 0
+
+
+class HostRateLimiter:
+    """
+    Token bucket por host compartido entre hilos.
+
+    - `wait(url)` bloquea hasta que haya un token para el host de la URL.
+    - `report(url, status)` ajusta el ritmo: ante 429/5xx divide la tasa a la
+      mitad y pausa el host (Retry-After si viene, si no backoff exponencial);
+      cada respuesta buena la sube poco a poco hasta `rate_per_second`.
+    """
+
+    def __init__(self, rate_per_second: float, burst: float = 1.0,
+                 min_rate: float = 0.1, max_backoff: float = 60.0):
+        self.max_rate = rate_per_second
+        self.burst = max(burst, 1.0)
+        self.min_rate = min(min_rate, rate_per_second) if rate_per_second > 0 else 0.0
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def _bucket(self, host: str) -> _Bucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(self.max_rate, self.burst)
+        return bucket
+
+    def wait(self, url: str):
+        if self.max_rate <= 0:
+            return
+        host = urlparse(url).netloc
+        while True:
+            with self._lock:
+                bucket = self._bucket(host)
+                now = time.monotonic()
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+                bucket.updated = now
+                if now >= bucket.blocked_until and bucket.tokens >= 1.0:
+                    bucket.tokens -= 1.0
+                    return
+                delay = max(bucket.blocked_until - now, (1.0 - bucket.tokens) / bucket.rate)
+            time.sleep(delay)
+
+    def report(self, url: str, status: int = None, retry_after: float = None):
+        """Informa del resultado de una petición (status None = error de red)."""
+        if self.max_rate <= 0:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._bucket(host)
+            if status is None or status in RETRYABLE_STATUS:
+                bucket.failures += 1
+                bucket.rate = max(self.min_rate, bucket.rate / 2)
+                pause = retry_after if retry_after is not None else min(self.max_backoff, 2 ** bucket.failures)
+                bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + pause)
+                bucket.tokens = 0.0
+            else:
+                bucket.failures = 0
+                bucket.rate = min(self.max_rate, bucket.rate + self.max_rate * 0.1)
+
+
+def parse_retry_after(value) -> float:
+    """Cabecera Retry-After en segundos (solo se admite el formato numérico)."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def http_get(session, url: str, rate_limiter: HostRateLimiter = None, retries: int = 3, **kwargs):
+    """
+    GET con rate limit y reintentos: ante 429/5xx o error de red informa al
+    limitador (que frena el host) y reintenta hasta `retries` veces.
+    Devuelve la última respuesta o relanza la última excepción de red.
+    """
+    for attempt in range(retries + 1):
+        if rate_limiter:
+            rate_limiter.wait(url)
+        try:
+            resp = session.get(url, **kwargs)
+        except requests.RequestException:
+            if rate_limiter:
+                rate_limiter.report(url, None)
+            if attempt == retries:
+                raise
+            continue
+
+        if rate_limiter:
+            rate_limiter.report(url, resp.status_code, parse_retry_after(resp.headers.get("Retry-After")))
+        if resp.status_code not in RETRYABLE_STATUS or attempt == retries:
+            return resp
+        print(f"[!] {resp.status_code} en {url}, reintento {attempt + 1}/{retries}")
+    return resp
+
+
+# =========================
+# ESPERAS EN PLAYWRIGHT
+# =========================
+
+def goto(page, url: str, ready_selector: str = None, rate_limiter: HostRateLimiter = None,
+         timeout: int = 60000, selector_timeout: int = 30000):
+    """
+    Navega con wait_until="domcontentloaded" (no espera a que se calle la red)
+    y, si se indica, espera solo al selector que de verdad se va a leer.
+    Devuelve la respuesta de la navegación.
+    """
+    if rate_limiter:
+        rate_limiter.wait(url)
+    response = page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+    if rate_limiter and response is not None:
+        rate_limiter.report(url, response.status)
+    if ready_selector:
+        page.wait_for_selector(ready_selector, timeout=selector_timeout)
+    return response
+
+
+def wait_for_count_above(page, selector: str, previous_count: int, timeout: int = 15000) -> int:
+    """
+    Espera a que haya más de `previous_count` elementos que casen con `selector`
+    (p. ej. filas tras pulsar "Show More"). Devuelve el nuevo número de
+    elementos; si vence el timeout devuelve el que haya.
+    """
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+    try:
+        page.wait_for_function(
+            "([sel, n]) => document.querySelectorAll(sel).length > n",
+            arg=[selector, previous_count],
+            timeout=timeout,
+        )
+    except PlaywrightTimeoutError:
+        pass
+    return page.locator(selector).count()
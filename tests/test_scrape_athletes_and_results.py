@@ -0,0 +1,68 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from scrape_athletes_and_results import (
+    REVISIT_BY_ACTIVITY,
+    UPCOMING_REVISIT,
+    missed_atleta,
+    revisit_interval,
+    schedule_atletas,
+)
+
+TODAY = date(2026, 10, 17)
+NOW = datetime(2026, 10, 17, 12, 0)
+
+
+def atleta(athlete_id, last_scraped_at=None, latest_race_date=None, upcoming=False):
+    return {
+        "athlete_id": athlete_id,
+        "last_scraped_at": last_scraped_at,
+        "latest_race_date": latest_race_date,
+        "upcoming": upcoming,
+    }
+
+
+@pytest.mark.parametrize("days_inactive, expected", [
+    (0, timedelta(days=1)),
+    (90, timedelta(days=1)),
+    (91, timedelta(days=7)),
+    (365, timedelta(days=7)),
+    (3 * 365, timedelta(days=30)),
+    (3 * 365 + 1, timedelta(days=180)),
+])
+def test_revisit_interval_by_activity(days_inactive, expected):
+    a = atleta(1, latest_race_date=TODAY - timedelta(days=days_inactive))
+    assert revisit_interval(a, TODAY) == expected
+
+
+def test_revisit_interval_without_results():
+    assert revisit_interval(atleta(1), TODAY) == REVISIT_BY_ACTIVITY[-1][1]
+
+
+def test_upcoming_competition_wins():
+    a = atleta(1, latest_race_date=TODAY - timedelta(days=2000), upcoming=True)
+    assert revisit_interval(a, TODAY) == UPCOMING_REVISIT
+
+
+def test_schedule_skips_fresh_athletes():
+    fresh = atleta(1, last_scraped_at=NOW - timedelta(hours=2), latest_race_date=TODAY)
+    stale = atleta(2, last_scraped_at=NOW - timedelta(days=2), latest_race_date=TODAY)
+    assert [a["athlete_id"] for a in schedule_atletas([fresh, stale], NOW)] == [2]
+
+
+def test_schedule_priority():
+    inactive = atleta(1, last_scraped_at=NOW - timedelta(days=400), latest_race_date=TODAY - timedelta(days=2000))
+    active = atleta(2, last_scraped_at=NOW - timedelta(days=2), latest_race_date=TODAY - timedelta(days=10))
+    never = atleta(3)
+    upcoming = atleta(4, last_scraped_at=NOW - timedelta(days=1), upcoming=True)
+    due = schedule_atletas([inactive, active, never, upcoming], NOW)
+    assert [a["athlete_id"] for a in due] == [4, 3, 2, 1]
+
+
+def test_missed_athlete_only_updates_its_state():
+    # Se guarda last_scraped_at sin tocar resultados ni el hash anterior (NULL lo conserva)
+    entry = missed_atleta(atleta(5))
+    assert entry["missed"] and entry["unchanged"] and not entry["error"]
+    assert entry["results"] == [] and entry["results_hash"] is None
+    assert missed_atleta(atleta(5), error=True)["error"]
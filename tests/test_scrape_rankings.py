@@ -0,0 +1,297 @@
+from datetime import date
+
+import pytest
+
+import scrape_rankings
+from scrape_rankings import _skip_rows
+from scraper_checkpoint import CheckpointStore
+
+
+def ranking_rows(n, start=1):
+    return [
+        {
+            "overall_rank": i,
+            "athlete_id": 1000 + i,
+            "time_text": f"{46 + i / 100:.2f}",
+            "time_cs": 4600 + i,
+            "points": 1000 - i,
+            "record_tag": None,
+            "tag": None,
+            "race_date": date(2026, 7, 1),
+        }
+        for i in range(start, start + n)
+    ]
+
+
+def batches_of(rows, size):
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+# =========================
+# STREAMING Y REANUDACIÓN
+# =========================
+
+@pytest.mark.parametrize("n, expected", [
+    (0, [[1, 2, 3], [4, 5, 6], [7]]),
+    (2, [[3], [4, 5, 6], [7]]),
+    (3, [[4, 5, 6], [7]]),     # el corte cae justo al final de un lote
+    (5, [[6], [7]]),
+    (7, []),
+    (50, []),
+])
+def test_skip_rows(n, expected):
+    assert list(_skip_rows(iter([[1, 2, 3], [4, 5, 6], [7]]), n)) == expected
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """scrape_and_save_event sin BD: guarda lo que escribiría cada función."""
+    db = {"saved": [], "fingerprint": None, "watermarks": []}
+
+    def save_fingerprint(params, prefix_rows, prefix_hash, total_rows, full_scan):
+        old = db["fingerprint"] or {}
+        db["fingerprint"] = {
+            "prefix_rows": prefix_rows,
+            "prefix_hash": prefix_hash,
+            "total_rows": old.get("total_rows", 0) if total_rows is None else total_rows,
+            "full_scan_at": scrape_rankings.datetime.now() if full_scan else old["full_scan_at"],
+        }
+
+    monkeypatch.setattr(scrape_rankings, "save_ranking_rows", lambda rows, desc, snapshot_id: db["saved"].extend(rows))
+    monkeypatch.setattr(scrape_rankings, "load_fingerprint", lambda params: db["fingerprint"])
+    monkeypatch.setattr(scrape_rankings, "save_fingerprint", save_fingerprint)
+    monkeypatch.setattr(scrape_rankings, "save_watermark", lambda params, high_water: db["watermarks"].append(high_water))
+    monkeypatch.setattr(scrape_rankings, "refresh_best_rankings", lambda event_id, snapshot_id: (0, 0))
+    monkeypatch.setattr(scrape_rankings, "rerank_event", lambda event_id: 0)
+    monkeypatch.setattr(scrape_rankings.swim_events, "id_for", lambda db_config, event: 1)
+    monkeypatch.setattr(scrape_rankings.metrics, "enabled", False)
+    return db
+
+
+def serve(monkeypatch, rows, size=100):
+    def iter_rankings(params, pool=None, rate_limiter=None):
+        yield from batches_of(rows, size)
+
+    monkeypatch.setattr(scrape_rankings, "iter_rankings", iter_rankings)
+
+
+@pytest.fixture
+def checkpoints(tmp_path):
+    store = CheckpointStore("test", str(tmp_path / "checkpoints.sqlite"))
+    store.start()
+    yield store
+    store.close()
+
+
+def test_resume_skips_rows_already_saved(monkeypatch, fake_db, checkpoints):
+    serve(monkeypatch, ranking_rows(250))
+    params = scrape_rankings.full_depth(scrape_rankings.RANKING_PARAMS)
+    key = scrape_rankings.event_key(params)
+    checkpoints.set_offset(key, 120)
+
+    assert scrape_rankings.scrape_and_save_event(params, checkpoints=checkpoints)
+    assert [r["overall_rank"] for r in fake_db["saved"]] == list(range(121, 251))
+    assert key in checkpoints.completed_keys()
+
+
+def test_failed_event_resumes_at_last_flush(monkeypatch, fake_db, checkpoints):
+    rows = ranking_rows(250)
+    params = scrape_rankings.full_depth(scrape_rankings.RANKING_PARAMS)
+    key = scrape_rankings.event_key(params)
+    monkeypatch.setattr(scrape_rankings, "STREAM_FLUSH_ROWS", 100)
+
+    def broken(params, pool=None, rate_limiter=None):
+        yield from batches_of(rows, 100)[:2]
+        raise RuntimeError("se cae la conexión")
+
+    monkeypatch.setattr(scrape_rankings, "iter_rankings", broken)
+    assert not scrape_rankings.scrape_and_save_event(params, checkpoints=checkpoints)
+    assert checkpoints.get_offset(key) == 200
+
+    serve(monkeypatch, rows)
+    assert scrape_rankings.scrape_and_save_event(params, checkpoints=checkpoints)
+    assert [r["overall_rank"] for r in fake_db["saved"]] == list(range(1, 251))
+
+
+# =========================
+# CORTE (maxRows / minPoints)
+# =========================
+
+def cut(max_rows=None, min_points=None):
+    return dict(scrape_rankings.RANKING_PARAMS, maxRows=max_rows, minPoints=min_points)
+
+
+def test_cut_rows_without_cutoff():
+    rows = ranking_rows(100)
+    assert scrape_rankings.cut_rows(rows, cut(), 0) == (rows, False)
+
+
+@pytest.mark.parametrize("loaded, expected_rows, reached", [
+    (0, 100, False),
+    (300, 100, False),
+    (400, 100, True),     # el lote llega justo a maxRows
+    (450, 50, True),
+    (500, 0, True),
+])
+def test_cut_rows_max_rows(loaded, expected_rows, reached):
+    rows, done = scrape_rankings.cut_rows(ranking_rows(100, start=loaded + 1), cut(max_rows=500), loaded)
+    assert (len(rows), done) == (expected_rows, reached)
+
+
+def test_cut_rows_min_points_stops_at_first_lower_row():
+    rows = [{"points": 995}, {"points": None}, {"points": 989}, {"points": 999}]
+    assert scrape_rankings.cut_rows(rows, cut(min_points=990), 0) == (rows[:2], True)
+
+
+def test_cut_rows_both_cutoffs():
+    rows = ranking_rows(100)   # points 999..900
+    kept, done = scrape_rankings.cut_rows(rows, cut(max_rows=20, min_points=950), 0)
+    assert len(kept) == 20 and done
+
+
+def test_full_depth_drops_the_cutoff():
+    params = scrape_rankings.full_depth(cut(max_rows=500, min_points=900))
+    assert params["maxRows"] is None and params["minPoints"] is None
+    assert not scrape_rankings.has_cutoff(params)
+
+
+def test_max_rows_must_be_positive():
+    with pytest.raises(ValueError):
+        scrape_rankings.validate_params(cut(max_rows=0))
+
+
+# =========================
+# HUELLAS
+# =========================
+
+def test_prefix_fingerprint_only_depends_on_visible_fields():
+    rows = ranking_rows(50)
+    same = [dict(r, competition="otra", time_cs=None) for r in rows]
+    assert scrape_rankings.prefix_fingerprint(rows) == scrape_rankings.prefix_fingerprint(same)
+
+    changed = [dict(r) for r in rows]
+    changed[-1]["points"] -= 1
+    assert scrape_rankings.prefix_fingerprint(rows) != scrape_rankings.prefix_fingerprint(changed)
+
+
+def test_prefix_fingerprint_separates_fields():
+    # "1" + "23" no puede dar la misma huella que "12" + "3"
+    a = [{"overall_rank": 1, "athlete_id": 23}]
+    b = [{"overall_rank": 12, "athlete_id": 3}]
+    assert scrape_rankings.prefix_fingerprint(a) != scrape_rankings.prefix_fingerprint(b)
+
+
+NOW = scrape_rankings.datetime(2026, 10, 17, 12, 0)
+
+
+def stored(full_scan_days_ago=1, total_rows=300):
+    return {
+        "prefix_rows": 50,
+        "prefix_hash": "abc",
+        "total_rows": total_rows,
+        "full_scan_at": NOW - scrape_rankings.timedelta(days=full_scan_days_ago),
+    }
+
+
+@pytest.mark.parametrize("kwargs, current", [
+    ({}, True),
+    ({"prefix_hash": "xyz"}, False),
+    ({"prefix_rows": 49}, False),
+    ({"total_rows": 300}, True),
+    ({"total_rows": 299}, False),
+])
+def test_fingerprint_is_current(kwargs, current):
+    args = {"prefix_rows": 50, "prefix_hash": "abc", "now": NOW, **kwargs}
+    assert scrape_rankings.fingerprint_is_current(stored(), **args) is current
+
+
+def test_fingerprint_expires_after_full_rescan_interval():
+    old = stored(full_scan_days_ago=scrape_rankings.FULL_RESCAN_EVERY.days + 1)
+    assert not scrape_rankings.fingerprint_is_current(old, 50, "abc", now=NOW)
+    assert not scrape_rankings.fingerprint_is_current(None, 50, "abc", now=NOW)
+
+
+def test_unchanged_top_n_slice_is_not_rewritten(monkeypatch, fake_db):
+    params = cut(max_rows=300)
+    serve(monkeypatch, ranking_rows(300))
+    assert scrape_rankings.scrape_and_save_event(params)
+    assert len(fake_db["saved"]) == 300
+
+    fake_db["saved"].clear()
+    assert scrape_rankings.scrape_and_save_event(params)
+    assert fake_db["saved"] == []
+
+
+def test_changed_tail_of_top_n_slice_is_rewritten(monkeypatch, fake_db):
+    params = cut(max_rows=300)
+    serve(monkeypatch, ranking_rows(300))
+    scrape_rankings.scrape_and_save_event(params)
+
+    # Mismo principio, pero el ranking ahora es más corto: la huella del slice entero cambia
+    fake_db["saved"].clear()
+    serve(monkeypatch, ranking_rows(250))
+    assert scrape_rankings.scrape_and_save_event(params)
+    assert len(fake_db["saved"]) == 250
+    assert fake_db["fingerprint"]["total_rows"] == 250
+
+
+def test_full_depth_skip_keeps_stored_total(monkeypatch, fake_db):
+    params = scrape_rankings.full_depth(scrape_rankings.RANKING_PARAMS)
+    serve(monkeypatch, ranking_rows(300))
+    scrape_rankings.scrape_and_save_event(params)
+
+    fake_db["saved"].clear()
+    assert scrape_rankings.scrape_and_save_event(params)
+    assert fake_db["saved"] == []
+    assert fake_db["fingerprint"]["total_rows"] == 300
+
+
+# =========================
+# MODO INCREMENTAL
+# =========================
+
+def test_incremental_window_overlaps_the_watermark():
+    params = scrape_rankings.incremental_window(cut(max_rows=500), date(2026, 10, 1), today=date(2026, 10, 17))
+    since = date(2026, 10, 1) - scrape_rankings.INCREMENTAL_OVERLAP
+    assert (params["year"], params["startDate"], params["endDate"]) == ("all", since.isoformat(), "2026-10-17")
+    assert params["maxRows"] == 500     # se mantiene el corte
+    assert scrape_rankings.is_windowed(params)
+
+
+def test_incremental_window_crosses_the_year():
+    params = scrape_rankings.incremental_window(cut(), date(2026, 1, 5), today=date(2026, 1, 6))
+    assert params["startDate"] == (date(2026, 1, 5) - scrape_rankings.INCREMENTAL_OVERLAP).isoformat()
+    assert params["startDate"].startswith("2025-")
+
+
+def test_plain_params_are_not_windowed():
+    assert not scrape_rankings.is_windowed(scrape_rankings.RANKING_PARAMS)
+
+
+def test_window_only_merges_rows_inside_stored_top_n(monkeypatch, fake_db):
+    params = scrape_rankings.incremental_window(cut(max_rows=500), date(2026, 10, 1), today=date(2026, 10, 17))
+    monkeypatch.setattr(scrape_rankings, "window_time_limit", lambda params, event_id: 4620)
+    serve(monkeypatch, ranking_rows(60))    # time_cs 4601..4660
+
+    assert scrape_rankings.scrape_and_save_event(params)
+    assert [r["time_cs"] for r in fake_db["saved"]] == list(range(4601, 4621))
+
+
+def test_watermark_is_the_run_date(monkeypatch, fake_db):
+    # Aunque la última marca de la ventana sea antigua, lo publicado hasta hoy ya está visto
+    params = scrape_rankings.incremental_window(cut(max_rows=500), date(2026, 1, 1), today=date(2026, 1, 20))
+    monkeypatch.setattr(scrape_rankings, "window_time_limit", lambda params, event_id: None)
+    serve(monkeypatch, ranking_rows(10))
+
+    assert scrape_rankings.scrape_and_save_event(params)
+    assert fake_db["watermarks"] == [max(date.today(), date(2026, 1, 20))]
+
+
+def test_failed_event_keeps_the_watermark(monkeypatch, fake_db):
+    def broken(params, pool=None, rate_limiter=None):
+        raise RuntimeError("timeout")
+        yield
+
+    monkeypatch.setattr(scrape_rankings, "iter_rankings", broken)
+    assert not scrape_rankings.scrape_and_save_event(cut(max_rows=500))
+    assert fake_db["watermarks"] == []
@@ -0,0 +1,90 @@
+from datetime import date
+
+from scraper_changes import diff_personal_bests, diff_rankings
+
+
+def entry(rank, time_cs, record_tag=None):
+    return {
+        "overall_rank": rank,
+        "time_cs": time_cs,
+        "time_text": str(time_cs),
+        "record_tag": record_tag,
+        "race_date": date(2026, 7, 1),
+    }
+
+
+def types(changes):
+    return sorted((c["change_type"], c["athlete_id"]) for c in changes)
+
+
+def test_new_entry():
+    changes = diff_rankings(7, {}, {1: entry(1, 4700)}, snapshot_id=3)
+    assert types(changes) == [("new_entry", 1)]
+    assert changes[0]["event_id"] == 7 and changes[0]["snapshot_id"] == 3
+
+
+def test_unchanged_ranking_has_no_changes():
+    ranking = {1: entry(1, 4700), 2: entry(2, 4750)}
+    assert diff_rankings(7, ranking, dict(ranking)) == []
+
+
+def test_improved_time_is_a_move_even_outside_top_n():
+    old = {1: entry(500, 5000)}
+    new = {1: entry(300, 4900)}
+    changes = diff_rankings(7, old, new, top_n=100)
+    assert types(changes) == [("rank_move", 1)]
+    assert (changes[0]["old_rank"], changes[0]["new_rank"]) == (500, 300)
+    assert (changes[0]["old_time_cs"], changes[0]["new_time_cs"]) == (5000, 4900)
+
+
+def test_pushed_down_only_counts_inside_top_n():
+    old = {1: entry(5, 4800), 2: entry(500, 5000)}
+    new = {1: entry(6, 4800), 2: entry(501, 5000)}
+    assert types(diff_rankings(7, old, new, top_n=100)) == [("rank_move", 1)]
+
+
+def test_tie_keeps_rank():
+    # RANK(): quien iguala la marca comparte puesto y el otro no se mueve
+    old = {1: entry(3, 4800)}
+    new = {1: entry(3, 4800), 2: entry(3, 4800)}
+    assert types(diff_rankings(7, old, new)) == [("new_entry", 2)]
+
+
+def test_new_record():
+    old = {1: entry(1, 4700)}
+    new = {1: entry(1, 4650, record_tag="WR")}
+    changes = diff_rankings(7, old, new)
+    assert types(changes) == [("new_record", 1)]
+    assert changes[0]["record_tag"] == "WR" and changes[0]["old_time_cs"] == 4700
+
+
+def test_same_record_is_not_repeated():
+    ranking = {1: entry(1, 4650, record_tag="WR")}
+    assert diff_rankings(7, ranking, {1: entry(1, 4650, record_tag="WR")}) == []
+
+
+def test_new_entry_with_record():
+    assert types(diff_rankings(7, {}, {1: entry(1, 4600, record_tag="WR")})) == [("new_entry", 1), ("new_record", 1)]
+
+
+def result(athlete_id, event_id, time_cs):
+    return {"athlete_id": athlete_id, "event_id": event_id, "time_cs": time_cs, "time_text": str(time_cs)}
+
+
+def test_personal_best_keeps_the_best_new_time():
+    previous = {(1, 7): 5000}
+    changes = diff_personal_bests(previous, [result(1, 7, 4950), result(1, 7, 4900), result(1, 7, 5100)])
+    assert len(changes) == 1
+    assert changes[0]["change_type"] == "pb_improved"
+    assert (changes[0]["old_time_cs"], changes[0]["new_time_cs"]) == (5000, 4900)
+
+
+def test_personal_best_ignores_new_events_and_missing_data():
+    previous = {(1, 7): 5000}
+    results = [
+        result(1, 8, 4000),       # prueba sin marca previa
+        result(1, None, 4000),    # sin event_id
+        result(1, 7, None),       # sin tiempo (DNS...)
+        result(1, 7, 5000),       # igualar no es mejorar
+    ]
+    assert diff_personal_bests(previous, results) == []
@@ -0,0 +1,65 @@
+import pytest
+
+from scraper_events import event_name, parse_event, ranking_event
+
+
+def test_individual_event():
+    assert parse_event("Men 100 Freestyle", "25m") == {
+        "name": "Men 100 Freestyle",
+        "gender": "M",
+        "distance": 100,
+        "stroke": "FREESTYLE",
+        "relay_legs": None,
+        "pool_configuration": "SCM",
+    }
+
+
+def test_name_is_normalized():
+    event = parse_event("Men  100m  Backstroke", "50m")
+    assert event["name"] == "Men 100 Backstroke"
+    assert (event["distance"], event["stroke"], event["pool_configuration"]) == (100, "BACKSTROKE", "LCM")
+
+
+@pytest.mark.parametrize("name, gender, distance, stroke", [
+    ("Women 4x100 Medley Relay", "F", 100, "MEDLEY_RELAY"),
+    ("Mixed 4x200 Freestyle Relay", "X", 200, "FREESTYLE_RELAY"),
+])
+def test_relays(name, gender, distance, stroke):
+    event = parse_event(name, "50m")
+    assert (event["gender"], event["distance"], event["stroke"], event["relay_legs"]) == (gender, distance, stroke, 4)
+    assert event["name"] == name
+
+
+def test_relay_without_relay_word_gets_canonical_name():
+    event = parse_event("Men 4x100 Freestyle", "50m")
+    assert event["stroke"] == "FREESTYLE_RELAY"
+    assert event["name"] == "Men 4x100 Freestyle Relay"
+
+
+@pytest.mark.parametrize("name, distance", [("Men 10km", 10000), ("Women 5 km", 5000), ("Men 2.5km", 2500)])
+def test_open_water_has_no_pool(name, distance):
+    event = parse_event(name, "50m")
+    assert (event["distance"], event["stroke"], event["pool_configuration"]) == (distance, "OPEN_WATER", "")
+
+
+@pytest.mark.parametrize("name", ["Mixed Team", "", None, "Masters 100 Freestyle"])
+def test_unrecognized_events_keep_only_the_name(name):
+    event = parse_event(name)
+    assert event["distance"] is None and event["stroke"] is None
+    assert event["name"] == (name or "")
+
+
+def test_unknown_pool_length():
+    assert parse_event("Women 1500 Freestyle", "")["pool_configuration"] == ""
+
+
+def test_ranking_event_matches_results_event():
+    # La misma prueba desde swimming_rankings y desde resultados cae en la misma fila
+    from_ranking = ranking_event("M", "100", "FREESTYLE", "LCM")
+    from_results = parse_event("Men 100 Freestyle", "50m")
+    assert from_ranking == from_results
+
+
+def test_event_name():
+    assert event_name("F", 200, "MEDLEY_RELAY", 4) == "Women 4x200 Medley Relay"
+    assert event_name("M", 50, "BUTTERFLY") == "Men 50 Butterfly"
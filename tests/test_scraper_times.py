@@ -0,0 +1,45 @@
+import pytest
+
+from scraper_times import format_time_cs, parse_time_cs
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("22.05", 2205),
+    ("1:52.34", 11234),
+    ("15:20.4", 92040),           # una sola cifra decimal
+    ("1:02:03.45", 372345),       # aguas abiertas: más de una hora
+    ("2:00:00.00", 720000),
+    ("22,05", 2205),              # coma decimal
+    ("1:52.34 WR", 11234),        # texto extra en la celda
+    ("22.055", 2206),             # milésimas, se redondea
+    ("59.999", 6000),
+])
+def test_parse_time_cs(text, expected):
+    assert parse_time_cs(text) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "-", "DNS", "DSQ"])
+def test_parse_time_cs_without_time(text):
+    assert parse_time_cs(text) is None
+
+
+@pytest.mark.parametrize("time_cs, expected", [
+    (2205, "22.05"),
+    (11234, "1:52.34"),
+    (6000, "1:00.00"),
+    (372345, "1:02:03.45"),
+    (5, "0.05"),
+    (None, None),
+])
+def test_format_time_cs(time_cs, expected):
+    assert format_time_cs(time_cs) == expected
+
+
+@pytest.mark.parametrize("text", ["22.05", "1:52.34", "15:20.40", "1:02:03.45"])
+def test_round_trip(text):
+    assert format_time_cs(parse_time_cs(text)) == text
+
+
+def test_time_cs_orders_like_times():
+    # El texto no ordena bien ("1:02.00" < "59.00"); las centésimas sí
+    assert parse_time_cs("59.00") < parse_time_cs("1:02.00")